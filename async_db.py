@@ -0,0 +1,80 @@
+"""
+Awaitable storage operations for code running on the event loop.
+
+The storage sinks (see storage.py) block: mysql.connector waits for the
+server, and SQLite and file writes wait for the disk. Called from a
+coroutine, every insert or lookup would stall all in-flight fetches. The
+functions here run the storage operations on a small pool of dedicated DB
+threads (each MySQL call borrowing its own connection from mysql_writer's
+connection pool) and await the result, so the event loop keeps fetching
+while the sinks work.
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from constants import MYSQL_WORKER_THREADS
+from storage import get_storage
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def init_db_executor(workers: int = MYSQL_WORKER_THREADS) -> ThreadPoolExecutor:
+    """Create the process-wide pool of DB threads."""
+    global _executor
+    _executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="mysql")
+    return _executor
+
+
+def get_db_executor() -> ThreadPoolExecutor:
+    """Return the process-wide pool of DB threads, creating it with defaults if needed."""
+    if _executor is None:
+        return init_db_executor()
+    return _executor
+
+
+def close_db_executor():
+    """Wait for pending DB operations and stop the DB threads."""
+    global _executor
+    if _executor is not None:
+        executor, _executor = _executor, None
+        executor.shutdown(wait=True)
+
+
+async def run_db(operation: Callable, *args):
+    """Run a blocking DB call on a DB thread and return its result."""
+    return await asyncio.get_running_loop().run_in_executor(get_db_executor(), operation, *args)
+
+
+async def create_tables() -> bool:
+    """Create the posts and crawl state tables of every sink if they do not exist."""
+    return await run_db(lambda: get_storage().create_tables())
+
+
+async def read_max_date_by_category(category) -> Optional[str]:
+    return await run_db(lambda: get_storage().read_max_date_by_category(category))
+
+
+async def insert_posts(post_data_list, category, date_str=None) -> Tuple[int, List[str]]:
+    return await run_db(lambda: get_storage().insert_posts(post_data_list, category, date_str))
+
+
+async def read_existing_post_urls(post_urls) -> Set[str]:
+    return await run_db(lambda: get_storage().read_existing_post_urls(post_urls))
+
+
+async def read_known_post_urls(category=None) -> List[str]:
+    return await run_db(lambda: get_storage().read_known_post_urls(category))
+
+
+async def record_known_urls(known_urls, category, status) -> bool:
+    return await run_db(lambda: get_storage().record_known_urls(known_urls, category, status))
+
+
+async def read_complete_dates(category, start_date_str, end_date_str) -> Set[str]:
+    return await run_db(lambda: get_storage().read_complete_dates(category, start_date_str, end_date_str))
+
+
+async def mark_dates_complete(category, post_counts: Dict[str, int]) -> bool:
+    return await run_db(lambda: get_storage().mark_dates_complete(category, post_counts))
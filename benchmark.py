@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark suite.
+
+Runs against a local mock forum (mock_forum.py) and an in-memory SQLite
+storage sink (storage.SQLiteStorage), so it needs neither the network nor
+the database:
+
+- parse_index: extract_index_rows throughput on a generated index page
+- parse_post: extract_post throughput on generated thread pages
+- end_to_end: the full streaming pipeline (index scan, fetch, parse, store)
+  over the whole mock board, in posts stored per second, with parsing on
+  the configured parse pool
+
+Each benchmark also reports its peak Python heap (tracemalloc, measured in a
+separate warm-up pass so it does not slow the timed one) and the suite
+reports the process peak RSS. Results are appended to
+benchmark_results.jsonl together with the git revision, and compared with
+the latest earlier result from the same machine and parameters so
+regressions show up between versions.
+
+Usage: python benchmark.py [--pages N] [--latency SECONDS] [--no_save] ...
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import subprocess
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional
+
+from constants import (BENCHMARK_RESULTS_PATH, BENCHMARK_REGRESSION_THRESHOLD,
+                       MAX_CONCURRENT_POST_FETCHES, MAX_CONCURRENT_INDEX_FETCHES,
+                       PARSE_EXECUTOR, PARSE_WORKERS)
+from categories import register_category
+from fetch_scheduler import init_fetch_scheduler
+from fetchers import init_fetcher, close_fetcher
+from index_crawler import extract_index_rows
+from metrics import init_metrics
+from parse_pool import PARSE_EXECUTORS, init_parse_pool, close_parse_pool
+from mock_forum import MockForum
+from pipeline import run_pipeline
+from post_extractor import extract_post
+from seen_urls import SeenUrlSet
+from storage import init_storage, close_storage
+
+
+def peak_python_mb(run: Callable[[], object]) -> float:
+    """Run once under tracemalloc and return the peak Python heap in MB."""
+    tracemalloc.start()
+    try:
+        run()
+        return round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 2)
+    finally:
+        tracemalloc.stop()
+
+
+def bench_parse_index(forum: MockForum, iterations: int) -> Dict:
+    html = forum.render_index_page(1)
+    base_url = "http://127.0.0.1/bench/"
+
+    def run():
+        for _ in range(iterations):
+            extract_index_rows(html, base_url)
+
+    peak_mb = peak_python_mb(lambda: extract_index_rows(html, base_url))
+    start = time.perf_counter()
+    run()
+    elapsed = time.perf_counter() - start
+    return {
+        "pages_per_sec": round(iterations / elapsed, 1),
+        "rows_per_sec": round(iterations * forum.rows_per_page / elapsed, 1),
+        "page_bytes": len(html.encode("utf-8")),
+        "peak_python_mb": peak_mb,
+    }
+
+
+def bench_parse_post(forum: MockForum, iterations: int) -> Dict:
+    pages = [forum.render_thread_page(thread_id) for thread_id in range(1, 6)]
+
+    def run():
+        for i in range(iterations):
+            extract_post(pages[i % len(pages)])
+
+    peak_mb = peak_python_mb(lambda: extract_post(pages[0]))
+    start = time.perf_counter()
+    run()
+    elapsed = time.perf_counter() - start
+    return {
+        "pages_per_sec": round(iterations / elapsed, 1),
+        "page_bytes": len(pages[0].encode("utf-8")),
+        "peak_python_mb": peak_mb,
+    }
+
+
+async def run_end_to_end(forum: MockForum, max_concurrency: int, index_concurrency: int) -> Dict:
+    """Crawl the whole mock board once into a fresh local store."""
+    register_category(forum.category, forum.base_url, max_concurrency=max_concurrency)
+    # Localhost needs no politeness, and retries would hide failures
+    init_fetch_scheduler(rate_per_host=100000, max_connections_per_host=max_concurrency + index_concurrency,
+                         max_retries=0)
+    init_fetcher("http")
+    metrics = init_metrics()
+    storage = init_storage(["sqlite"], sqlite_path=":memory:")
+    storage.create_tables()
+    oldest, newest = forum.date_range()
+    requests_before = forum.requests
+    try:
+        start = time.perf_counter()
+        result = await run_pipeline(forum.category, oldest, newest, max_concurrency,
+                                    index_concurrency=index_concurrency, seen_urls=SeenUrlSet())
+        elapsed = time.perf_counter() - start
+        stored = storage.primary.count_posts()
+    finally:
+        await close_fetcher()
+        close_storage()
+
+    expected = sum(1 for row in range(forum.total_rows) if forum.comment_count(row))
+    if stored != expected:
+        print(f"WARNING: stored {stored} posts, expected {expected}")
+    stages = {stage: metrics.stage_summary(stage) for stage in ("fetch", "parse_index", "parse_post", "db_write")}
+    return {
+        "posts_per_sec": round(stored / elapsed, 1),
+        "seconds": round(elapsed, 3),
+        "posts_stored": stored,
+        "posts_expected": expected,
+        "posts_discovered": result["stats"]["discovered"],
+        "requests": forum.requests - requests_before,
+        "fetch_p50_seconds": stages["fetch"]["p50_seconds"],
+        "fetch_p95_seconds": stages["fetch"]["p95_seconds"],
+        "parse_post_mean_seconds": stages["parse_post"]["mean_seconds"],
+        "db_write_mean_seconds": stages["db_write"]["mean_seconds"],
+    }
+
+
+def bench_end_to_end(forum: MockForum, max_concurrency: int, index_concurrency: int) -> Dict:
+    peak_mb = peak_python_mb(lambda: asyncio.run(run_end_to_end(forum, max_concurrency, index_concurrency)))
+    result = asyncio.run(run_end_to_end(forum, max_concurrency, index_concurrency))
+    result["peak_python_mb"] = peak_mb
+    return result
+
+
+def git_revision() -> str:
+    """Return the short git revision of the tree (with -dirty for local changes)."""
+    try:
+        return subprocess.run(["git", "describe", "--always", "--dirty"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def load_previous_result(path: str, host: str, params: Dict) -> Optional[Dict]:
+    """Return the latest stored result from the same host with the same parameters."""
+    if not os.path.exists(path):
+        return None
+    previous = None
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            if entry.get("host") == host and entry.get("params") == params:
+                previous = entry
+    return previous
+
+
+def compare_results(current: Dict, previous: Dict, threshold: float = BENCHMARK_REGRESSION_THRESHOLD) -> List[str]:
+    """List the throughputs that dropped, or peak memory that grew, by more than threshold."""
+    regressions = []
+    for bench, results in current["results"].items():
+        for key, value in results.items():
+            old_value = previous["results"].get(bench, {}).get(key)
+            if not old_value or not isinstance(value, (int, float)):
+                continue
+            change = (value - old_value) / old_value
+            if (key.endswith("_per_sec") and change < -threshold) or \
+                    (key.endswith("_mb") and change > threshold):
+                regressions.append(f"{bench}.{key}: {old_value} -> {value} ({change:+.0%}) "
+                                   f"since {previous['revision']}")
+    return regressions
+
+
+def main(pages=20, rows_per_page=25, rows_per_day=50, comments_per_post=20, latency=0.02,
+         max_concurrency=MAX_CONCURRENT_POST_FETCHES, index_concurrency=MAX_CONCURRENT_INDEX_FETCHES,
+         iterations=500, results_path=BENCHMARK_RESULTS_PATH, save=True,
+         parse_executor=PARSE_EXECUTOR, parse_workers=PARSE_WORKERS) -> Dict:
+    params = {
+        "pages": pages, "rows_per_page": rows_per_page, "rows_per_day": rows_per_day,
+        "comments_per_post": comments_per_post, "latency": latency,
+        "max_concurrency": max_concurrency, "index_concurrency": index_concurrency,
+        "iterations": iterations, "parse_executor": parse_executor, "parse_workers": parse_workers,
+    }
+    forum = MockForum(pages=pages, rows_per_page=rows_per_page, rows_per_day=rows_per_day,
+                      comments_per_post=comments_per_post, latency=latency)
+
+    print("Benchmarking index parsing...")
+    results = {"parse_index": bench_parse_index(forum, iterations)}
+    print("Benchmarking post parsing...")
+    results["parse_post"] = bench_parse_post(forum, iterations)
+    print(f"Benchmarking the end-to-end pipeline ({forum.total_rows} posts, {latency * 1000:g} ms latency)...")
+    init_parse_pool(parse_executor, parse_workers)
+    try:
+        with forum:
+            results["end_to_end"] = bench_end_to_end(forum, max_concurrency, index_concurrency)
+    finally:
+        close_parse_pool()
+
+    entry = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "revision": git_revision(),
+        "host": platform.node(),
+        "python": platform.python_version(),
+        "params": params,
+        # ru_maxrss is in KB on Linux
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "results": results,
+    }
+
+    print("\n=== BENCHMARK RESULTS ===")
+    for bench, bench_results in results.items():
+        print(f"{bench}: " + ", ".join(f"{key}={value}" for key, value in bench_results.items()))
+    print(f"peak_rss_mb: {entry['peak_rss_mb']}")
+
+    previous = load_previous_result(results_path, entry["host"], params)
+    if previous is None:
+        print("\nNo earlier result with these parameters on this machine to compare against")
+    else:
+        regressions = compare_results(entry, previous)
+        if regressions:
+            print(f"\nREGRESSIONS (over {BENCHMARK_REGRESSION_THRESHOLD:.0%}):")
+            for regression in regressions:
+                print(f"  {regression}")
+        else:
+            print(f"\nNo regressions since {previous['revision']}")
+
+    if save:
+        with open(results_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        print(f"Results appended to {results_path}")
+    return entry
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline crawler benchmarks against a mock forum")
+    parser.add_argument("--pages", type=int, default=20, help="Index pages on the mock board (default: 20)")
+    parser.add_argument("--rows_per_page", type=int, default=25, help="Posts per index page (default: 25)")
+    parser.add_argument("--rows_per_day", type=int, default=50, help="Posts per day (default: 50)")
+    parser.add_argument("--comments", type=int, default=20, help="Comments per thread (default: 20)")
+    parser.add_argument("--latency", type=float, default=0.02,
+                        help="Mock server latency per request in seconds (default: 0.02)")
+    parser.add_argument("--max_concurrency", type=int, default=MAX_CONCURRENT_POST_FETCHES,
+                        help=f"Posts fetched concurrently (default: {MAX_CONCURRENT_POST_FETCHES})")
+    parser.add_argument("--index_concurrency", type=int, default=MAX_CONCURRENT_INDEX_FETCHES,
+                        help=f"Index pages fetched concurrently (default: {MAX_CONCURRENT_INDEX_FETCHES})")
+    parser.add_argument("--iterations", type=int, default=500, help="Parse benchmark iterations (default: 500)")
+    parser.add_argument("--parse_executor", choices=PARSE_EXECUTORS, default=PARSE_EXECUTOR,
+                        help=f"Parse pool used by the end-to-end benchmark (default: {PARSE_EXECUTOR})")
+    parser.add_argument("--parse_workers", type=int, default=PARSE_WORKERS,
+                        help="Parse pool size (default: one per CPU)")
+    parser.add_argument("--results_path", default=BENCHMARK_RESULTS_PATH,
+                        help=f"Results history file (default: {BENCHMARK_RESULTS_PATH})")
+    parser.add_argument("--no_save", action="store_true", help="Do not append this run to the results file")
+    args = parser.parse_args()
+
+    main(args.pages, args.rows_per_page, args.rows_per_day, args.comments, args.latency,
+         args.max_concurrency, args.index_concurrency, args.iterations, args.results_path,
+         save=not args.no_save, parse_executor=args.parse_executor, parse_workers=args.parse_workers)
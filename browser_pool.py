@@ -0,0 +1,109 @@
+"""
+Shared pool of long-lived crawl4ai browser instances.
+
+Launching a headless browser dominates the cost of a crawl, so instead of
+opening a fresh AsyncWebCrawler for every URL the pool starts a small number
+of them once per process, hands them out to the crawlers and recycles each
+instance after a fixed number of pages or when a crawl on it fails.
+Browsers are launched with a named profile (see browser_profiles.py).
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional
+
+from crawl4ai import AsyncWebCrawler
+from crawl4ai.async_configs import BrowserConfig
+
+from browser_profiles import build_browser_config, install_hooks
+from constants import BROWSER_POOL_SIZE, BROWSER_MAX_PAGES_PER_INSTANCE, BROWSER_PROFILE
+
+
+class BrowserPool:
+    """A bounded pool of started AsyncWebCrawler instances."""
+
+    def __init__(self, size: int = BROWSER_POOL_SIZE,
+                 max_pages_per_instance: int = BROWSER_MAX_PAGES_PER_INSTANCE,
+                 browser_config: Optional[BrowserConfig] = None, profile: str = BROWSER_PROFILE):
+        self.size = max(1, size)
+        self.max_pages_per_instance = max_pages_per_instance
+        self.profile = profile
+        self.browser_config = browser_config or build_browser_config(profile)
+        self._slots = asyncio.Semaphore(self.size)
+        self._idle: List[AsyncWebCrawler] = []
+        self._page_counts: Dict[AsyncWebCrawler, int] = {}
+
+    async def _launch(self) -> AsyncWebCrawler:
+        """Start a new browser instance and register it with the pool."""
+        crawler = AsyncWebCrawler(config=self.browser_config)
+        await crawler.start()
+        install_hooks(crawler, self.profile)
+        self._page_counts[crawler] = 0
+        print(f"Browser pool: launched instance ({len(self._page_counts)}/{self.size})")
+        return crawler
+
+    async def _retire(self, crawler: AsyncWebCrawler):
+        """Shut down a browser instance and forget about it."""
+        self._page_counts.pop(crawler, None)
+        try:
+            await crawler.close()
+        except Exception as e:
+            print(f"Error closing browser instance: {e}")
+
+    @asynccontextmanager
+    async def acquire(self):
+        """Borrow a started crawler for the duration of the block.
+
+        The instance is retired if the block raises (the browser may have
+        crashed) or once it has served max_pages_per_instance pages.
+        """
+        async with self._slots:
+            crawler = self._idle.pop() if self._idle else await self._launch()
+            try:
+                yield crawler
+            except BaseException:
+                await self._retire(crawler)
+                raise
+
+            self._page_counts[crawler] += 1
+            if self.max_pages_per_instance and self._page_counts[crawler] >= self.max_pages_per_instance:
+                print("Browser pool: recycling instance after "
+                      f"{self._page_counts[crawler]} pages")
+                await self._retire(crawler)
+            else:
+                self._idle.append(crawler)
+
+    async def close(self):
+        """Shut down every browser instance still owned by the pool."""
+        crawlers = list(self._page_counts)
+        self._idle.clear()
+        for crawler in crawlers:
+            await self._retire(crawler)
+
+
+_browser_pool: Optional[BrowserPool] = None
+
+
+def init_browser_pool(size: int = BROWSER_POOL_SIZE,
+                      max_pages_per_instance: int = BROWSER_MAX_PAGES_PER_INSTANCE,
+                      browser_config: Optional[BrowserConfig] = None,
+                      profile: str = BROWSER_PROFILE) -> BrowserPool:
+    """Create the process-wide browser pool, replacing any unused one."""
+    global _browser_pool
+    _browser_pool = BrowserPool(size, max_pages_per_instance, browser_config, profile)
+    return _browser_pool
+
+
+def get_browser_pool() -> BrowserPool:
+    """Return the process-wide browser pool, creating it with defaults if needed."""
+    if _browser_pool is None:
+        return init_browser_pool()
+    return _browser_pool
+
+
+async def close_browser_pool():
+    """Shut down the process-wide browser pool if one was created."""
+    global _browser_pool
+    if _browser_pool is not None:
+        pool, _browser_pool = _browser_pool, None
+        await pool.close()
@@ -0,0 +1,117 @@
+"""
+Named crawl4ai configurations for the browser fetch engine.
+
+The forum pages only matter for their HTML, but a default browser render
+also downloads images, fonts, stylesheets, ads and analytics scripts and
+then turns the page into markdown nobody reads. Two profiles are provided:
+
+- "text": blocks every non-document resource (images, media, fonts,
+  stylesheets), ad/analytics domains and third-party scripts, skips
+  markdown generation, and returns as soon as the required selectors are
+  in the DOM (or the page has finished loading, for pages that legitimately
+  lack them, such as index pages past the end of a board)
+- "full": the crawl4ai defaults, for debugging pages that render
+  differently once resources are blocked
+
+First-party scripts keep running in the "text" profile, since a page that
+needs a browser at all usually needs its own JavaScript.
+"""
+
+import json
+from typing import List, Optional
+from urllib.parse import urlsplit
+
+from crawl4ai import CacheMode
+from crawl4ai.async_configs import BrowserConfig, CrawlerRunConfig
+from crawl4ai.markdown_generation_strategy import MarkdownGenerationStrategy
+from crawl4ai.models import MarkdownGenerationResult
+
+from constants import (BROWSER_PROFILE, BROWSER_PAGE_TIMEOUT_SECONDS,
+                       BROWSER_BLOCKED_RESOURCE_TYPES, BROWSER_BLOCKED_DOMAINS)
+
+BROWSER_PROFILES = ("text", "full")
+
+
+class NoMarkdownGenerator(MarkdownGenerationStrategy):
+    """Markdown generator that produces nothing; the crawler only uses the raw HTML."""
+
+    def generate_markdown(self, input_html: str, base_url: str = "", html2text_options=None,
+                          content_filter=None, citations: bool = True, **kwargs) -> MarkdownGenerationResult:
+        return MarkdownGenerationResult(raw_markdown="", markdown_with_citations="", references_markdown="")
+
+
+def site_of(host: Optional[str]) -> str:
+    """Return the last two labels of a host name (www.wenxuecity.com -> wenxuecity.com)."""
+    return ".".join((host or "").lower().split(".")[-2:])
+
+
+def is_blocked_domain(host: Optional[str], blocked_domains: List[str] = BROWSER_BLOCKED_DOMAINS) -> bool:
+    host = (host or "").lower()
+    return any(host == domain or host.endswith("." + domain) for domain in blocked_domains)
+
+
+def should_block(resource_type: str, url: str, page_url: str) -> bool:
+    """Decide whether a subresource request of a "text" profile page is aborted."""
+    if resource_type == "document":
+        return False
+    if resource_type in BROWSER_BLOCKED_RESOURCE_TYPES:
+        return True
+    host = urlsplit(url).hostname
+    if is_blocked_domain(host):
+        return True
+    # Scripts from other sites are ads, analytics or widgets
+    return resource_type == "script" and site_of(host) != site_of(urlsplit(page_url).hostname)
+
+
+async def block_resources(page, context=None, **kwargs):
+    """crawl4ai on_page_context_created hook: abort requests should_block rejects."""
+    async def handle(route):
+        request = route.request
+        if should_block(request.resource_type, request.url, page.url):
+            await route.abort()
+        else:
+            await route.continue_()
+
+    await page.route("**/*", handle)
+    return page
+
+
+def build_browser_config(profile: str = BROWSER_PROFILE) -> BrowserConfig:
+    """Return the BrowserConfig a pooled browser is launched with."""
+    if profile == "full":
+        return BrowserConfig()
+    if profile == "text":
+        # text_mode is left off: it disables JavaScript, which is why pages need a browser
+        return BrowserConfig(light_mode=True, avoid_ads=True, avoid_css=True, verbose=False)
+    raise ValueError(f"Unknown browser profile '{profile}', expected one of {BROWSER_PROFILES}")
+
+
+def install_hooks(crawler, profile: str = BROWSER_PROFILE):
+    """Attach the profile's page hooks to a started AsyncWebCrawler."""
+    if profile == "text":
+        crawler.crawler_strategy.set_hook("on_page_context_created", block_resources)
+
+
+def build_run_config(profile: str = BROWSER_PROFILE,
+                     required_selectors: Optional[List[str]] = None) -> CrawlerRunConfig:
+    """Return the CrawlerRunConfig for one page render."""
+    if profile == "full":
+        return CrawlerRunConfig()
+    if profile != "text":
+        raise ValueError(f"Unknown browser profile '{profile}', expected one of {BROWSER_PROFILES}")
+    wait_for = None
+    if required_selectors:
+        wait_for = ("js:() => document.readyState === 'complete' || "
+                    f"{json.dumps(list(required_selectors))}.every(s => document.querySelector(s) !== null)")
+    return CrawlerRunConfig(
+        cache_mode=CacheMode.BYPASS,
+        wait_until="domcontentloaded",
+        wait_for=wait_for,
+        page_timeout=int(BROWSER_PAGE_TIMEOUT_SECONDS * 1000),
+        delay_before_return_html=0,
+        screenshot=False,
+        pdf=False,
+        exclude_all_images=True,
+        markdown_generator=NoMarkdownGenerator(),
+        verbose=False,
+    )
@@ -0,0 +1,59 @@
+"""
+Registry of forum categories (boards) the crawler knows how to scrape.
+
+Each entry maps a category name to the board's base URL, its pagination
+parameter, the CSS selectors its index rows, thread titles, bodies and
+comments are parsed with, the selectors its index and thread pages must
+contain (by default the ones parsed) and a cap on how many of its posts may
+be fetched concurrently. New boards are added
+with register_category instead of branching on the category name.
+"""
+
+from typing import Dict, List, Optional
+
+from constants import (ZNJY_BASE_URL, ZNJY_CATEGORY, TZLC_BASE_URL, TZLC_CATEGORY, PAGE_PARAM,
+                       INDEX_ROW_SELECTOR, POST_TITLE_SELECTOR, POST_CONTENT_SELECTOR,
+                       POST_COMMENT_SELECTOR, MAX_CONCURRENT_POST_FETCHES)
+
+CATEGORY_REGISTRY: Dict[str, Dict] = {}
+
+
+def register_category(name: str, base_url: str, page_param: str = PAGE_PARAM,
+                      index_selectors: Optional[List[str]] = None,
+                      post_selectors: Optional[List[str]] = None,
+                      max_concurrency: int = MAX_CONCURRENT_POST_FETCHES,
+                      index_row_selector: str = INDEX_ROW_SELECTOR,
+                      post_title_selector: str = POST_TITLE_SELECTOR,
+                      post_content_selector: str = POST_CONTENT_SELECTOR,
+                      post_comment_selector: str = POST_COMMENT_SELECTOR) -> Dict:
+    """Add (or replace) a category in the registry and return its entry."""
+    CATEGORY_REGISTRY[name] = {
+        "name": name,
+        "base_url": base_url,
+        "page_param": page_param,
+        "index_row_selector": index_row_selector,
+        "post_title_selector": post_title_selector,
+        "post_content_selector": post_content_selector,
+        "post_comment_selector": post_comment_selector,
+        "index_selectors": index_selectors if index_selectors is not None else [index_row_selector],
+        "post_selectors": post_selectors if post_selectors is not None
+        else [post_title_selector, post_content_selector],
+        "max_concurrency": max_concurrency,
+    }
+    return CATEGORY_REGISTRY[name]
+
+
+def get_category(name: str) -> Dict:
+    """Return the registry entry for a category, raising ValueError if unknown."""
+    if name not in CATEGORY_REGISTRY:
+        raise ValueError(f"Unknown category '{name}', expected one of {list_categories()}")
+    return CATEGORY_REGISTRY[name]
+
+
+def list_categories() -> List[str]:
+    """Return the names of all registered categories."""
+    return list(CATEGORY_REGISTRY)
+
+
+register_category(ZNJY_CATEGORY, ZNJY_BASE_URL)
+register_category(TZLC_CATEGORY, TZLC_BASE_URL)
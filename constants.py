@@ -20,12 +20,154 @@ MYSQL_DATABASE = 'wxc_crawler'
 MYSQL_USER = 'crawler_admin'
 MYSQL_PASSWORD = '123'
 
+# MySQL Connection Pool Configuration
+MYSQL_POOL_NAME = 'wxc_crawler_pool'
+MYSQL_POOL_SIZE = 4
+MYSQL_INSERT_CHUNK_SIZE = 100
+# Threads that run MySQL calls off the event loop (see async_db.py); keep
+# this at or below MYSQL_POOL_SIZE so every thread can hold a connection
+MYSQL_WORKER_THREADS = 2
+
+# Storage Sink Configuration
+# Posts are written to every listed sink; the first of 'mysql' or 'sqlite'
+# in the list also answers the already-stored and completeness lookups
+STORAGE_SINKS = ['mysql']
+SQLITE_STORAGE_PATH = 'data/wxc_posts.sqlite'
+JSONL_STORAGE_PATH = 'data/wxc_posts.jsonl'
+PARQUET_STORAGE_DIR = 'data/parquet'
+PARQUET_ROWS_PER_FILE = 50000
+
 # Table Configuration
 WXC_POSTS_TABLE = 'wxc_posts'
+WXC_CRAWL_STATE_TABLE = 'wxc_crawl_state'
+WXC_KNOWN_URLS_TABLE = 'wxc_known_urls'
 
 # Crawler Configuration
+# Bounds for the date-to-page locator; MAX_PAGE_NUMBER caps how deep a backfill may search
 MIN_PAGE_NUMBER = 1
-MAX_PAGE_NUMBER = 10
+MAX_PAGE_NUMBER = 1000
+
+# Browser Pool Configuration
+BROWSER_POOL_SIZE = 4
+BROWSER_MAX_PAGES_PER_INSTANCE = 50
+
+# Browser Profile Configuration
+# 'text' blocks everything but the document and first-party scripts and
+# returns once the required selectors are present; 'full' renders normally
+BROWSER_PROFILE = 'text'
+BROWSER_PAGE_TIMEOUT_SECONDS = 30
+BROWSER_BLOCKED_RESOURCE_TYPES = ['image', 'media', 'font', 'stylesheet', 'texttrack', 'manifest']
+BROWSER_BLOCKED_DOMAINS = [
+    'google-analytics.com', 'googletagmanager.com', 'googletagservices.com',
+    'googlesyndication.com', 'doubleclick.net', 'adservice.google.com',
+    'amazon-adsystem.com', 'adnxs.com', 'criteo.com', 'taboola.com',
+    'outbrain.com', 'scorecardresearch.com', 'quantserve.com', 'facebook.net',
+]
+
+# Fetch Engine Configuration
+# 'auto' fetches over plain HTTP and falls back to a browser render when the
+# expected selectors are missing; 'http' and 'browser' force one engine
+FETCH_ENGINE = 'auto'
+HTTP_MAX_CONNECTIONS = 20
+HTTP_TIMEOUT_SECONDS = 30
+HTTP_USER_AGENT = 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36'
+
+# Fetch Scheduler Configuration
+# Each host gets a token bucket of HOST_REQUESTS_PER_SECOND (bursting to
+# HOST_BURST) and at most HOST_MAX_CONNECTIONS requests in flight. When
+# HOST_ERROR_RATE_THRESHOLD of the last HOST_ERROR_WINDOW requests failed the
+# rate is halved (not below the minimum) and recovers over
+# HOST_RATE_RECOVERY_STEPS successful requests
+HOST_REQUESTS_PER_SECOND = 5.0
+HOST_BURST = 10
+HOST_MAX_CONNECTIONS = 8
+HOST_MIN_REQUESTS_PER_SECOND = 0.5
+HOST_ERROR_WINDOW = 20
+HOST_ERROR_RATE_THRESHOLD = 0.2
+HOST_RATE_RECOVERY_STEPS = 20
+# Timeouts, connection errors, 5xx and 429 are retried with jittered exponential backoff
+FETCH_MAX_RETRIES = 4
+RETRY_BACKOFF_BASE_SECONDS = 1.0
+RETRY_BACKOFF_MAX_SECONDS = 60
+
+# CSS selectors the index and thread parsers read (per category, see categories.py)
+INDEX_ROW_SELECTOR = 'div.odd, div.even'
+POST_TITLE_SELECTOR = 'h1.title'
+POST_CONTENT_SELECTOR = '#msgbodyContent'
+POST_COMMENT_SELECTOR = '#comment a.post'
+
+# Selectors a fetched page must contain before it is considered complete
+INDEX_REQUIRED_SELECTORS = [INDEX_ROW_SELECTOR]
+POST_REQUIRED_SELECTORS = [POST_TITLE_SELECTOR, POST_CONTENT_SELECTOR]
+
+# Response Cache Configuration
+# Modes: 'use' serves fresh entries and revalidates stale ones, 'refresh'
+# always refetches and overwrites, 'bypass' disables the cache
+CACHE_MODE = 'use'
+CACHE_DIR = '.cache/responses'
+CACHE_MAX_BYTES = 512 * 1024 * 1024
+PAGE_KIND_INDEX = 'index'
+PAGE_KIND_POST = 'post'
+CACHE_INDEX_TTL_SECONDS = 10 * 60
+CACHE_POST_TTL_SECONDS = 7 * 24 * 60 * 60
+
+# Post Fetch Configuration
+MAX_CONCURRENT_POST_FETCHES = 4
+POST_FETCH_TIMEOUT_SECONDS = 120
+
+# Post Filter Configuration
+# Index rows are filtered before their threads are fetched. Posts without
+# replies are never stored, so the default only skips fetching them; rows
+# whose reply count or size is not shown are always fetched
+POST_FILTER_MIN_REPLIES = 1
+POST_FILTER_MIN_BYTES = 0
+POST_FILTER_TITLE_INCLUDE = []
+POST_FILTER_TITLE_EXCLUDE = []
+
+# Streaming Pipeline Configuration
+PIPELINE_QUEUE_SIZE = 100
+PIPELINE_WRITE_BATCH_SIZE = 50
+PIPELINE_FLUSH_INTERVAL_SECONDS = 5
+
+# Crawl Journal Configuration
+CRAWL_JOURNAL_PATH = '.cache/crawl_journal.sqlite'
+
+# Parse Pool Configuration
+# Parsing runs in a 'process' pool (scales across cores), a 'thread' pool or
+# 'inline' on the event loop; PARSE_WORKERS None means one per CPU
+PARSE_EXECUTOR = 'process'
+PARSE_WORKERS = None
+
+# Local Post Index Configuration
+POST_INDEX_PATH = '.cache/post_index.sqlite'
+
+# Watcher Configuration
+# Poll intervals adapt between the bounds: halved after a poll with
+# changes, grown by half after a quiet one. When at least
+# WATCH_CHURN_THRESHOLD of a polled page is new, the next page is polled too
+WATCH_POLL_INTERVAL_SECONDS = 120
+WATCH_MIN_INTERVAL_SECONDS = 30
+WATCH_MAX_INTERVAL_SECONDS = 900
+WATCH_MAX_PAGES = 2
+WATCH_CHURN_THRESHOLD = 0.5
+
+# Index Scan Configuration
+MAX_CONCURRENT_INDEX_FETCHES = 10
+
+# Run Metrics Configuration
+# A JSON report is written after every run; Prometheus output is opt-in
+METRICS_REPORT_PATH = '.cache/run_report.json'
+METRICS_NAMESPACE = 'wxc_crawler'
+METRICS_LATENCY_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120]
+# Percentiles come from fixed log-spaced buckets, each this factor wider than the last
+# (so within 5% of the true value), starting at METRICS_PERCENTILE_MIN_SECONDS
+METRICS_PERCENTILE_BUCKET_GROWTH = 1.1
+METRICS_PERCENTILE_MIN_SECONDS = 0.0001
+
+# Benchmark Configuration
+BENCHMARK_RESULTS_PATH = 'benchmark_results.jsonl'
+# Flag throughput drops (or peak memory growth) larger than this fraction
+BENCHMARK_REGRESSION_THRESHOLD = 0.10
 
 # Default Values
 DEFAULT_CATEGORY = 'general'
@@ -1,6 +1,6 @@
 #!/usr/bin/env python3
 """
-Main script to crawl index pages 1-10 and filter posts by date.
+Main script to crawl the index pages holding a date and filter posts by date.
 Today's date is when the main function is called.
 Filter posts where date_str = today_date - 3
 """
@@ -9,51 +9,80 @@ import asyncio
 from datetime import datetime, timedelta
 import sys
 import argparse
-from constants import ZNJY_CATEGORY
-from index_crawler import crawl_index
-from post_crawler import crawl_post
-import mysql_writer
-
-async def fetch_post_data(href_list, target_date_str):
-    """Fetch detailed data for each post URL."""
-    post_data_results = []
-    
-    for href in href_list:
-        print(f"Fetching data for post: {href}")
-        try:
-            # Call the post_crawler to get post data
-            post_data = await crawl_post(href)
-            if len(post_data["comments"]) == 0:
-                 print(f"Skipping empty post: {href}")
-            elif post_data:
-                post_data_results.append({
-                    "url": href,
-                    "data": post_data
-                })
-            else:
-                print(f"Failed to fetch data for: {href}")
-        except Exception as e:
-            print(f"Error fetching data for {href}: {e}")
-    
-    return post_data_results
-
-async def crawl_and_filter_posts(pages_to_crawl, category, target_date_str):
-    """Crawl pages and filter posts by date."""
+from constants import (ZNJY_CATEGORY, BROWSER_POOL_SIZE, BROWSER_MAX_PAGES_PER_INSTANCE,
+                       MAX_CONCURRENT_POST_FETCHES, POST_FETCH_TIMEOUT_SECONDS,
+                       MAX_CONCURRENT_INDEX_FETCHES, FETCH_ENGINE, CACHE_MODE,
+                       HOST_REQUESTS_PER_SECOND, HOST_MAX_CONNECTIONS, FETCH_MAX_RETRIES,
+                       METRICS_REPORT_PATH, PARSE_EXECUTOR, PARSE_WORKERS,
+                       POST_FILTER_MIN_REPLIES, POST_FILTER_MIN_BYTES,
+                       POST_FILTER_TITLE_INCLUDE, POST_FILTER_TITLE_EXCLUDE, BROWSER_PROFILE,
+                       STORAGE_SINKS)
+from browser_pool import init_browser_pool, close_browser_pool
+from browser_profiles import BROWSER_PROFILES
+from fetchers import FETCH_ENGINES, init_fetcher, close_fetcher
+from fetch_scheduler import init_fetch_scheduler
+from response_cache import CACHE_MODES, init_response_cache, close_response_cache
+from categories import get_category, list_categories
+from page_locator import crawl_index_page, scan_date_range
+from crawl_journal import init_crawl_journal, get_crawl_journal, close_crawl_journal
+from seen_urls import init_seen_urls, get_seen_urls
+from metrics import init_metrics
+from parse_pool import PARSE_EXECUTORS, init_parse_pool, close_parse_pool
+from pipeline import fetch_post, run_pipeline
+from post_index import init_post_index, close_post_index
+from post_filter import init_post_filter, parse_keywords
+from utils import date_strs_between
+from storage import STORAGE_SINK_NAMES, init_storage, close_storage, parse_sinks, check_sinks
+import async_db
+
+async def fetch_one_post(href, semaphore, timeout, category=None):
+    """Fetch a single post while holding a concurrency slot."""
+    async with semaphore:
+        return await fetch_post(href, timeout, category)
+
+async def fetch_post_data(href_list, target_date_str, max_concurrency=MAX_CONCURRENT_POST_FETCHES,
+                          timeout=POST_FETCH_TIMEOUT_SECONDS, category=None):
+    """Fetch detailed data for each post URL, at most max_concurrency at a time.
+
+    Results keep the order of href_list; failed and empty posts are left out.
+    """
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+    results = await asyncio.gather(*(fetch_one_post(href, semaphore, timeout, category)
+                                     for href in href_list))
+    
+    return [post for post in results if post is not None]
+
+async def crawl_and_filter_posts(pages_to_crawl, category, target_date_str,
+                                 index_concurrency=MAX_CONCURRENT_INDEX_FETCHES, end_date_str=None):
+    """Crawl pages concurrently and filter posts by date.
+
+    Pages are fetched up to index_concurrency at a time but merged in page
+    order, so the href order matches a serial scan. When pages_to_crawl is
+    None the pages holding the target date are located adaptively. If
+    end_date_str is given, every date from target_date_str to end_date_str
+    inclusive is kept. Posts the post filter rules out from their index
+    row (reply count, size, title) are left out.
+    """
+    if end_date_str is None:
+        end_date_str = target_date_str
+    if pages_to_crawl is None:
+        return await scan_date_range(category, target_date_str, end_date_str, index_concurrency)
+
     all_matching_posts = {}
+    semaphore = asyncio.Semaphore(max(1, index_concurrency))
     
-    # Loop through pages 1 to 10
-    for page_num in pages_to_crawl:  # Pages 1 through 10 inclusive
-        print(f"\nCrawling page {page_num}...")
-        
-        # Get results from crawl_index function
-        result = await crawl_index(page_num, category)
-        
+    # Fetch every page concurrently; gather keeps the results in page order
+    page_list = list(pages_to_crawl)
+    results = await asyncio.gather(*(crawl_index_page(page_num, category, semaphore)
+                                     for page_num in page_list))
+    
+    for page_num, result in zip(page_list, results):
         # Filter for posts with target date
         matching_posts = {}
         for date_str, href_list in result.items():
-            if date_str == target_date_str:
+            if target_date_str <= date_str <= end_date_str:
                 matching_posts[date_str] = href_list
-                print(f"Found {len(href_list)} posts with date {date_str}")
+                print(f"Found {len(href_list)} posts with date {date_str} on page {page_num}")
         
         # Add matching posts to overall results
         for date_str, href_list in matching_posts.items():
@@ -63,14 +92,53 @@ async def crawl_and_filter_posts(pages_to_crawl, category, target_date_str):
     
     return all_matching_posts
 
-async def main(category, target_date_str=None):
-    """Main function that implements the requirements."""
+def default_target_date_str():
+    """Return the default target date (2 days back from today) in yyyymmdd format."""
+    target_date = datetime.now() - timedelta(days=2)
+    return target_date.strftime("%Y%m%d")
+
+async def crawl_category(category, target_date_str=None, max_concurrency=MAX_CONCURRENT_POST_FETCHES,
+                         post_timeout=POST_FETCH_TIMEOUT_SECONDS,
+                         index_concurrency=MAX_CONCURRENT_INDEX_FETCHES,
+                         start_date_str=None, end_date_str=None, resume=False):
+    """Crawl one category for the target date (or date range) and store the posts.
+
+    With resume=True an unfinished journaled run for the same dates (or, if
+    no dates are given, the latest unfinished run of the category) is continued.
+    Dates already recorded as complete in wxc_crawl_state are not crawled
+    again, and dates in the past are marked complete once every post on them
+    has been stored or found empty (and none was withheld by the post filter).
+    """
+    
+    # Each category may cap its own post concurrency below the run-wide limit
+    max_concurrency = min(max_concurrency, get_category(category)["max_concurrency"])
+    
+    journal = get_crawl_journal()
+    resumable_run = None
+    if resume and journal is not None:
+        if target_date_str is not None:
+            resumable_run = journal.find_unfinished_run(category, target_date_str, target_date_str)
+        elif start_date_str or end_date_str:
+            resumable_run = journal.find_unfinished_run(
+                category, start_date_str or end_date_str, end_date_str or default_target_date_str())
+        else:
+            resumable_run = journal.find_unfinished_run(category)
+        if resumable_run is None:
+            print(f"No unfinished run to resume for category '{category}'; starting a new one")
+        else:
+            start_date_str = resumable_run["start_date_str"]
+            end_date_str = resumable_run["end_date_str"]
+            target_date_str = None
     
+    if start_date_str or end_date_str:
+        # Crawl every date in the range with a single index scan
+        end_date_str = end_date_str or default_target_date_str()
+        start_date_str = start_date_str or end_date_str
+        print(f"Using date range: {start_date_str} to {end_date_str}")
     # If no date string provided, use default logic (today - 2 days)
-    if target_date_str is None:
+    elif target_date_str is None:
         # Calculate target date (2 days back from today)
-        target_date = datetime.now() - timedelta(days=2)
-        target_date_str = target_date.strftime("%Y%m%d")
+        target_date_str = default_target_date_str()
         
         print(f"Today's date: {datetime.now().strftime('%Y%m%d')}")
         print(f"Target date (2 days back): {target_date_str}")
@@ -78,19 +146,46 @@ async def main(category, target_date_str=None):
         # Use the provided date string
         print(f"Using provided target date: {target_date_str}")
     
-    max_date_str = mysql_writer.read_max_date_by_category(category)
-    if not max_date_str:
-        print(f"No existing data for category '{category}' in database. Proceeding with crawling.")
-
-    elif max_date_str >= target_date_str:
-        print(f"Data for category '{category}' is already up to date (max date in DB: {max_date_str}). No crawling needed.")
-        return {}
+    if target_date_str is not None:
+        start_date_str = end_date_str = target_date_str
+    
+    if resumable_run is not None:
+        # A partially written run must be finished whatever the crawl state says
+        print(f"Resuming run {resumable_run['run_id']} for {start_date_str} to {end_date_str}")
+    else:
+        complete_dates = await async_db.read_complete_dates(category, start_date_str, end_date_str)
+        pending_dates = [date_str for date_str in date_strs_between(start_date_str, end_date_str)
+                         if date_str not in complete_dates]
+        if not pending_dates:
+            print(f"Every date from {start_date_str} to {end_date_str} is already complete for "
+                  f"category '{category}'. No crawling needed.")
+            return {}
+        if complete_dates:
+            # Only the span between the first and last incomplete date is scanned
+            start_date_str, end_date_str = pending_dates[0], pending_dates[-1]
+            print(f"{len(complete_dates)} dates already complete; narrowing to "
+                  f"{start_date_str} to {end_date_str}")
 
-    # Crawl pages 1 to 10 and filter by date
-    print("\n--- Crawling pages 1 to 10 ---")
+    # Stream posts from the index pages through the fetchers into storage
+    print(f"\n--- Crawling posts from {start_date_str} to {end_date_str} ---")
+    
+    pipeline_result = await run_pipeline(category, start_date_str, end_date_str,
+                                         max_concurrency, post_timeout, index_concurrency,
+                                         journal=journal, resume=resumable_run is not None,
+                                         seen_urls=get_seen_urls())
+    all_matching_posts = pipeline_result["posts"]
     
-    pages_to_crawl = range(1, 11)  # Pages 1 through 10 inclusive
-    all_matching_posts = await crawl_and_filter_posts(pages_to_crawl, category, target_date_str)
+    # Past dates are complete once the whole index window was scanned and
+    # every post on them was stored or found empty; today may still grow, and
+    # a date the post filter withheld posts from is left for a looser filter
+    if pipeline_result["index_complete"]:
+        today_str = datetime.now().strftime("%Y%m%d")
+        await async_db.mark_dates_complete(category, {
+            date_str: len(all_matching_posts.get(date_str, []))
+            for date_str in date_strs_between(start_date_str, end_date_str)
+            if date_str < today_str and date_str not in pipeline_result["failed_dates"]
+            and date_str not in pipeline_result["filtered_dates"]
+        })
     
     # Display final results
     print("\n=== FINAL RESULTS ===")
@@ -99,57 +194,222 @@ async def main(category, target_date_str=None):
             print(f"\nPosts from {date_str}:")
             for i, href in enumerate(href_list, 1):
                 print(f"  {i}. {href}")
+        print(f"\nSuccessfully stored {pipeline_result['stats']['stored']} posts")
     else:
         print("No posts found matching the date filter.")
     
-    # If we have results, fetch the actual post data for each href
-    if all_matching_posts:
-        print("\n--- Fetching Post Data ---")
-        post_data_results = {}
-        
-        for date_str, href_list in all_matching_posts.items():
-            post_data_results[date_str] = await fetch_post_data(href_list, target_date_str)
-        
-        # Store data in MySQL database
-        print("\n--- Storing Data in MySQL ---")
-        
-        # Flatten all post data for database insertion
-        all_post_data = []
-        for date_str, posts in post_data_results.items():
-            all_post_data.extend(posts)
-        
-        if all_post_data:
-            # Insert all posts into database
-            success_count = mysql_writer.insert_multiple_posts(all_post_data, category, target_date_str)
-            print(f"Successfully stored {success_count} posts in MySQL database")
+    return all_matching_posts
+
+async def crawl_categories(categories, *args):
+    """Crawl several categories concurrently, sharing the fetcher and DB pool.
+
+    A failure in one category is reported without cancelling the others.
+
+    Returns:
+        Dict[str, Dict[str, List[str]]]: Matching posts per category
+    """
+    results = await asyncio.gather(*(crawl_category(category, *args) for category in categories),
+                                   return_exceptions=True)
+    
+    all_results = {}
+    for category, result in zip(categories, results):
+        if isinstance(result, Exception):
+            print(f"Error crawling category '{category}': {result}")
+            all_results[category] = {}
         else:
-            print("No post data to store in database")
+            all_results[category] = result
+    return all_results
+
+async def main(category, target_date_str=None, browser_pool_size=BROWSER_POOL_SIZE,
+               browser_max_pages=BROWSER_MAX_PAGES_PER_INSTANCE,
+               max_concurrency=MAX_CONCURRENT_POST_FETCHES, post_timeout=POST_FETCH_TIMEOUT_SECONDS,
+               index_concurrency=MAX_CONCURRENT_INDEX_FETCHES, fetch_engine=FETCH_ENGINE,
+               start_date_str=None, end_date_str=None, categories=None, cache_mode=CACHE_MODE,
+               resume=False, host_rps=HOST_REQUESTS_PER_SECOND,
+               host_max_connections=HOST_MAX_CONNECTIONS, max_retries=FETCH_MAX_RETRIES,
+               report_path=METRICS_REPORT_PATH, prometheus_path=None,
+               parse_executor=PARSE_EXECUTOR, parse_workers=PARSE_WORKERS, rescan_index=False,
+               min_replies=POST_FILTER_MIN_REPLIES, min_bytes=POST_FILTER_MIN_BYTES,
+               title_include=POST_FILTER_TITLE_INCLUDE, title_exclude=POST_FILTER_TITLE_EXCLUDE,
+               browser_profile=BROWSER_PROFILE, sinks=STORAGE_SINKS):
+    """Main function that implements the requirements.
+
+    If categories is given, every listed category is crawled concurrently in
+    this process and the results are keyed by category. When the run ends a
+    JSON metrics report is written to report_path, plus a Prometheus text
+    file to prometheus_path if one is given.
+    """
     
-    return all_matching_posts
+    metrics = init_metrics()
+    metrics.set_info(categories=categories or [category], target_date_str=target_date_str,
+                     start_date_str=start_date_str, end_date_str=end_date_str,
+                     fetch_engine=fetch_engine, cache_mode=cache_mode,
+                     max_concurrency=max_concurrency, index_concurrency=index_concurrency,
+                     host_rps=host_rps, host_max_connections=host_max_connections,
+                     max_retries=max_retries, resume=resume,
+                     parse_executor=parse_executor, parse_workers=parse_workers,
+                     rescan_index=rescan_index, min_replies=min_replies, min_bytes=min_bytes,
+                     title_include=title_include, title_exclude=title_exclude,
+                     browser_profile=browser_profile, sinks=sinks)
+    
+    # Browsers are launched lazily and shared by every fetch in this run
+    init_browser_pool(browser_pool_size, browser_max_pages, profile=browser_profile)
+    init_fetch_scheduler(host_rps, host_max_connections, max_retries)
+    init_fetcher(fetch_engine)
+    init_parse_pool(parse_executor, parse_workers)
+    init_response_cache(cache_mode)
+    init_crawl_journal()
+    init_post_index(refresh=rescan_index)
+    init_post_filter(min_replies, min_bytes, title_include, title_exclude)
+    init_storage(sinks)
+    async_db.init_db_executor()
+    try:
+        if not await async_db.create_tables():
+            raise RuntimeError("Could not create or upgrade the storage tables; see the errors above")
+        init_seen_urls()
+        crawl_args = (target_date_str, max_concurrency, post_timeout,
+                      index_concurrency, start_date_str, end_date_str, resume)
+        if categories:
+            return await crawl_categories(categories, *crawl_args)
+        return await crawl_category(category, *crawl_args)
+    finally:
+        await close_fetcher()
+        await close_browser_pool()
+        close_parse_pool()
+        close_response_cache()
+        close_crawl_journal()
+        close_post_index()
+        async_db.close_db_executor()
+        close_storage()
+        metrics.print_summary()
+        metrics.write_report(report_path, prometheus_path)
+
+def positive_float(value):
+    """argparse type for options that must be a number greater than zero."""
+    try:
+        number = float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid number: '{value}'")
+    if number <= 0:
+        raise argparse.ArgumentTypeError(f"must be greater than 0, got {value}")
+    return number
+
+def validate_date_arg(date_arg):
+    """Return date_arg if it is a valid yyyymmdd date, otherwise exit."""
+    try:
+        datetime.strptime(date_arg, "%Y%m%d")
+    except ValueError:
+        date_arg = None
+    if date_arg is None or len(date_arg) != 8 or not date_arg.isdigit():
+        print("Invalid date format. Please use yyyymmdd format (e.g., 20250221).")
+        sys.exit(1)
+    return date_arg
 
 if __name__ == "__main__":
     # Parse command line arguments
     parser = argparse.ArgumentParser(description="Crawl and filter posts by date")
-    parser.add_argument("--category", default="znjy", help="Category to crawl (default: znjy)")
+    parser.add_argument("--category", default="znjy", choices=list_categories(),
+                        help="Category to crawl (default: znjy)")
+    parser.add_argument("--categories",
+                        help=f"Comma-separated categories to crawl concurrently (known: {','.join(list_categories())})")
     parser.add_argument("--date_str", help="Target date in yyyymmdd format (e.g., 20250221)")
+    parser.add_argument("--start_date", help="First date of a range to crawl in yyyymmdd format")
+    parser.add_argument("--end_date", help="Last date of a range to crawl in yyyymmdd format (default: 2 days back)")
+    parser.add_argument("--sink", default=",".join(STORAGE_SINKS),
+                        help=f"Comma-separated storage sinks, any of {','.join(STORAGE_SINK_NAMES)}; "
+                             f"posts are written to all of them (default: {','.join(STORAGE_SINKS)})")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue the latest unfinished run (for the given dates, if any) from the crawl journal")
+    parser.add_argument("--rescan_index", action="store_true",
+                        help="Scan the board index even for dates the local post index already holds")
+    parser.add_argument("--fetch_engine", choices=FETCH_ENGINES, default=FETCH_ENGINE,
+                        help=f"Page fetch engine; 'auto' uses HTTP with browser fallback (default: {FETCH_ENGINE})")
+    parser.add_argument("--cache_mode", choices=CACHE_MODES, default=CACHE_MODE,
+                        help=f"Response cache mode: use, refresh or bypass (default: {CACHE_MODE})")
+    parser.add_argument("--browser_profile", choices=BROWSER_PROFILES, default=BROWSER_PROFILE,
+                        help=f"Browser render profile; 'text' blocks images, styles, ads and third-party scripts (default: {BROWSER_PROFILE})")
+    parser.add_argument("--browser_pool_size", type=int, default=BROWSER_POOL_SIZE,
+                        help=f"Number of browser instances to share across fetches (default: {BROWSER_POOL_SIZE})")
+    parser.add_argument("--browser_max_pages", type=int, default=BROWSER_MAX_PAGES_PER_INSTANCE,
+                        help=f"Recycle a browser instance after this many pages (default: {BROWSER_MAX_PAGES_PER_INSTANCE})")
+    parser.add_argument("--max_concurrency", type=int, default=MAX_CONCURRENT_POST_FETCHES,
+                        help=f"Maximum number of posts fetched concurrently (default: {MAX_CONCURRENT_POST_FETCHES})")
+    parser.add_argument("--post_timeout", type=float, default=POST_FETCH_TIMEOUT_SECONDS,
+                        help=f"Per-post fetch timeout in seconds (default: {POST_FETCH_TIMEOUT_SECONDS})")
+    parser.add_argument("--index_concurrency", type=int, default=MAX_CONCURRENT_INDEX_FETCHES,
+                        help=f"Maximum number of index pages fetched concurrently (default: {MAX_CONCURRENT_INDEX_FETCHES})")
+    parser.add_argument("--host_rps", type=positive_float, default=HOST_REQUESTS_PER_SECOND,
+                        help=f"Requests per second allowed to each host (default: {HOST_REQUESTS_PER_SECOND})")
+    parser.add_argument("--host_max_connections", type=int, default=HOST_MAX_CONNECTIONS,
+                        help=f"Maximum concurrent requests to each host (default: {HOST_MAX_CONNECTIONS})")
+    parser.add_argument("--max_retries", type=int, default=FETCH_MAX_RETRIES,
+                        help=f"Retries for timeouts, 5xx and 429 responses (default: {FETCH_MAX_RETRIES})")
+    parser.add_argument("--parse_executor", choices=PARSE_EXECUTORS, default=PARSE_EXECUTOR,
+                        help=f"Where HTML is parsed: a process pool, a thread pool or inline (default: {PARSE_EXECUTOR})")
+    parser.add_argument("--parse_workers", type=int, default=PARSE_WORKERS,
+                        help="Parse pool size (default: one per CPU)")
+    parser.add_argument("--min_replies", type=int, default=POST_FILTER_MIN_REPLIES,
+                        help=f"Skip threads whose index row shows fewer replies (default: {POST_FILTER_MIN_REPLIES})")
+    parser.add_argument("--min_bytes", type=int, default=POST_FILTER_MIN_BYTES,
+                        help=f"Skip threads whose index row shows a smaller body in bytes (default: {POST_FILTER_MIN_BYTES})")
+    parser.add_argument("--title_include",
+                        help="Comma-separated keywords; only fetch threads whose title contains one")
+    parser.add_argument("--title_exclude",
+                        help="Comma-separated keywords; skip threads whose title contains any")
+    parser.add_argument("--report_path", default=METRICS_REPORT_PATH,
+                        help=f"Where to write the JSON run report (default: {METRICS_REPORT_PATH})")
+    parser.add_argument("--prometheus_path",
+                        help="Also write the run metrics in Prometheus text format to this file")
 
     args = parser.parse_args()
     
     # Validate date format if provided
-    target_date_str = None
-    if args.date_str:
-        date_arg = args.date_str
-        if len(date_arg) == 8 and date_arg.isdigit():
-            try:
-                year = date_arg[0:4]
-                month = date_arg[4:6]
-                day = date_arg[6:8]
-                target_date_str = f"{year}{month}{day}"
-            except:
-                print("Invalid date format. Please use yyyymmdd format.")
-                sys.exit(1)
-        else:
-            print("Invalid date format. Please use yyyymmdd format (e.g., 20250221).")
+    target_date_str = validate_date_arg(args.date_str) if args.date_str else None
+    start_date_str = validate_date_arg(args.start_date) if args.start_date else None
+    end_date_str = validate_date_arg(args.end_date) if args.end_date else None
+    if target_date_str and (start_date_str or end_date_str):
+        print("Use either --date_str or --start_date/--end_date, not both.")
+        sys.exit(1)
+    if start_date_str and end_date_str and start_date_str > end_date_str:
+        print("--start_date must not be after --end_date.")
+        sys.exit(1)
+    
+    categories = None
+    if args.categories:
+        categories = [name.strip() for name in args.categories.split(",") if name.strip()]
+        unknown = [name for name in categories if name not in list_categories()]
+        if unknown:
+            print(f"Unknown categories: {', '.join(unknown)}")
             sys.exit(1)
+
+    sinks = parse_sinks(args.sink)
+    sink_error = check_sinks(sinks)
+    if sink_error:
+        parser.error(sink_error)
     
-    results = asyncio.run(main(args.category, target_date_str))
+    results = asyncio.run(main(args.category, target_date_str,
+                               browser_pool_size=args.browser_pool_size,
+                               browser_max_pages=args.browser_max_pages,
+                               max_concurrency=args.max_concurrency,
+                               post_timeout=args.post_timeout,
+                               index_concurrency=args.index_concurrency,
+                               fetch_engine=args.fetch_engine,
+                               start_date_str=start_date_str,
+                               end_date_str=end_date_str,
+                               categories=categories,
+                               cache_mode=args.cache_mode,
+                               resume=args.resume,
+                               host_rps=args.host_rps,
+                               host_max_connections=args.host_max_connections,
+                               max_retries=args.max_retries,
+                               report_path=args.report_path,
+                               prometheus_path=args.prometheus_path,
+                               parse_executor=args.parse_executor,
+                               parse_workers=args.parse_workers,
+                               rescan_index=args.rescan_index,
+                               min_replies=args.min_replies,
+                               min_bytes=args.min_bytes,
+                               title_include=parse_keywords(args.title_include),
+                               title_exclude=parse_keywords(args.title_exclude),
+                               browser_profile=args.browser_profile,
+                               sinks=sinks))
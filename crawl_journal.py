@@ -0,0 +1,171 @@
+"""
+Crash-safe journal of crawl runs.
+
+Every run records the post URLs it discovers together with their fetch and
+write status in a local SQLite database. If the process dies, the next run
+started with --resume picks up the unfinished run for the same category and
+dates, re-queues only the posts that were not written yet and, if the index
+scan had already finished, skips rescanning the index altogether.
+
+Fetch status: pending, fetched, skipped (no comments) or failed.
+Write status: pending, written or failed.
+"""
+
+import os
+import sqlite3
+import time
+from typing import Dict, List, Optional, Tuple
+
+from constants import CRAWL_JOURNAL_PATH
+
+RUN_RUNNING = "running"
+RUN_INCOMPLETE = "incomplete"
+RUN_COMPLETED = "completed"
+
+
+class CrawlJournal:
+    """SQLite-backed record of runs and the per-URL progress within them."""
+
+    def __init__(self, path: str = CRAWL_JOURNAL_PATH):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS runs (
+                run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                category TEXT NOT NULL,
+                start_date_str TEXT NOT NULL,
+                end_date_str TEXT NOT NULL,
+                status TEXT NOT NULL,
+                index_complete INTEGER NOT NULL DEFAULT 0,
+                started_at REAL NOT NULL,
+                finished_at REAL
+            );
+            CREATE TABLE IF NOT EXISTS run_urls (
+                run_id INTEGER NOT NULL,
+                url TEXT NOT NULL,
+                date_str TEXT NOT NULL,
+                fetch_status TEXT NOT NULL DEFAULT 'pending',
+                write_status TEXT NOT NULL DEFAULT 'pending',
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (run_id, url)
+            );
+        """)
+        self.db.commit()
+
+    def start_run(self, category: str, start_date_str: str, end_date_str: str) -> int:
+        """Record a new run and return its id."""
+        cursor = self.db.execute(
+            "INSERT INTO runs (category, start_date_str, end_date_str, status, started_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (category, start_date_str, end_date_str, RUN_RUNNING, time.time()))
+        self.db.commit()
+        return cursor.lastrowid
+
+    def find_unfinished_run(self, category: str, start_date_str: Optional[str] = None,
+                            end_date_str: Optional[str] = None) -> Optional[Dict]:
+        """Return the latest run for category that did not complete.
+
+        If dates are given the run must lie within that range: a crawl
+        journals the range left after dropping dates already complete, so
+        the run of a requested range may cover only part of it.
+        """
+        query = ("SELECT run_id, start_date_str, end_date_str, index_complete FROM runs "
+                 "WHERE category = ? AND status != ?")
+        params: List = [category, RUN_COMPLETED]
+        if start_date_str and end_date_str:
+            query += " AND start_date_str >= ? AND end_date_str <= ?"
+            params += [start_date_str, end_date_str]
+        row = self.db.execute(query + " ORDER BY run_id DESC LIMIT 1", params).fetchone()
+        if row is None:
+            return None
+        return {
+            "run_id": row[0],
+            "start_date_str": row[1],
+            "end_date_str": row[2],
+            "index_complete": bool(row[3]),
+        }
+
+    def reopen_run(self, run_id: int):
+        self.db.execute("UPDATE runs SET status = ?, finished_at = NULL WHERE run_id = ?",
+                        (RUN_RUNNING, run_id))
+        self.db.commit()
+
+    def record_discovered(self, run_id: int, posts: List[Tuple[str, str]]) -> List[Tuple[str, str]]:
+        """Record (date_str, url) pairs found on the index; return the ones not seen before."""
+        new_posts = []
+        now = time.time()
+        for date_str, url in posts:
+            cursor = self.db.execute(
+                "INSERT OR IGNORE INTO run_urls (run_id, url, date_str, updated_at) VALUES (?, ?, ?, ?)",
+                (run_id, url, date_str, now))
+            if cursor.rowcount:
+                new_posts.append((date_str, url))
+        self.db.commit()
+        return new_posts
+
+    def unfinished_urls(self, run_id: int) -> List[Tuple[str, str]]:
+        """Return (date_str, url) pairs of the run that still need to be fetched and written."""
+        rows = self.db.execute(
+            "SELECT date_str, url FROM run_urls WHERE run_id = ? "
+            "AND fetch_status != 'skipped' AND write_status != 'written' ORDER BY rowid",
+            (run_id,)).fetchall()
+        return [(date_str, url) for date_str, url in rows]
+
+    def mark_index_complete(self, run_id: int):
+        self.db.execute("UPDATE runs SET index_complete = 1 WHERE run_id = ?", (run_id,))
+        self.db.commit()
+
+    def mark_fetch(self, run_id: int, url: str, fetch_status: str):
+        self.db.execute(
+            "UPDATE run_urls SET fetch_status = ?, updated_at = ? WHERE run_id = ? AND url = ?",
+            (fetch_status, time.time(), run_id, url))
+        self.db.commit()
+
+    def mark_written(self, run_id: int, urls: List[str], write_status: str = "written"):
+        now = time.time()
+        self.db.executemany(
+            "UPDATE run_urls SET write_status = ?, updated_at = ? WHERE run_id = ? AND url = ?",
+            [(write_status, now, run_id, url) for url in urls])
+        self.db.commit()
+
+    def finish_run(self, run_id: int) -> str:
+        """Close a run: completed if every URL is done, otherwise incomplete (resumable)."""
+        row = self.db.execute("SELECT index_complete FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+        remaining = len(self.unfinished_urls(run_id))
+        status = RUN_COMPLETED if row and row[0] and remaining == 0 else RUN_INCOMPLETE
+        self.db.execute("UPDATE runs SET status = ?, finished_at = ? WHERE run_id = ?",
+                        (status, time.time(), run_id))
+        self.db.commit()
+        if status == RUN_INCOMPLETE:
+            print(f"Run {run_id} left {remaining} posts unfinished; use --resume to continue it")
+        return status
+
+    def close(self):
+        self.db.close()
+
+
+_crawl_journal: Optional[CrawlJournal] = None
+
+
+def init_crawl_journal(path: str = CRAWL_JOURNAL_PATH) -> CrawlJournal:
+    """Open the process-wide crawl journal."""
+    global _crawl_journal
+    _crawl_journal = CrawlJournal(path)
+    return _crawl_journal
+
+
+def get_crawl_journal() -> Optional[CrawlJournal]:
+    """Return the process-wide crawl journal, or None if it is not open."""
+    return _crawl_journal
+
+
+def close_crawl_journal():
+    """Close the process-wide crawl journal if one was opened."""
+    global _crawl_journal
+    if _crawl_journal is not None:
+        journal, _crawl_journal = _crawl_journal, None
+        journal.close()
@@ -0,0 +1,212 @@
+"""
+Host-aware fetch scheduling: rate limiting, retries and backoff.
+
+Every request to a host goes through that host's limiter, which combines a
+token bucket (requests per second with a small burst), a cap on concurrent
+connections and a cool-down honouring Retry-After. Transient failures
+(timeouts, connection errors, 5xx and 429) are retried with jittered
+exponential backoff. When too many of a host's recent requests fail its rate
+is halved, down to a floor, and then recovers step by step as requests
+succeed again, so raising concurrency never turns into hammering a server
+that is already pushing back.
+"""
+
+import asyncio
+import random
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable, Dict, Optional
+from urllib.parse import urlsplit
+
+from constants import (HOST_REQUESTS_PER_SECOND, HOST_BURST, HOST_MAX_CONNECTIONS,
+                       HOST_MIN_REQUESTS_PER_SECOND, HOST_ERROR_WINDOW,
+                       HOST_ERROR_RATE_THRESHOLD, HOST_RATE_RECOVERY_STEPS,
+                       FETCH_MAX_RETRIES, RETRY_BACKOFF_BASE_SECONDS, RETRY_BACKOFF_MAX_SECONDS)
+from metrics import get_metrics
+
+
+class FetchError(Exception):
+    """A page could not be fetched, even after retrying."""
+
+
+class RetryableFetchError(FetchError):
+    """A transient fetch failure (timeout, connection error, 5xx or 429).
+
+    retry_after is the delay in seconds the server asked for, if any.
+    """
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Return a Retry-After header given in seconds, or None."""
+    if value and value.strip().isdigit():
+        return float(value.strip())
+    return None
+
+
+class TokenBucket:
+    """Allow rate requests per second on average, with bursts of up to burst."""
+
+    def __init__(self, rate: float, burst: int):
+        if rate <= 0:
+            raise ValueError(f"Request rate must be greater than 0, got {rate}")
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.updated = None
+
+    def _refill(self, now: float):
+        if self.updated is not None:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        """Wait until a token is available and take it."""
+        loop = asyncio.get_running_loop()
+        while True:
+            self._refill(loop.time())
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class HostLimiter:
+    """Rate limit, connection cap and adaptive slowdown for a single host."""
+
+    def __init__(self, host: str, rate: float = HOST_REQUESTS_PER_SECOND, burst: int = HOST_BURST,
+                 max_connections: int = HOST_MAX_CONNECTIONS,
+                 min_rate: float = HOST_MIN_REQUESTS_PER_SECOND,
+                 error_window: int = HOST_ERROR_WINDOW,
+                 error_rate_threshold: float = HOST_ERROR_RATE_THRESHOLD):
+        self.host = host
+        self.base_rate = rate
+        self.min_rate = min(min_rate, rate)
+        self.bucket = TokenBucket(rate, burst)
+        self.connections = asyncio.Semaphore(max(1, max_connections))
+        self.outcomes = deque(maxlen=max(1, error_window))
+        self.error_rate_threshold = error_rate_threshold
+        self.blocked_until = 0.0
+
+    @property
+    def rate(self) -> float:
+        return self.bucket.rate
+
+    @asynccontextmanager
+    async def slot(self):
+        """Hold a connection to the host, once its cool-down and rate limit allow."""
+        async with self.connections:
+            loop = asyncio.get_running_loop()
+            while loop.time() < self.blocked_until:
+                await asyncio.sleep(self.blocked_until - loop.time())
+            await self.bucket.acquire()
+            yield
+
+    def error_rate(self) -> float:
+        if not self.outcomes:
+            return 0.0
+        return self.outcomes.count(False) / len(self.outcomes)
+
+    def record(self, success: bool, retry_after: Optional[float] = None):
+        """Record a request outcome and adapt the host's rate to it."""
+        self.outcomes.append(success)
+        if retry_after:
+            loop = asyncio.get_running_loop()
+            self.blocked_until = max(self.blocked_until, loop.time() + retry_after)
+
+        if success:
+            # Additive recovery towards the configured rate
+            if self.rate < self.base_rate:
+                self.bucket.rate = min(self.base_rate,
+                                       self.rate + self.base_rate / HOST_RATE_RECOVERY_STEPS)
+        elif (len(self.outcomes) * 2 >= self.outcomes.maxlen
+              and self.error_rate() >= self.error_rate_threshold
+              and self.rate > self.min_rate):
+            # Multiplicative slowdown; measure the new rate from a clean window
+            self.bucket.rate = max(self.min_rate, self.rate / 2)
+            self.outcomes.clear()
+            get_metrics().inc("host_slowdowns")
+            print(f"Fetch scheduler: errors rising on {self.host}, "
+                  f"slowing down to {self.rate:.2f} requests/s")
+
+
+class FetchScheduler:
+    """Run fetches through per-host limiters, retrying transient failures."""
+
+    def __init__(self, rate_per_host: float = HOST_REQUESTS_PER_SECOND, burst: int = HOST_BURST,
+                 max_connections_per_host: int = HOST_MAX_CONNECTIONS,
+                 max_retries: int = FETCH_MAX_RETRIES,
+                 backoff_base: float = RETRY_BACKOFF_BASE_SECONDS,
+                 backoff_max: float = RETRY_BACKOFF_MAX_SECONDS):
+        self.rate_per_host = rate_per_host
+        self.burst = burst
+        self.max_connections_per_host = max_connections_per_host
+        self.max_retries = max(0, max_retries)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.hosts: Dict[str, HostLimiter] = {}
+
+    def host_limiter(self, url: str) -> HostLimiter:
+        host = urlsplit(url).netloc
+        if host not in self.hosts:
+            self.hosts[host] = HostLimiter(host, self.rate_per_host, self.burst,
+                                           self.max_connections_per_host)
+        return self.hosts[host]
+
+    def backoff_delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Full-jitter exponential backoff, never shorter than the server's Retry-After."""
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        if retry_after:
+            delay = max(delay, min(retry_after, self.backoff_max))
+        return delay
+
+    async def run(self, url: str, fetch: Callable[[], Awaitable]):
+        """Call fetch() under url's host limiter, retrying RetryableFetchError.
+
+        Raises FetchError once max_retries retries have failed. Any other
+        result or exception of fetch() is passed through unchanged.
+        """
+        limiter = self.host_limiter(url)
+        attempt = 0
+        while True:
+            try:
+                async with limiter.slot():
+                    # Network time only; the "fetch" stage also counts rate-limit waits and retries
+                    with get_metrics().timer("fetch_attempt"):
+                        result = await fetch()
+            except RetryableFetchError as e:
+                limiter.record(False, e.retry_after)
+                if attempt >= self.max_retries:
+                    get_metrics().inc("fetch_gave_up")
+                    raise FetchError(f"Giving up on {url} after {attempt + 1} attempts: {e}") from e
+                delay = self.backoff_delay(attempt, e.retry_after)
+                attempt += 1
+                get_metrics().inc("fetch_retries")
+                print(f"Retrying {url} in {delay:.1f}s ({e}; retry {attempt}/{self.max_retries})")
+                await asyncio.sleep(delay)
+            else:
+                limiter.record(True)
+                return result
+
+
+_fetch_scheduler: Optional[FetchScheduler] = None
+
+
+def init_fetch_scheduler(rate_per_host: float = HOST_REQUESTS_PER_SECOND,
+                         max_connections_per_host: int = HOST_MAX_CONNECTIONS,
+                         max_retries: int = FETCH_MAX_RETRIES) -> FetchScheduler:
+    """Create the process-wide fetch scheduler."""
+    global _fetch_scheduler
+    _fetch_scheduler = FetchScheduler(rate_per_host, max_connections_per_host=max_connections_per_host,
+                                      max_retries=max_retries)
+    return _fetch_scheduler
+
+
+def get_fetch_scheduler() -> FetchScheduler:
+    """Return the process-wide fetch scheduler, creating a default one if needed."""
+    if _fetch_scheduler is None:
+        return init_fetch_scheduler()
+    return _fetch_scheduler
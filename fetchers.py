@@ -0,0 +1,241 @@
+"""
+Pluggable page fetchers.
+
+The forum pages are server-rendered, so most of them can be fetched with a
+plain HTTP client instead of a headless browser. Three engines are provided:
+
+- "http": an httpx client with keep-alive connection pooling, gzip/brotli
+  decoding and HTTP/2 when the h2 package is installed.
+- "browser": a crawl4ai render through the shared browser pool, using the
+  pool's browser profile (by default "text", see browser_profiles.py).
+- "auto": the HTTP engine, falling back to the browser only when the page
+  it returns is missing the selectors the caller expects.
+
+Each engine runs behind the shared fetch scheduler (see fetch_scheduler.py),
+which rate-limits requests per host and retries transient failures.
+"""
+
+from typing import Dict, List, Optional
+
+import httpx
+from browser_pool import get_browser_pool
+from browser_profiles import build_run_config
+from fetch_scheduler import RetryableFetchError, get_fetch_scheduler, parse_retry_after
+from html_tree import css_selector, parse_html_tree
+from parse_pool import run_parse
+from constants import (FETCH_ENGINE, HTTP_MAX_CONNECTIONS, HTTP_TIMEOUT_SECONDS,
+                       HTTP_USER_AGENT)
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+def has_selectors(html: str, selectors: Optional[List[str]]) -> bool:
+    """Check that every CSS selector matches at least one element in html."""
+    if not selectors:
+        return True
+    root = parse_html_tree(html)
+    return all(css_selector(selector)(root) for selector in selectors)
+
+
+def page_response(html: Optional[str], status: int = 200, etag: Optional[str] = None,
+                  last_modified: Optional[str] = None, engine: str = "") -> Dict:
+    """Build the dict every engine returns from fetch_response."""
+    return {
+        "html": html,
+        "status": status,
+        "etag": etag,
+        "last_modified": last_modified,
+        "engine": engine,
+    }
+
+
+class Fetcher:
+    """Base class for fetch engines.
+
+    Engines implement fetch_response, which may be given cached validators
+    (etag/last_modified) and answer with status 304 when the page is unchanged.
+    It returns None when the page is permanently unavailable and raises
+    RetryableFetchError on transient failures.
+    """
+
+    name = ""
+
+    async def fetch_response(self, url: str, required_selectors: Optional[List[str]] = None,
+                             etag: Optional[str] = None,
+                             last_modified: Optional[str] = None) -> Optional[Dict]:
+        raise NotImplementedError
+
+    async def fetch(self, url: str, required_selectors: Optional[List[str]] = None) -> Optional[str]:
+        response = await self.fetch_response(url, required_selectors)
+        return response["html"] if response else None
+
+    async def close(self):
+        pass
+
+
+class HttpFetcher(Fetcher):
+    """Fetch pages with a pooled async HTTP client."""
+
+    name = "http"
+
+    def __init__(self, max_connections: int = HTTP_MAX_CONNECTIONS,
+                 timeout: float = HTTP_TIMEOUT_SECONDS):
+        self.client = httpx.AsyncClient(
+            http2=HTTP2_AVAILABLE,
+            follow_redirects=True,
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=max_connections,
+                                max_keepalive_connections=max_connections),
+            headers={
+                "User-Agent": HTTP_USER_AGENT,
+                "Accept": "text/html,application/xhtml+xml",
+                "Accept-Encoding": "gzip, deflate, br",
+            },
+        )
+
+    async def fetch_response(self, url: str, required_selectors: Optional[List[str]] = None,
+                             etag: Optional[str] = None,
+                             last_modified: Optional[str] = None) -> Optional[Dict]:
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        try:
+            response = await self.client.get(url, headers=headers)
+        except httpx.TransportError as e:
+            raise RetryableFetchError(f"{type(e).__name__}: {e}") from e
+        except httpx.HTTPError as e:
+            print(f"HTTP error fetching {url}: {e}")
+            return None
+        if response.status_code == 304:
+            return page_response(None, 304, etag, last_modified, self.name)
+        if response.status_code == 429 or response.status_code >= 500:
+            raise RetryableFetchError(f"HTTP {response.status_code}",
+                                      parse_retry_after(response.headers.get("Retry-After")))
+        if response.status_code != 200:
+            print(f"HTTP {response.status_code} fetching {url}")
+            return None
+        return page_response(response.text, 200, response.headers.get("ETag"),
+                             response.headers.get("Last-Modified"), self.name)
+
+    async def close(self):
+        await self.client.aclose()
+
+
+class BrowserFetcher(Fetcher):
+    """Render pages with crawl4ai using the shared browser pool."""
+
+    name = "browser"
+
+    async def fetch_response(self, url: str, required_selectors: Optional[List[str]] = None,
+                             etag: Optional[str] = None,
+                             last_modified: Optional[str] = None) -> Optional[Dict]:
+        pool = get_browser_pool()
+        run_config = build_run_config(pool.profile, required_selectors)
+        try:
+            async with pool.acquire() as crawler:
+                result = await crawler.arun(
+                    url=url,
+                    config=run_config
+                )
+        except Exception as e:
+            # Navigation timeouts and crashed browsers are worth another try
+            raise RetryableFetchError(f"browser error: {e}") from e
+        if not result.success:
+            status_code = getattr(result, "status_code", None)
+            if status_code is None or status_code == 429 or status_code >= 500:
+                raise RetryableFetchError(f"browser fetch failed: {result.error_message}")
+            print(f"Browser failed to fetch {url}: {result.error_message}")
+            return None
+        # Rendered pages carry no usable validators, so they are never revalidated
+        return page_response(result.html, engine=self.name)
+
+    async def close(self):
+        # The browser pool has its own lifecycle (see browser_pool.close_browser_pool)
+        pass
+
+
+class ScheduledFetcher(Fetcher):
+    """Run another engine's fetches through the shared fetch scheduler.
+
+    Raises fetch_scheduler.FetchError if a page still fails after retrying.
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.name = engine.name
+
+    async def fetch_response(self, url: str, required_selectors: Optional[List[str]] = None,
+                             etag: Optional[str] = None,
+                             last_modified: Optional[str] = None) -> Optional[Dict]:
+        return await get_fetch_scheduler().run(
+            url, lambda: self.engine.fetch_response(url, required_selectors, etag, last_modified))
+
+    async def close(self):
+        await self.engine.close()
+
+
+class FallbackFetcher(Fetcher):
+    """Try a cheap engine first and fall back to a heavier one when needed."""
+
+    name = "auto"
+
+    def __init__(self, primary, fallback):
+        self.primary = primary
+        self.fallback = fallback
+
+    async def fetch_response(self, url: str, required_selectors: Optional[List[str]] = None,
+                             etag: Optional[str] = None,
+                             last_modified: Optional[str] = None) -> Optional[Dict]:
+        response = await self.primary.fetch_response(url, required_selectors, etag, last_modified)
+        if response and (response["status"] == 304 or not required_selectors
+                         or await run_parse(has_selectors, response["html"], required_selectors)):
+            return response
+        print(f"{self.primary.name} fetch of {url} is missing expected content; "
+              f"falling back to {self.fallback.name}")
+        return await self.fallback.fetch_response(url, required_selectors)
+
+    async def close(self):
+        await self.primary.close()
+        await self.fallback.close()
+
+
+FETCH_ENGINES = ("auto", "http", "browser")
+
+_fetcher = None
+
+
+def init_fetcher(engine: str = FETCH_ENGINE):
+    """Create the process-wide fetcher for the given engine name."""
+    global _fetcher
+    if engine == "http":
+        _fetcher = ScheduledFetcher(HttpFetcher())
+    elif engine == "browser":
+        _fetcher = ScheduledFetcher(BrowserFetcher())
+    elif engine == "auto":
+        # A page that still fails after retries is not handed to the browser,
+        # which would only add load to a host that is already struggling
+        _fetcher = FallbackFetcher(ScheduledFetcher(HttpFetcher()), ScheduledFetcher(BrowserFetcher()))
+    else:
+        raise ValueError(f"Unknown fetch engine '{engine}', expected one of {FETCH_ENGINES}")
+    return _fetcher
+
+
+def get_fetcher():
+    """Return the process-wide fetcher, creating the default one if needed."""
+    if _fetcher is None:
+        return init_fetcher()
+    return _fetcher
+
+
+async def close_fetcher():
+    """Close the process-wide fetcher if one was created."""
+    global _fetcher
+    if _fetcher is not None:
+        fetcher, _fetcher = _fetcher, None
+        await fetcher.close()
@@ -0,0 +1,38 @@
+"""
+lxml parsing helpers shared by the extractors and the fetchers.
+
+Kept apart from utils.py, which imports the fetchers, so that the fetchers
+can check pages with the same fast lxml tree the extractors use.
+"""
+
+from functools import lru_cache
+
+import lxml.cssselect
+import lxml.etree
+import lxml.html
+
+
+def parse_html_tree(html_content) -> lxml.html.HtmlElement:
+    """Parse HTML (str or bytes) into an lxml tree.
+
+    Much faster than BeautifulSoup's html.parser; used by the index and post
+    extractors and the fetchers' selector check. An empty document yields an
+    empty <html> element.
+    """
+    if isinstance(html_content, str) and html_content.lstrip().startswith('<?xml'):
+        # lxml refuses str input that carries an XML encoding declaration
+        html_content = html_content.encode('utf-8')
+    try:
+        return lxml.html.fromstring(html_content)
+    except lxml.etree.ParserError:
+        return lxml.html.Element('html')
+
+
+@lru_cache(maxsize=None)
+def css_selector(selector: str) -> lxml.cssselect.CSSSelector:
+    """Compile a CSS selector for lxml trees, once per process.
+
+    Calling the result on an element returns its matching descendants (and
+    the element itself, if it matches) in document order.
+    """
+    return lxml.cssselect.CSSSelector(selector, translator='html')
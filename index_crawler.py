@@ -1,121 +1,195 @@
 import asyncio
-from crawl4ai import AsyncWebCrawler
-from crawl4ai.async_configs import BrowserConfig, CrawlerRunConfig
-from bs4 import BeautifulSoup
 import re
-from typing import List, Optional, Tuple, Dict
+from typing import List, Optional, Set, Tuple, Dict
 import sys
 from datetime import datetime, timedelta
-from constants import TZLC_CATEGORY, TZLC_BASE_URL
+from categories import get_category
 
 # Import the helper functions from utils module
-from utils import fetch_page_content, parse_html_content
-from constants import ZNJY_BASE_URL, PAGE_PARAM, DEFAULT_PAGE_NUMBER
-
-async def extract_div_elements(soup: BeautifulSoup) -> List:
-    """Extract all div elements with class 'odd' or 'even'."""
-    odd_divs = soup.find_all('div', class_='odd')
-    even_divs = soup.find_all('div', class_='even')
-    
-    # Combine both lists
-    div_elements = []
-    div_elements.extend(odd_divs)
-    div_elements.extend(even_divs)
-    
-    return div_elements
-
-async def extract_anchor_hrefs(div_elements: List) -> List:
-    """Extract anchor elements and their href attributes."""
-    href_list = []
-    
-    for i, div in enumerate(div_elements):
-        # Find the first <a> tag within this div
-        first_a_tag = div.find('a')
-        if first_a_tag:            
-            # Extract href attribute and append to href_list
-            href = first_a_tag.get('href')
-            if href:
-                href_list.append(href)
-    
-    return href_list
-
-def extract_date_strings(div_elements: List) -> List:
-    """Extract date strings in mm/dd/yyyy format from div elements, but store them in yyyy/mm/dd format."""
-    date_strings = []
-    
-    for i, div in enumerate(div_elements):
-        div_text = div.get_text()
-        # Pattern to match mm/dd/yyyy format
-        date_pattern = r'\b(0[1-9]|1[0-2])/(0[1-9]|[12][0-9]|3[01])/(\d{4})\b'
-        match = re.search(date_pattern, div_text)
-        if match:
-            date_str = match.group(0)
-            month = date_str[0:2]
-            day = date_str[3:5]
-            year = date_str[6:10]
-            new_date_str = f"{year}{month}{day}"  
-            date_strings.append(new_date_str)
-            print(f"Div {i+1} - Date found: {new_date_str}")
-        else:
-            print(f"Div {i+1} - No date found")
-    
-    return date_strings
-
-async def crawl_index(page_number: int, category) -> Dict[str, List[str]]:
-    """Main function to orchestrate the web scraping process for a specific page.
+from html_tree import css_selector, parse_html_tree
+from utils import fetch_page_content
+from constants import DEFAULT_PAGE_NUMBER, ZNJY_CATEGORY, PAGE_KIND_INDEX, INDEX_ROW_SELECTOR
+from metrics import get_metrics
+from parse_pool import run_parse
+from post_index import get_post_index
+from post_filter import get_post_filter
+
+# Pattern to match mm/dd/yyyy format
+DATE_PATTERN = re.compile(r'\b(0[1-9]|1[0-2])/(0[1-9]|[12][0-9]|3[01])/(\d{4})\b')
+
+# Reply counts appear as e.g. "回复: 12" or "12 replies" in the row text
+REPLY_COUNT_PATTERN = re.compile(r'(?:回复|replies|reply)\D{0,3}?(\d+)|(\d+)\s*(?:条回复|回复|replies)', re.IGNORECASE)
+
+# Body sizes appear as e.g. "(1234 bytes)" after the title
+BYTE_SIZE_PATTERN = re.compile(r'\((\d+)\s*(?:bytes?|字节)\)', re.IGNORECASE)
+
+def parse_row_date(row_text: str) -> Optional[str]:
+    """Return the first mm/dd/yyyy date in row_text as yyyymmdd, or None."""
+    match = DATE_PATTERN.search(row_text)
+    if not match:
+        return None
+    month, day, year = match.groups()
+    return f"{year}{month}{day}"
+
+def parse_reply_count(row_text: str) -> Optional[int]:
+    """Return the reply count shown in row_text, or None if the row has none."""
+    match = REPLY_COUNT_PATTERN.search(row_text)
+    if not match:
+        return None
+    return int(match.group(1) or match.group(2))
+
+def parse_byte_size(row_text: str) -> Optional[int]:
+    """Return the body size in bytes shown in row_text, or None if the row has none."""
+    match = BYTE_SIZE_PATTERN.search(row_text)
+    return int(match.group(1)) if match else None
+
+def text_outside(element, skipped) -> str:
+    """Return the text of element, leaving out the text inside skipped (a descendant)."""
+    parts = [element.text or ""]
+    for child in element:
+        # Comments and processing instructions have no text content
+        if child is not skipped and isinstance(child.tag, str):
+            parts.append(text_outside(child, skipped))
+        parts.append(child.tail or "")
+    return "".join(parts)
+
+def extract_index_rows(html_content: str, base_url: str, row_selector: str = INDEX_ROW_SELECTOR) -> List[Dict]:
+    """Extract one record per index row, in document order, in a single pass.
+
+    Rows are the elements matching the CSS row_selector (the category's
+    index_row_selector).
+
+    Each record has the post url, date_str (yyyymmdd), title, reply_count,
+    byte_size and author. The url or date_str is None when the row has no
+    anchor or date, so a malformed row never shifts the fields of the rows
+    after it. The reply count and size are read from the row without its
+    title, so numbers in a title are never taken for them.
+    """
+    root = parse_html_tree(html_content)
+    rows = []
     
-    Returns:
-        Dict[str, List[str]]: Dictionary mapping date strings to lists of hrefs
+    for div in css_selector(row_selector)(root):
+        anchors = div.findall('.//a')
+        
+        # The first anchor links to the thread; the next one is its author
+        post_anchor = anchors[0] if anchors else None
+        href = post_anchor.get('href') if post_anchor is not None else None
+        author_anchor = anchors[1] if len(anchors) > 1 else None
+        meta_text = text_outside(div, post_anchor)
+        
+        rows.append({
+            "url": base_url + href.lstrip('./') if href else None,
+            "date_str": parse_row_date(meta_text) or parse_row_date(div.text_content()),
+            "title": post_anchor.text_content().strip() if post_anchor is not None else "",
+            "reply_count": parse_reply_count(meta_text),
+            "byte_size": parse_byte_size(meta_text),
+            "author": author_anchor.text_content().strip() if author_anchor is not None else None,
+        })
+    
+    return rows
+
+def drop_pinned_rows(rows: List[Dict]) -> List[Dict]:
+    """Drop rows listed above a newer row, keeping page order.
+
+    The board lists threads newest first, except for pinned threads shown at
+    the top of the page whatever their age. Left in, an old pinned thread
+    would make the first page look like it reaches back to its date.
+    """
+    kept = []
+    newest_below = None
+    for row in reversed(rows):
+        date_str = row["date_str"]
+        if date_str and newest_below and date_str < newest_below:
+            continue
+        kept.append(row)
+        if date_str and (newest_below is None or date_str > newest_below):
+            newest_below = date_str
+    kept.reverse()
+    return kept
+
+def group_rows_by_date(rows: List[Dict], post_filter=None, filtered_dates: Optional[Set[str]] = None
+                       ) -> Dict[str, List[str]]:
+    """Map each date string to the urls of its rows, keeping page order.
+
+    Rows rejected by post_filter (see post_filter.PostFilter) are left out,
+    but their dates are still keys, so the page's date bounds stay intact.
+    Dates losing a post an unfiltered crawl would store are added to
+    filtered_dates, if given.
+    """
+    result_dict = {}
+    for row in rows:
+        if row["url"] and row["date_str"]:
+            href_list = result_dict.setdefault(row["date_str"], [])
+            if post_filter is None or post_filter.accepts(row):
+                href_list.append(row["url"])
+            elif filtered_dates is not None and post_filter.withholds(row):
+                filtered_dates.add(row["date_str"])
+    return result_dict
+
+async def crawl_index_rows(page_number: int, category) -> Optional[List[Dict]]:
+    """Fetch one index page and return its row records (see extract_index_rows).
+    
+    Returns None if the page does not exist. Raises FetchError if it could
+    not be fetched after retrying.
     """
-    base_url = ZNJY_BASE_URL
-    if category == TZLC_CATEGORY:
-        base_url = TZLC_BASE_URL
+    category_config = get_category(category)
+    base_url = category_config["base_url"]
 
     # Construct URL with page number
     if page_number <= DEFAULT_PAGE_NUMBER:
         url = base_url
     else:
-        url = f"{base_url}{PAGE_PARAM}{page_number}"
+        url = f"{base_url}{category_config['page_param']}{page_number}"
     
     print(f"Scraping page {page_number} with URL: {url}")
     
     # Fetch HTML content
-    html_content = await fetch_page_content(url)
+    html_content = await fetch_page_content(url, category_config["index_selectors"], PAGE_KIND_INDEX)
     if not html_content:
-        print("Failed to fetch HTML content")
-        return {}
-    
-    # Parse HTML
-    soup = parse_html_content(html_content)
-    
-    # Extract div elements
-    div_elements = await extract_div_elements(soup)
-    print(f"Found {len(div_elements)} div elements")
-    
-    # Extract hrefs
-    href_list = await extract_anchor_hrefs(div_elements)
-    
-    # Extract date strings
-    date_strings = extract_date_strings(div_elements)
-    
-    # Merge href_list and date_strings into a single dictionary
-    result_dict = {}
+        print(f"Page {page_number} is not available")
+        return None
+    
+    metrics = get_metrics()
+    with metrics.timer("parse_index"):
+        rows = await run_parse(extract_index_rows, html_content, base_url,
+                               category_config["index_row_selector"])
+    metrics.inc("index_rows", len(rows))
+    
+    # Every parsed page feeds the local URL -> date index
+    post_index = get_post_index()
+    if post_index is not None:
+        post_index.record_rows(category, rows)
+    dated_rows = sum(1 for row in rows if row["url"] and row["date_str"])
+    print(f"Found {len(rows)} rows on page {page_number} ({dated_rows} with a link and date)")
+    
+    return rows
+
+async def crawl_index(page_number: int, category, filtered_dates: Optional[Set[str]] = None
+                      ) -> Dict[str, List[str]]:
+    """Main function to orchestrate the web scraping process for a specific page.
     
-    # For each date string, create an entry with the href list
-    # This assumes that each date corresponds to a div element and its href
-    for i, date_str in enumerate(date_strings):
-        if date_str not in result_dict:
-            result_dict[date_str] = []
-        # Add the corresponding href if available
-        if i < len(href_list):
-            result_dict[date_str].append(base_url + href_list[i].lstrip('./'))
+    A page that does not exist yields {}. A page that could not be fetched
+    after retrying raises FetchError instead, so a transient failure never
+    passes for the end of the board. Pinned threads (see drop_pinned_rows)
+    are left out. Dates the post filter withheld posts from are added to
+    filtered_dates, if given.
     
-    # Print results
-    print(f"\nTotal hrefs found: {len(href_list)}")
-    for i, href in enumerate(href_list):
-        print(f"Href {i+1}: {href}")
+    Returns:
+        Dict[str, List[str]]: Dictionary mapping date strings to lists of hrefs
+        that pass the post filter
+    """
+    rows = await crawl_index_rows(page_number, category)
+    if rows is None:
+        return {}
     
-    return result_dict
+    rows = drop_pinned_rows(rows)
+    # Threads the index metadata already rules out are never fetched
+    result = group_rows_by_date(rows, get_post_filter(), filtered_dates)
+    filtered = sum(1 for row in rows if row["url"] and row["date_str"]) - sum(map(len, result.values()))
+    if filtered:
+        get_metrics().inc("posts_filtered", filtered)
+        print(f"Filtered out {filtered} posts on page {page_number} by reply count, size or title")
+    return result
 
 async def crawl_index_with_date_filter(pages_to_crawl: range, target_date_offset: int = 3) -> Dict[str, List[str]]:
     """
@@ -160,5 +234,6 @@ async def crawl_index_with_date_filter(pages_to_crawl: range, target_date_offset
 if __name__ == "__main__":
     # Default to page 1 if no argument provided
     page_number = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_PAGE_NUMBER
-    result = asyncio.run(crawl_index(page_number))
+    category = sys.argv[2] if len(sys.argv) > 2 else ZNJY_CATEGORY
+    result = asyncio.run(crawl_index(page_number, category))
     print(f"\nResult dictionary: {result}")
@@ -0,0 +1,189 @@
+"""
+Run metrics: per-stage latencies and counters.
+
+Stages (fetch, parse_index, parse_post, db_write) are timed with
+metrics.timer(stage) and counters are bumped with metrics.inc(name). At the
+end of a run crawl.main writes a JSON report with every counter and the
+count/mean/percentiles of each stage, and optionally the same data in the
+Prometheus text exposition format (e.g. for node_exporter's textfile
+collector), so tuning changes can be compared run against run.
+
+Samples are not kept: each stage holds a count, a sum, a max and fixed
+histogram buckets, so a long-running watcher uses constant memory.
+"""
+
+import bisect
+import json
+import math
+import os
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from constants import (METRICS_LATENCY_BUCKETS, METRICS_NAMESPACE, METRICS_REPORT_PATH,
+                       METRICS_PERCENTILE_BUCKET_GROWTH, METRICS_PERCENTILE_MIN_SECONDS)
+
+LOG_BUCKET_GROWTH = math.log(METRICS_PERCENTILE_BUCKET_GROWTH)
+
+
+class StageStats:
+    """Count, sum, max and bucketed latencies of one stage."""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        # Log-spaced bucket index -> samples, for percentiles
+        self.buckets: Dict[int, int] = {}
+        # Samples per METRICS_LATENCY_BUCKETS bound (not cumulative), for Prometheus
+        self.prometheus_buckets = [0] * len(METRICS_LATENCY_BUCKETS)
+
+    def observe(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        index = 0
+        if seconds > METRICS_PERCENTILE_MIN_SECONDS:
+            index = math.ceil(math.log(seconds / METRICS_PERCENTILE_MIN_SECONDS) / LOG_BUCKET_GROWTH)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        position = bisect.bisect_left(METRICS_LATENCY_BUCKETS, seconds)
+        if position < len(self.prometheus_buckets):
+            self.prometheus_buckets[position] += 1
+
+    def percentile(self, fraction: float) -> float:
+        """Nearest-rank percentile, as the midpoint of the bucket holding it."""
+        if not self.count:
+            return 0.0
+        rank = min(self.count, max(1, int(round(fraction * self.count))))
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                upper = METRICS_PERCENTILE_MIN_SECONDS * METRICS_PERCENTILE_BUCKET_GROWTH ** index
+                return min(self.max, (upper + upper / METRICS_PERCENTILE_BUCKET_GROWTH) / 2)
+        return self.max
+
+
+def write_file_atomically(path: str, content: str):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        f.write(content)
+    os.replace(temp_path, path)
+
+
+class Metrics:
+    """Counters and per-stage latency statistics for one run."""
+
+    def __init__(self):
+        self.started_at = time.time()
+        self.counters: Dict[str, float] = {}
+        self.stages: Dict[str, StageStats] = {}
+        self.info: Dict[str, object] = {}
+
+    def inc(self, name: str, value: float = 1):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, stage: str, seconds: float):
+        if stage not in self.stages:
+            self.stages[stage] = StageStats()
+        self.stages[stage].observe(seconds)
+
+    @contextmanager
+    def timer(self, stage: str):
+        """Time the block (including awaits inside it) as one sample of stage."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def set_info(self, **info):
+        """Record run parameters (category, dates, engine...) for the report."""
+        self.info.update(info)
+
+    def stage_summary(self, stage: str) -> Dict:
+        stats = self.stages.get(stage) or StageStats()
+        return {
+            "count": stats.count,
+            "total_seconds": round(stats.total, 6),
+            "mean_seconds": round(stats.total / stats.count, 6) if stats.count else 0.0,
+            "p50_seconds": round(stats.percentile(0.50), 6),
+            "p95_seconds": round(stats.percentile(0.95), 6),
+            "p99_seconds": round(stats.percentile(0.99), 6),
+            "max_seconds": round(stats.max, 6),
+        }
+
+    def report(self) -> Dict:
+        finished_at = time.time()
+        return {
+            "started_at": self.started_at,
+            "finished_at": finished_at,
+            "duration_seconds": round(finished_at - self.started_at, 3),
+            "run": self.info,
+            "counters": dict(sorted(self.counters.items())),
+            "stages": {stage: self.stage_summary(stage) for stage in sorted(self.stages)},
+        }
+
+    def prometheus_text(self) -> str:
+        """Render the counters and stage histograms in the Prometheus text format."""
+        lines = []
+        for name, value in sorted(self.counters.items()):
+            metric = f"{METRICS_NAMESPACE}_{name}_total"
+            lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric} {value:g}")
+
+        metric = f"{METRICS_NAMESPACE}_stage_seconds"
+        if self.stages:
+            lines.append(f"# TYPE {metric} histogram")
+        for stage, stats in sorted(self.stages.items()):
+            count = 0
+            for bucket, bucket_count in zip(METRICS_LATENCY_BUCKETS, stats.prometheus_buckets):
+                count += bucket_count
+                lines.append(f'{metric}_bucket{{stage="{stage}",le="{bucket:g}"}} {count}')
+            lines.append(f'{metric}_bucket{{stage="{stage}",le="+Inf"}} {stats.count}')
+            lines.append(f'{metric}_sum{{stage="{stage}"}} {stats.total:.6f}')
+            lines.append(f'{metric}_count{{stage="{stage}"}} {stats.count}')
+
+        metric = f"{METRICS_NAMESPACE}_run_duration_seconds"
+        lines.append(f"# TYPE {metric} gauge")
+        lines.append(f"{metric} {time.time() - self.started_at:.3f}")
+        return "\n".join(lines) + "\n"
+
+    def write_report(self, path: str = METRICS_REPORT_PATH, prometheus_path: Optional[str] = None) -> Dict:
+        """Write the JSON report (and the Prometheus file if a path is given)."""
+        report = self.report()
+        write_file_atomically(path, json.dumps(report, indent=2, default=str))
+        print(f"Run report written to {path}")
+        if prometheus_path:
+            write_file_atomically(prometheus_path, self.prometheus_text())
+            print(f"Prometheus metrics written to {prometheus_path}")
+        return report
+
+    def print_summary(self):
+        print("\n=== RUN METRICS ===")
+        for stage in sorted(self.stages):
+            summary = self.stage_summary(stage)
+            print(f"{stage}: {summary['count']} x mean {summary['mean_seconds']:.3f}s, "
+                  f"p95 {summary['p95_seconds']:.3f}s, total {summary['total_seconds']:.1f}s")
+        for name, value in sorted(self.counters.items()):
+            print(f"{name}: {value:g}")
+
+
+_metrics: Optional[Metrics] = None
+
+
+def init_metrics() -> Metrics:
+    """Start a fresh process-wide metrics collection for a run."""
+    global _metrics
+    _metrics = Metrics()
+    return _metrics
+
+
+def get_metrics() -> Metrics:
+    """Return the process-wide metrics, starting a collection if needed."""
+    if _metrics is None:
+        return init_metrics()
+    return _metrics
@@ -0,0 +1,166 @@
+"""
+Local stand-in for a wenxuecity board, used by benchmark.py.
+
+MockForum serves synthetic index and thread pages shaped like the real
+ones (div.odd/div.even index rows with a thread link, body size, author,
+reply count and mm/dd/yyyy date; thread pages with h1.title,
+#msgbodyContent and a #comment list) from a threaded HTTP server on localhost. Page count, rows
+per page, comments per thread and response latency are configurable, and
+every page is generated deterministically so runs are comparable.
+"""
+
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import parse_qs, urlsplit
+
+from constants import PAGE_PARAM
+
+# The newest post on page 1 is dated this day; older rows count back from it
+MOCK_NEWEST_DATE = datetime(2025, 2, 24)
+
+
+class MockForum:
+    """A synthetic board served over HTTP on 127.0.0.1.
+
+    Rows are numbered from 0 on the first index page; row i links to
+    thread-i.html and is dated i // rows_per_day days before
+    MOCK_NEWEST_DATE. Every empty_every-th thread has no comments (0 to
+    disable), so the crawler's skip path is exercised too.
+    """
+
+    def __init__(self, category: str = "bench", pages: int = 20, rows_per_page: int = 25,
+                 rows_per_day: int = 50, comments_per_post: int = 20, body_paragraphs: int = 10,
+                 latency: float = 0.02, empty_every: int = 10):
+        self.category = category
+        self.pages = pages
+        self.rows_per_page = rows_per_page
+        self.rows_per_day = max(1, rows_per_day)
+        self.comments_per_post = comments_per_post
+        self.body_paragraphs = body_paragraphs
+        self.latency = latency
+        self.empty_every = empty_every
+        self.requests = 0
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_port}/{self.category}/"
+
+    @property
+    def total_rows(self) -> int:
+        return self.pages * self.rows_per_page
+
+    def row_date(self, row: int) -> datetime:
+        return MOCK_NEWEST_DATE - timedelta(days=row // self.rows_per_day)
+
+    def date_range(self):
+        """Return the (oldest, newest) yyyymmdd dates of the rows on the board."""
+        return (self.row_date(self.total_rows - 1).strftime("%Y%m%d"),
+                MOCK_NEWEST_DATE.strftime("%Y%m%d"))
+
+    def comment_count(self, thread_id: int) -> int:
+        if self.empty_every and thread_id % self.empty_every == 0:
+            return 0
+        return self.comments_per_post
+
+    def render_index_page(self, page: int) -> str:
+        """Index page number page (1-based); pages past the end have no rows."""
+        rows = []
+        if 1 <= page <= self.pages:
+            first_row = (page - 1) * self.rows_per_page
+            for row in range(first_row, first_row + self.rows_per_page):
+                row_class = "odd" if row % 2 == 0 else "even"
+                rows.append(
+                    f'<div class="{row_class}">'
+                    f'<a href="./thread-{row}.html">模拟帖子标题 {row}：孩子申请与升学经验</a> '
+                    f'({self.body_paragraphs * 120} bytes) - '
+                    f'<a href="/members/user{row % 97}">user{row % 97}</a> '
+                    f'(回复: {self.comment_count(row)}) '
+                    f'<span class="date">{self.row_date(row).strftime("%m/%d/%Y")}</span></div>')
+        return (
+            '<!DOCTYPE html><html lang="zh-CN"><head><meta charset="utf-8">'
+            f'<title>{self.category} - 文学城</title>'
+            '<script>var bbsid = "bench";</script></head><body>'
+            '<div id="header"><a href="/">文学城</a></div>'
+            f'<div class="list">{"".join(rows)}</div>'
+            f'<div class="pages">第 {page} 页</div></body></html>')
+
+    def render_thread_page(self, thread_id: int) -> str:
+        paragraphs = "".join(
+            f"<p>第 {i} 段：模拟正文内容，分享一下时间安排和申请经验。Paragraph {i} of thread {thread_id}.</p>"
+            for i in range(self.body_paragraphs))
+        comments = "".join(
+            f'<div class="cmt {"odd" if i % 2 == 0 else "even"}">'
+            f'<a class="post" href="./{thread_id * 1000 + i}.html">回复 {i}：谢谢<span>分享</span></a> - '
+            f'<a href="/members/c{i}">c{i}</a></div>'
+            for i in range(self.comment_count(thread_id)))
+        return (
+            '<!DOCTYPE html><html lang="zh-CN"><head><meta charset="utf-8">'
+            f'<title>模拟帖子标题 {thread_id} - 文学城</title>'
+            '<script>googletag.cmd.push(function() {});</script></head><body>'
+            f'<h1 class="title">模拟帖子标题 {thread_id}：孩子申请与升学经验</h1>'
+            f'<div class="postinfo">送交者: <a href="/members/u{thread_id}">u{thread_id}</a></div>'
+            f'<div id="msgbodyContent">{paragraphs}<!-- ad --><style>.ad{{}}</style></div>'
+            f'<div id="comment">{comments}</div></body></html>')
+
+    def render(self, path: str) -> Optional[str]:
+        """Return the page for a request path, or None for a 404."""
+        parts = urlsplit(path)
+        prefix = f"/{self.category}/"
+        if not parts.path.startswith(prefix):
+            return None
+        name = parts.path[len(prefix):]
+        if name == "":
+            page_values = parse_qs(parts.query).get(PAGE_PARAM.strip("?="), ["1"])
+            return self.render_index_page(int(page_values[0]))
+        if name.startswith("thread-") and name.endswith(".html"):
+            thread_id = int(name[len("thread-"):-len(".html")])
+            if 0 <= thread_id < self.total_rows:
+                return self.render_thread_page(thread_id)
+        return None
+
+    def start(self) -> "MockForum":
+        forum = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body are written separately; without this, Nagle's
+            # algorithm and delayed ACKs add ~40 ms to every keep-alive response
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                forum.requests += 1
+                if forum.latency:
+                    time.sleep(forum.latency)
+                html = forum.render(self.path)
+                body = (html or "Not Found").encode("utf-8")
+                self.send_response(200 if html is not None else 404)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
@@ -5,21 +5,38 @@ MySQL writer to store crawled posts in the wxc_posts table.
 
 import mysql.connector
 from mysql.connector import Error
+from mysql.connector import pooling
 import json
 from datetime import datetime
-from constants import MYSQL_HOST, MYSQL_PORT, MYSQL_DATABASE, MYSQL_USER, MYSQL_PASSWORD, WXC_POSTS_TABLE
+from constants import (MYSQL_HOST, MYSQL_PORT, MYSQL_DATABASE, MYSQL_USER, MYSQL_PASSWORD, WXC_POSTS_TABLE,
+                       WXC_CRAWL_STATE_TABLE, WXC_KNOWN_URLS_TABLE,
+                       MYSQL_POOL_NAME, MYSQL_POOL_SIZE, MYSQL_INSERT_CHUNK_SIZE)
 
-def create_connection():
-    """Create connection to MySQL database."""
-    try:
-        connection = mysql.connector.connect(
+_connection_pool = None
+
+def get_connection_pool():
+    """Return the process-wide MySQL connection pool, creating it on first use."""
+    global _connection_pool
+    if _connection_pool is None:
+        _connection_pool = pooling.MySQLConnectionPool(
+            pool_name=MYSQL_POOL_NAME,
+            pool_size=MYSQL_POOL_SIZE,
+            pool_reset_session=True,
             host=MYSQL_HOST,
             port=MYSQL_PORT,
             database=MYSQL_DATABASE,
             user=MYSQL_USER,
             password=MYSQL_PASSWORD
         )
-        return connection
+    return _connection_pool
+
+def create_connection():
+    """Borrow a connection from the MySQL pool.
+
+    Calling close() on the returned connection hands it back to the pool.
+    """
+    try:
+        return get_connection_pool().get_connection()
     except Error as e:
         print(f"Error connecting to MySQL: {e}")
         return None
@@ -53,11 +70,24 @@ def create_wxc_posts_table():
                 is_useful BOOLEAN DEFAULT 0,
                 has_tts BOOLEAN DEFAULT 0,
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                UNIQUE KEY uniq_post_url (post_url),
                 INDEX idx_category_date (category, date_str)
             )"""
             
             cursor.execute(create_table_query)
             print(f"{WXC_POSTS_TABLE} table created successfully with new schema")                    
+        else:
+            # Older tables were created without the unique key on post_url
+            if not has_unique_post_url(cursor):
+                # Adding the key is safe only without duplicates; merging them is an explicit step
+                duplicates = count_duplicate_posts(cursor)
+                if duplicates:
+                    print(f"{WXC_POSTS_TABLE} has no unique key on post_url and holds {duplicates} "
+                          f"duplicate rows; review and merge them with "
+                          f"'python mysql_writer.py --dedupe_posts'")
+                    return False
+                cursor.execute(f"ALTER TABLE {WXC_POSTS_TABLE} ADD UNIQUE KEY uniq_post_url (post_url)")
+                print(f"Added unique key on post_url to {WXC_POSTS_TABLE}")
         connection.commit()
         return True
         
@@ -69,54 +99,186 @@ def create_wxc_posts_table():
             cursor.close()
             connection.close()
 
-def insert_post_data(post_data, category, date_str=None):
-    """Insert post data into wxc_posts table."""
+def has_unique_post_url(cursor) -> bool:
+    cursor.execute(f"SHOW INDEX FROM {WXC_POSTS_TABLE} WHERE Key_name = 'uniq_post_url'")
+    return bool(cursor.fetchall())
+
+def count_duplicate_posts(cursor) -> int:
+    """Return how many wxc_posts rows repeat the post_url of another row."""
+    cursor.execute(f"SELECT COUNT(post_url) - COUNT(DISTINCT post_url) FROM {WXC_POSTS_TABLE}")
+    return int(cursor.fetchone()[0] or 0)
+
+def post_completeness(row):
+    """Sort key ranking duplicate rows: downstream results first, then comments, then the newest."""
+    row_id, _, llm_summary, is_useful, has_tts, num_comments = row
+    return (bool(llm_summary), bool(is_useful), bool(has_tts), num_comments or 0, row_id)
+
+def dedupe_posts(apply=False):
+    """Merge wxc_posts rows that share a post_url and add the unique key on post_url.
+
+    Older tables were created without the key, so a URL may have been stored
+    more than once, and later stages may have annotated any of the copies.
+    For each duplicated URL the most complete row (see post_completeness) is
+    kept, it takes over the llm_summary, is_useful and has_tts of the others,
+    and the others are deleted. Without apply nothing is changed and only
+    the rows that would be merged are reported.
+
+    Returns:
+        int: The number of rows deleted (or that would be), None on error
+    """
     connection = create_connection()
     if connection is None:
-        return False
+        return None
     
     try:
         cursor = connection.cursor()
+        cursor.execute(f"""
+        SELECT id, post_url, llm_summary, is_useful, has_tts, num_comments FROM {WXC_POSTS_TABLE}
+        WHERE post_url IN (
+            SELECT post_url FROM {WXC_POSTS_TABLE} GROUP BY post_url HAVING COUNT(*) > 1)
+        ORDER BY post_url, id""")
+        rows_by_url = {}
+        for row in cursor.fetchall():
+            rows_by_url.setdefault(row[1], []).append(row)
+        
+        merges = []
+        for rows in rows_by_url.values():
+            rows.sort(key=post_completeness, reverse=True)
+            keeper = rows[0]
+            llm_summary = next((row[2] for row in rows if row[2]), keeper[2])
+            is_useful = max(bool(row[3]) for row in rows)
+            has_tts = max(bool(row[4]) for row in rows)
+            merges.append((keeper[0], llm_summary, is_useful, has_tts, [row[0] for row in rows[1:]]))
+        
+        duplicates = sum(len(delete_ids) for *_, delete_ids in merges)
+        print(f"{len(merges)} post URLs are stored more than once ({duplicates} extra rows)")
+        if not apply:
+            if merges:
+                print("Nothing changed; re-run with --apply to merge them into one row per URL")
+            return duplicates
+        
+        for keeper_id, llm_summary, is_useful, has_tts, delete_ids in merges:
+            cursor.execute(f"UPDATE {WXC_POSTS_TABLE} SET llm_summary = %s, is_useful = %s, has_tts = %s "
+                           f"WHERE id = %s", (llm_summary, is_useful, has_tts, keeper_id))
+            cursor.execute(f"DELETE FROM {WXC_POSTS_TABLE} WHERE id IN ({', '.join(['%s'] * len(delete_ids))})",
+                           delete_ids)
+        connection.commit()
+        print(f"Merged {duplicates} duplicate rows into {len(merges)} posts")
+        
+        if not has_unique_post_url(cursor):
+            cursor.execute(f"ALTER TABLE {WXC_POSTS_TABLE} ADD UNIQUE KEY uniq_post_url (post_url)")
+            print(f"Added unique key on post_url to {WXC_POSTS_TABLE}")
+        return duplicates
         
-        # Prepare the insert query
-        insert_query = f"""
+    except Error as e:
+        connection.rollback()
+        print(f"Error merging duplicate posts: {e}")
+        return None
+    finally:
+        if connection and connection.is_connected():
+            cursor.close()
+            connection.close()
+
+INSERT_POST_QUERY = f"""
         INSERT INTO {WXC_POSTS_TABLE} 
         (date_str, category, post_url, post_title, post_body, comments, num_comments,llm_summary, is_useful, has_tts)
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)"""
-        
-        # Extract data from post_data structure
-        # Use provided date_str or extract from post_data if available
-        if date_str is None:
-            # For now, we'll use a placeholder - in real implementation,
-            # this would be determined by the actual crawled date
-            date_str = "00000000"  # Default placeholder
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE
+            post_title = VALUES(post_title),
+            post_body = VALUES(post_body),
+            comments = VALUES(comments),
+            num_comments = VALUES(num_comments)"""
 
-        post_url = post_data.get('url', '')
-        post_title = post_data.get('data', {}).get('post_title', '')
-        post_body = post_data.get('data', {}).get('post_content', '')
-        comments = json.dumps(post_data.get('data', {}).get('comments', []), ensure_ascii=False)
-        llm_summary = ""  # Empty for now, can be populated with LLM analysis
+def create_crawl_state_tables():
+    """Create the crawl-state and known-URL tables if they don't exist.
+
+    wxc_crawl_state records which (category, date) windows have been fully
+    crawled; wxc_known_urls records post URLs that were processed but not
+    stored (e.g. posts without comments) so they are not fetched again.
+    """
+    connection = create_connection()
+    if connection is None:
+        return False
+    
+    try:
+        cursor = connection.cursor()
         
-        # Count comments - ensure it's an integer (0 if no comments or invalid data)
-        comments_list = post_data.get('data', {}).get('comments', [])
-        num_comments = len(comments_list) if comments_list is not None else 0
+        cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {WXC_CRAWL_STATE_TABLE} (
+            category VARCHAR(255) NOT NULL,
+            date_str CHAR(8) NOT NULL,
+            is_complete BOOLEAN DEFAULT 0,
+            post_count INT DEFAULT 0,
+            completed_at TIMESTAMP NULL DEFAULT NULL,
+            PRIMARY KEY (category, date_str)
+        )""")
+        
+        cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {WXC_KNOWN_URLS_TABLE} (
+            post_url VARCHAR(500) NOT NULL PRIMARY KEY,
+            category VARCHAR(255),
+            date_str CHAR(8),
+            status VARCHAR(16),
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+        )""")
+        
+        connection.commit()
+        return True
+        
+    except Error as e:
+        print(f"Error creating crawl state tables: {e}")
+        return False
+    finally:
+        if connection and connection.is_connected():
+            cursor.close()
+            connection.close()
+
+def build_post_row(post_data, category, date_str=None):
+    """Build the INSERT parameters for one crawled post."""
+    # Extract data from post_data structure
+    # Use provided date_str or extract from post_data if available
+    if date_str is None:
+        # For now, we'll use a placeholder - in real implementation,
+        # this would be determined by the actual crawled date
+        date_str = "00000000"  # Default placeholder
+
+    post_url = post_data.get('url', '')
+    post_title = post_data.get('data', {}).get('post_title', '')
+    post_body = post_data.get('data', {}).get('post_content', '')
+    comments = json.dumps(post_data.get('data', {}).get('comments', []), ensure_ascii=False)
+    llm_summary = ""  # Empty for now, can be populated with LLM analysis
+    
+    # Count comments - ensure it's an integer (0 if no comments or invalid data)
+    comments_list = post_data.get('data', {}).get('comments', [])
+    num_comments = len(comments_list) if comments_list is not None else 0
+    
+    return (
+        date_str,
+        category,
+        post_url,
+        post_title,
+        post_body,
+        comments,
+        num_comments,
+        llm_summary,
+        0,  # is_useful defaults to 0 (not useful)
+        0,   # has_tts defaults to 0 (no TTS)
+    )
+
+def insert_post_data(post_data, category, date_str=None):
+    """Insert post data into wxc_posts table."""
+    connection = create_connection()
+    if connection is None:
+        return False
+    
+    try:
+        cursor = connection.cursor()
         
         # Execute the insert
-        cursor.execute(insert_query, (
-            date_str,
-            category,
-            post_url,
-            post_title,
-            post_body,
-            comments,
-            num_comments,
-            llm_summary,
-            0,  # is_useful defaults to 0 (not useful)
-            0,   # has_tts defaults to 0 (no TTS)
-        ))
+        cursor.execute(INSERT_POST_QUERY, build_post_row(post_data, category, date_str))
         
         connection.commit()
-        print(f"Successfully inserted post: {post_url}")
+        print(f"Successfully inserted post: {post_data.get('url', '')}")
         return True
         
     except Error as e:
@@ -127,17 +289,213 @@ def insert_post_data(post_data, category, date_str=None):
             cursor.close()
             connection.close()
 
-def insert_multiple_posts(post_data_list, category, date_str=None):
-    """Insert multiple posts into the database."""
-    success_count = 0
+def insert_posts_bulk(post_data_list, category, date_str=None, chunk_size=MYSQL_INSERT_CHUNK_SIZE):
+    """Insert posts in chunks over a single connection and transaction.
+
+    Each chunk is written with one executemany call (sent as a multi-row
+    INSERT). If a chunk fails it is rolled back to its savepoint and retried
+    row by row, so a bad row is reported without aborting the batch.
+
+    Returns:
+        Tuple[int, List[str]]: Number of inserted posts and the URLs that failed
+    """
+    if not post_data_list:
+        return 0, []
+
+    connection = create_connection()
+    if connection is None:
+        return 0, [post_data.get('url', '') for post_data in post_data_list]
     
-    for post_data in post_data_list:
-        if insert_post_data(post_data, category, date_str):
-            success_count += 1
+    success_count = 0
+    failed_urls = []
+    try:
+        cursor = connection.cursor()
+        connection.start_transaction()
+        
+        for start in range(0, len(post_data_list), max(1, chunk_size)):
+            chunk = post_data_list[start:start + max(1, chunk_size)]
+            rows = [build_post_row(post_data, category, date_str) for post_data in chunk]
+            
+            cursor.execute("SAVEPOINT insert_chunk")
+            try:
+                cursor.executemany(INSERT_POST_QUERY, rows)
+                success_count += len(rows)
+                continue
+            except Error as e:
+                print(f"Chunk of {len(rows)} posts failed ({e}); retrying row by row")
+                cursor.execute("ROLLBACK TO SAVEPOINT insert_chunk")
+            
+            for post_data, row in zip(chunk, rows):
+                cursor.execute("SAVEPOINT insert_row")
+                try:
+                    cursor.execute(INSERT_POST_QUERY, row)
+                    success_count += 1
+                except Error as e:
+                    print(f"Error inserting post {post_data.get('url', '')}: {e}")
+                    cursor.execute("ROLLBACK TO SAVEPOINT insert_row")
+                    failed_urls.append(post_data.get('url', ''))
+        
+        connection.commit()
+        return success_count, failed_urls
+        
+    except Error as e:
+        print(f"Error bulk inserting post data: {e}")
+        connection.rollback()
+        return 0, [post_data.get('url', '') for post_data in post_data_list]
+    finally:
+        if connection and connection.is_connected():
+            cursor.close()
+            connection.close()
+
+def insert_multiple_posts(post_data_list, category, date_str=None, chunk_size=MYSQL_INSERT_CHUNK_SIZE):
+    """Insert multiple posts into the database."""
+    success_count, failed_urls = insert_posts_bulk(post_data_list, category, date_str, chunk_size)
     
+    for url in failed_urls:
+        print(f"Failed to insert post: {url}")
     print(f"Successfully inserted {success_count} out of {len(post_data_list)} posts")
     return success_count
 
+def read_existing_post_urls(post_urls, chunk_size=MYSQL_INSERT_CHUNK_SIZE):
+    """Return the subset of post_urls that are already stored in wxc_posts."""
+    post_urls = list(post_urls)
+    if not post_urls:
+        return set()
+
+    connection = create_connection()
+    if connection is None:
+        return set()
+    
+    existing_urls = set()
+    try:
+        cursor = connection.cursor()
+        
+        for start in range(0, len(post_urls), max(1, chunk_size)):
+            chunk = post_urls[start:start + max(1, chunk_size)]
+            placeholders = ", ".join(["%s"] * len(chunk))
+            cursor.execute(
+                f"SELECT post_url FROM {WXC_POSTS_TABLE} WHERE post_url IN ({placeholders})",
+                tuple(chunk)
+            )
+            existing_urls.update(row[0] for row in cursor.fetchall())
+        
+        return existing_urls
+        
+    except Error as e:
+        print(f"Error reading existing post urls: {e}")
+        return set()
+    finally:
+        if connection and connection.is_connected():
+            cursor.close()
+            connection.close()
+
+def read_known_post_urls(category=None):
+    """Return every post URL already stored or recorded as known, optionally for one category."""
+    connection = create_connection()
+    if connection is None:
+        return []
+    
+    try:
+        cursor = connection.cursor()
+        
+        where = "WHERE category = %s" if category else ""
+        params = (category, category) if category else ()
+        cursor.execute(f"""
+        SELECT post_url FROM {WXC_POSTS_TABLE} {where}
+        UNION
+        SELECT post_url FROM {WXC_KNOWN_URLS_TABLE} {where}
+        """, params)
+        return [row[0] for row in cursor.fetchall()]
+        
+    except Error as e:
+        print(f"Error reading known post urls: {e}")
+        return []
+    finally:
+        if connection and connection.is_connected():
+            cursor.close()
+            connection.close()
+
+def record_known_urls(known_urls, category, status):
+    """Record (date_str, post_url) pairs that were processed with the given status."""
+    if not known_urls:
+        return True
+
+    connection = create_connection()
+    if connection is None:
+        return False
+    
+    try:
+        cursor = connection.cursor()
+        cursor.executemany(f"""
+        INSERT INTO {WXC_KNOWN_URLS_TABLE} (post_url, category, date_str, status)
+        VALUES (%s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE status = VALUES(status)""",
+            [(post_url, category, date_str, status) for date_str, post_url in known_urls])
+        connection.commit()
+        return True
+        
+    except Error as e:
+        print(f"Error recording known urls: {e}")
+        return False
+    finally:
+        if connection and connection.is_connected():
+            cursor.close()
+            connection.close()
+
+def read_complete_dates(category, start_date_str, end_date_str):
+    """Return the set of dates in [start_date_str, end_date_str] already crawled completely."""
+    connection = create_connection()
+    if connection is None:
+        return set()
+    
+    try:
+        cursor = connection.cursor()
+        cursor.execute(f"""
+        SELECT date_str FROM {WXC_CRAWL_STATE_TABLE}
+        WHERE category = %s AND date_str BETWEEN %s AND %s AND is_complete = 1
+        """, (category, start_date_str, end_date_str))
+        return {row[0] for row in cursor.fetchall()}
+        
+    except Error as e:
+        print(f"Error reading complete dates: {e}")
+        return set()
+    finally:
+        if connection and connection.is_connected():
+            cursor.close()
+            connection.close()
+
+def mark_dates_complete(category, post_counts):
+    """Mark (category, date) windows as fully crawled.
+
+    Args:
+        post_counts: Dict mapping each complete date_str to its number of posts
+    """
+    if not post_counts:
+        return True
+
+    connection = create_connection()
+    if connection is None:
+        return False
+    
+    try:
+        cursor = connection.cursor()
+        cursor.executemany(f"""
+        INSERT INTO {WXC_CRAWL_STATE_TABLE} (category, date_str, is_complete, post_count, completed_at)
+        VALUES (%s, %s, 1, %s, CURRENT_TIMESTAMP)
+        ON DUPLICATE KEY UPDATE is_complete = 1, post_count = GREATEST(post_count, VALUES(post_count)),
+            completed_at = CURRENT_TIMESTAMP""",
+            [(category, date_str, count) for date_str, count in post_counts.items()])
+        connection.commit()
+        return True
+        
+    except Error as e:
+        print(f"Error marking dates complete: {e}")
+        return False
+    finally:
+        if connection and connection.is_connected():
+            cursor.close()
+            connection.close()
+
 def read_max_date_by_category(category):
     """Return the maximum date_str for a given category."""
     connection = create_connection()
@@ -181,9 +539,21 @@ def test_database_connection():
 
 # Example usage (can be called from main wxc.py)
 if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Check the MySQL connection and create the tables")
+    parser.add_argument("--dedupe_posts", action="store_true",
+                        help=f"Report {WXC_POSTS_TABLE} rows sharing a post_url (merged only with --apply)")
+    parser.add_argument("--apply", action="store_true",
+                        help="With --dedupe_posts, merge the duplicates and add the unique key on post_url")
+    args = parser.parse_args()
+    
     # Test the database connection
     print("Testing MySQL connection...")
     test_database_connection()
     
-    # Create table if needed
-    create_wxc_posts_table()
+    if args.dedupe_posts:
+        dedupe_posts(apply=args.apply)
+    else:
+        # Create tables if needed
+        create_wxc_posts_table()
+        create_crawl_state_tables()
@@ -0,0 +1,264 @@
+"""
+Locate the index pages that hold a given date.
+
+The board index is ordered newest-first, so the pages covering a date form a
+contiguous window. Instead of scanning a fixed page range, the locator
+gallops forward from the first page and then binary-searches for the first
+page that reaches back to the target date, which takes O(log n) fetches even
+for dates that are months old. The window is then walked forward only until
+every row on a page is older than the target (or than the start of a date
+range, which lets a whole range be collected in one scan).
+
+Date ranges the local post index (post_index.py) already holds completely
+are answered from it without touching the network, and every scan marks
+the dates it covered as complete there.
+"""
+
+import asyncio
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Optional, Set, Tuple
+
+from constants import MIN_PAGE_NUMBER, MAX_PAGE_NUMBER, MAX_CONCURRENT_INDEX_FETCHES
+from index_crawler import crawl_index
+from post_index import get_post_index
+from post_filter import get_post_filter
+from utils import date_strs_between, shift_date_str
+
+
+class DateOutOfReachError(Exception):
+    """Raised when a date range reaches past max_page, the last index page scanned."""
+
+
+async def crawl_index_page(page_num, category, semaphore, page_cache=None, filtered_dates=None):
+    """Crawl a single index page while holding a fan-out slot.
+
+    Results are memoised in page_cache so probed pages are never fetched twice.
+    Dates the post filter withheld posts from are added to filtered_dates.
+    """
+    if page_cache is not None and page_num in page_cache:
+        return page_cache[page_num]
+    async with semaphore:
+        print(f"\nCrawling page {page_num}...")
+        result = await crawl_index(page_num, category, filtered_dates)
+    if page_cache is not None:
+        page_cache[page_num] = result
+    return result
+
+
+def page_date_bounds(result: Dict[str, List[str]]) -> Optional[Tuple[str, str]]:
+    """Return the (oldest, newest) yyyymmdd dates on a page, or None if it is empty."""
+    if not result:
+        return None
+    return min(result), max(result)
+
+
+def is_past_range(result: Dict[str, List[str]], start_date_str: str) -> bool:
+    """Whether a page is entirely older than start_date_str (or past the end of the board)."""
+    bounds = page_date_bounds(result)
+    return bounds is None or bounds[1] < start_date_str
+
+
+async def locate_first_page(category, target_date_str, page_cache, semaphore,
+                            min_page=MIN_PAGE_NUMBER, max_page=MAX_PAGE_NUMBER,
+                            filtered_dates=None) -> Optional[int]:
+    """Find the first page whose rows reach back to target_date_str.
+
+    Pages before the returned one are entirely newer than the target. Returns
+    None if even max_page only holds newer posts. Pinned threads are not part
+    of a page's dates (see index_crawler.drop_pinned_rows), so old pinned
+    posts on the first page do not stop the search there.
+    """
+    async def is_before_target(page_num):
+        bounds = page_date_bounds(await crawl_index_page(page_num, category, semaphore, page_cache,
+                                                         filtered_dates))
+        # An empty page means we ran past the end of the board
+        return bounds is not None and bounds[0] > target_date_str
+
+    # Gallop forward until we overshoot the target date
+    lo = hi = min_page
+    while await is_before_target(hi):
+        if hi >= max_page:
+            print(f"Date {target_date_str} is older than page {max_page}")
+            return None
+        lo = hi + 1
+        hi = min(hi * 2, max_page)
+
+    # Binary search for the first page that is not entirely newer than the target
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if await is_before_target(mid):
+            lo = mid + 1
+        else:
+            hi = mid
+
+    print(f"Date {target_date_str} starts on page {lo} ({len(page_cache)} pages probed)")
+    return lo
+
+
+async def iter_date_range(category, start_date_str, end_date_str, index_concurrency=MAX_CONCURRENT_INDEX_FETCHES,
+                          max_page=MAX_PAGE_NUMBER, filtered_dates: Optional[Set[str]] = None
+                          ) -> AsyncIterator[Tuple[int, Dict[str, List[str]]]]:
+    """Yield (page_num, {date_str: hrefs}) for each index page holding dates in the range.
+
+    Locates the first page reaching back to end_date_str, then fetches pages
+    forward until a page is entirely older than start_date_str, so the whole
+    range costs a single scan. Batches start at one page and double up to
+    index_concurrency, pages the locator already fetched are free, and no
+    page past one the locator already saw is older than the range is
+    fetched, so a short range costs only the pages it spans. Pages are
+    yielded in order as soon as their batch is fetched, and hrefs are
+    de-duplicated across pages since a thread can shift to the next page
+    while the scan is running. An index page that still fails after retrying
+    raises FetchError, so a scan never silently skips a page. If the range
+    reaches past max_page, DateOutOfReachError is raised once the pages up
+    to max_page have been yielded.
+
+    If the local post index holds every date of the range completely, its
+    posts are yielded as a single page 0 instead of scanning, filtered on
+    their titles only.
+
+    Dates the post filter withheld a storable post from are added to
+    filtered_dates, if given, so they are not taken for fully crawled.
+    """
+    post_index = get_post_index()
+    if post_index is not None and post_index.readable:
+        date_strs = date_strs_between(start_date_str, end_date_str)
+        if len(post_index.complete_dates(category, start_date_str, end_date_str)) == len(date_strs):
+            # Reply counts and sizes are as of the scan that recorded the rows,
+            # so only the title part of the filter still applies to them
+            posts = post_index.posts_by_date(category, start_date_str, end_date_str,
+                                             get_post_filter().title_only(), filtered_dates)
+            print(f"Dates {start_date_str}-{end_date_str} answered from the local post index "
+                  f"({sum(len(href_list) for href_list in posts.values())} posts); no index scan needed")
+            if posts:
+                yield 0, posts
+            return
+
+    page_cache = {}
+    semaphore = asyncio.Semaphore(max(1, index_concurrency))
+
+    first_page = await locate_first_page(category, end_date_str, page_cache, semaphore,
+                                         max_page=max_page, filtered_dates=filtered_dates)
+    if first_page is None:
+        raise DateOutOfReachError(f"Date {end_date_str} is older than index page {max_page}")
+
+    # The gallop usually overshot onto a page past the range; the scan ends there at the latest
+    last_page = min([page for page, result in page_cache.items()
+                     if page >= first_page and is_past_range(result, start_date_str)] + [max_page])
+
+    seen_hrefs = set()
+    page_num = first_page
+    batch_size = 1
+    done = False
+    bounds = None
+    while not done and page_num <= last_page:
+        # Up to batch_size pages to fetch, plus any cached ones among them
+        batch = []
+        fetches = 0
+        while page_num + len(batch) <= last_page and (page_num + len(batch) in page_cache
+                                                      or fetches < batch_size):
+            fetches += page_num + len(batch) not in page_cache
+            batch.append(page_num + len(batch))
+        if fetches:
+            batch_size = min(batch_size * 2, max(1, index_concurrency))
+        results = await asyncio.gather(*(crawl_index_page(p, category, semaphore, page_cache, filtered_dates)
+                                         for p in batch))
+
+        for batch_page, result in zip(batch, results):
+            page_posts = {}
+            for date_str, href_list in result.items():
+                if not start_date_str <= date_str <= end_date_str:
+                    continue
+                for href in href_list:
+                    if href not in seen_hrefs:
+                        seen_hrefs.add(href)
+                        page_posts.setdefault(date_str, []).append(href)
+            if page_posts:
+                yield batch_page, page_posts
+
+            bounds = page_date_bounds(result)
+            if is_past_range(result, start_date_str):
+                print(f"Page {batch_page} is past {start_date_str}; stopping scan")
+                done = True
+                break
+        page_num = batch[-1] + 1
+
+    print(f"Found {len(seen_hrefs)} posts dated {start_date_str}-{end_date_str} "
+          f"({len(page_cache)} index pages fetched)")
+    if not done:
+        raise DateOutOfReachError(f"Dates before {bounds[0] if bounds else end_date_str} "
+                                  f"are older than index page {max_page}")
+
+    if done and post_index is not None:
+        # The locator has almost always probed the page just before the window
+        previous_page = page_cache.get(first_page - 1)
+        mark_scanned_dates_complete(post_index, category, start_date_str, first_page,
+                                    page_date_bounds(page_cache[first_page]),
+                                    page_date_bounds(previous_page) if previous_page is not None else None,
+                                    bounds)
+
+
+def mark_scanned_dates_complete(post_index, category, start_date_str, first_page, first_bounds,
+                                previous_bounds, last_bounds):
+    """Record the dates a finished scan from first_page saw in full.
+
+    A date is complete if the scan reached a page whose newest row is older
+    (or the end of the board), and a newer row was seen before it: on the
+    page before first_page, on first_page itself, or because the scan
+    started on the first page of the board. Today is never complete.
+    """
+    if first_bounds is None:
+        return
+    yesterday = shift_date_str(datetime.now().strftime("%Y%m%d"), -1)
+    if first_page <= MIN_PAGE_NUMBER:
+        upper = yesterday
+    elif previous_bounds is not None:
+        upper = min(shift_date_str(previous_bounds[0], -1), yesterday)
+    else:
+        upper = min(shift_date_str(first_bounds[1], -1), yesterday)
+    # An empty last page means the board ended; nothing older than the range exists
+    lower = start_date_str if last_bounds is None else shift_date_str(last_bounds[1], 1)
+    if lower <= upper:
+        post_index.mark_complete(category, date_strs_between(lower, upper))
+        print(f"Post index: {lower}-{upper} complete for {category}")
+
+
+async def sync_post_index(category, index_concurrency=MAX_CONCURRENT_INDEX_FETCHES, since_date_str=None,
+                          max_page=MAX_PAGE_NUMBER) -> Dict[str, List[str]]:
+    """Bring the local post index up to date by scanning from page 1.
+
+    The scan runs back to the newest date already complete in the index (so
+    the new coverage joins the old one), or to since_date_str, or to
+    yesterday for a board that was never indexed.
+
+    Returns:
+        Dict[str, List[str]]: The posts found, by date (newest first)
+    """
+    today = datetime.now().strftime("%Y%m%d")
+    if since_date_str is None:
+        post_index = get_post_index()
+        since_date_str = (post_index.newest_complete_date(category) if post_index is not None else None) \
+            or shift_date_str(today, -1)
+    return await scan_date_range(category, min(since_date_str, today), today, index_concurrency, max_page)
+
+
+async def scan_date_range(category, start_date_str, end_date_str, index_concurrency=MAX_CONCURRENT_INDEX_FETCHES,
+                          max_page=MAX_PAGE_NUMBER) -> Dict[str, List[str]]:
+    """Collect every post href dated between start_date_str and end_date_str inclusive.
+
+    Returns:
+        Dict[str, List[str]]: Date strings (newest first) mapped to their hrefs
+    """
+    posts_by_date = {}
+    async for _, page_posts in iter_date_range(category, start_date_str, end_date_str,
+                                               index_concurrency, max_page):
+        for date_str, href_list in page_posts.items():
+            posts_by_date.setdefault(date_str, []).extend(href_list)
+    return {date_str: posts_by_date[date_str] for date_str in sorted(posts_by_date, reverse=True)}
+
+
+async def scan_date_window(category, target_date_str, index_concurrency=MAX_CONCURRENT_INDEX_FETCHES,
+                           max_page=MAX_PAGE_NUMBER) -> Dict[str, List[str]]:
+    """Collect every post href dated target_date_str."""
+    return await scan_date_range(category, target_date_str, target_date_str,
+                                 index_concurrency, max_page)
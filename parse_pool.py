@@ -0,0 +1,84 @@
+"""
+Run CPU-bound HTML parsing off the event loop.
+
+Parsing a large thread page takes milliseconds of pure CPU, and while it
+runs on the event loop every other in-flight fetch stalls. run_parse hands
+the parse function and the raw HTML to an executor instead:
+
+- "process": a ProcessPoolExecutor, so parsing scales across cores
+- "thread": a ThreadPoolExecutor, cheaper to start and enough for light parsers
+- "inline": parse on the event loop (also used when no pool was initialised)
+
+The parse functions (extract_index_rows, extract_post, has_selectors) are
+pure module-level functions over HTML, so they can be pickled to worker
+processes and return plain dicts and lists.
+"""
+
+import asyncio
+import os
+from concurrent.futures import BrokenExecutor, Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Optional
+
+from constants import PARSE_EXECUTOR, PARSE_WORKERS
+
+PARSE_EXECUTORS = ("process", "thread", "inline")
+
+_executor: Optional[Executor] = None
+
+
+def init_parse_pool(kind: str = PARSE_EXECUTOR, workers: Optional[int] = PARSE_WORKERS) -> Optional[Executor]:
+    """Create the process-wide parse executor (None for inline parsing).
+
+    workers defaults to one per CPU; on a single-CPU machine a default-sized
+    process pool is replaced by inline parsing.
+    """
+    global _executor
+    if workers is None:
+        workers = os.cpu_count() or 1
+        if kind == "process" and workers < 2:
+            # A single worker process only adds pickling overhead
+            print("Single CPU; parsing inline instead of in a process pool")
+            kind = "inline"
+    workers = max(1, workers)
+    if kind == "process":
+        _executor = ProcessPoolExecutor(max_workers=workers)
+    elif kind == "thread":
+        _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="parse")
+    elif kind == "inline":
+        _executor = None
+    else:
+        raise ValueError(f"Unknown parse executor '{kind}', expected one of {PARSE_EXECUTORS}")
+    if _executor is not None:
+        print(f"Parsing with a {kind} pool of {workers} workers")
+    return _executor
+
+
+def get_parse_pool() -> Optional[Executor]:
+    """Return the process-wide parse executor, or None if parsing runs inline."""
+    return _executor
+
+
+def close_parse_pool():
+    """Shut down the process-wide parse executor if one was created."""
+    global _executor
+    if _executor is not None:
+        executor, _executor = _executor, None
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+async def run_parse(parse: Callable, *args):
+    """Run parse(*args) on the parse executor and return its result.
+
+    If a worker process died the pool is unusable; the parse then falls back
+    to running inline so the crawl can go on.
+    """
+    global _executor
+    if _executor is None:
+        return parse(*args)
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_executor, parse, *args)
+    except BrokenExecutor as e:
+        print(f"Parse pool is broken ({e}); parsing inline from now on")
+        executor, _executor = _executor, None
+        executor.shutdown(wait=False, cancel_futures=True)
+        return parse(*args)
@@ -0,0 +1,302 @@
+"""
+Streaming fetch -> parse -> store pipeline.
+
+Three stages run concurrently, connected by bounded asyncio queues:
+
+1. An index producer walks the index pages for the date range and queues
+   every post that is not already stored (or known to be empty).
+2. A fixed number of fetch workers crawl (and parse) those posts.
+3. A writer batches fetched posts and writes them to the storage sinks
+   (MySQL by default, see storage.py), flushing whenever a batch fills up
+   or has been waiting for flush_interval seconds. Every storage call runs
+   on a DB thread (see async_db.py), so fetching continues while a batch
+   is written.
+
+The bounded queues apply backpressure: the producer waits when the fetchers
+fall behind and the fetchers wait when the writer does. Writes start as soon
+as the first posts arrive, memory stays flat however many posts a day has,
+and a crash late in the run keeps everything that was already written.
+"""
+
+import asyncio
+from typing import Dict, List, Optional, Tuple
+
+from constants import (MAX_CONCURRENT_POST_FETCHES, POST_FETCH_TIMEOUT_SECONDS,
+                       MAX_CONCURRENT_INDEX_FETCHES, PIPELINE_QUEUE_SIZE,
+                       PIPELINE_WRITE_BATCH_SIZE, PIPELINE_FLUSH_INTERVAL_SECONDS)
+from page_locator import DateOutOfReachError, iter_date_range
+from post_crawler import crawl_post
+import async_db
+from metrics import get_metrics
+from post_filter import get_post_filter
+from utils import date_strs_between
+
+
+FETCH_FETCHED = "fetched"
+FETCH_SKIPPED = "skipped"
+FETCH_FAILED = "failed"
+
+
+async def fetch_post_with_status(href, timeout=POST_FETCH_TIMEOUT_SECONDS, category=None) -> Tuple[str, Optional[Dict]]:
+    """Fetch and parse one post, reporting failures and empty posts per URL.
+
+    Returns:
+        Tuple[str, Optional[Dict]]: The fetch status ("fetched", "skipped" for
+        posts without comments, or "failed") and, when fetched,
+        {"url": href, "data": post_data}
+    """
+    print(f"Fetching data for post: {href}")
+    try:
+        # Call the post_crawler to get post data
+        post_data = await asyncio.wait_for(crawl_post(href, category), timeout=timeout)
+        if not post_data:
+            print(f"Failed to fetch data for: {href}")
+        elif len(post_data["comments"]) == 0:
+            print(f"Skipping empty post: {href}")
+            return FETCH_SKIPPED, None
+        else:
+            return FETCH_FETCHED, {
+                "url": href,
+                "data": post_data
+            }
+    except asyncio.TimeoutError:
+        print(f"Timed out fetching data for {href} after {timeout}s")
+    except Exception as e:
+        print(f"Error fetching data for {href}: {e}")
+    return FETCH_FAILED, None
+
+
+async def fetch_post(href, timeout=POST_FETCH_TIMEOUT_SECONDS, category=None) -> Optional[Dict]:
+    """Fetch one post; returns None if it failed, timed out or has no comments."""
+    _, post = await fetch_post_with_status(href, timeout, category)
+    return post
+
+
+async def write_batch(batch, category) -> Tuple[List[str], List[str]]:
+    """Insert a batch of (date_str, post) pairs, grouped by date_str.
+
+    Returns:
+        Tuple[List[str], List[str]]: URLs that were written and URLs that failed
+    """
+    posts_by_date = {}
+    for date_str, post in batch:
+        posts_by_date.setdefault(date_str, []).append(post)
+
+    metrics = get_metrics()
+    written_urls, failed_urls = [], []
+    for date_str, posts in posts_by_date.items():
+        with metrics.timer("db_write"):
+            _, date_failed_urls = await async_db.insert_posts(posts, category, date_str)
+        for url in date_failed_urls:
+            print(f"Failed to insert post: {url}")
+        failed_urls.extend(date_failed_urls)
+        written_urls.extend(post["url"] for post in posts if post["url"] not in date_failed_urls)
+    metrics.inc("posts_stored", len(written_urls))
+    metrics.inc("posts_write_failed", len(failed_urls))
+    print(f"Successfully inserted {len(written_urls)} out of {len(batch)} posts")
+    return written_urls, failed_urls
+
+
+async def run_pipeline(category, start_date_str, end_date_str,
+                       max_concurrency=MAX_CONCURRENT_POST_FETCHES,
+                       post_timeout=POST_FETCH_TIMEOUT_SECONDS,
+                       index_concurrency=MAX_CONCURRENT_INDEX_FETCHES,
+                       queue_size=PIPELINE_QUEUE_SIZE,
+                       write_batch_size=PIPELINE_WRITE_BATCH_SIZE,
+                       flush_interval=PIPELINE_FLUSH_INTERVAL_SECONDS,
+                       journal=None, resume=False, seen_urls=None) -> Dict:
+    """Stream the posts of a date range from the index into the storage sinks.
+
+    If a crawl journal is given, discovered URLs and their fetch/write status
+    are recorded in it. With resume=True the latest unfinished run for the
+    same category and dates is continued: its unwritten posts are queued
+    first and the index is only rescanned if the earlier scan did not finish.
+
+    If a seen-set (seen_urls.SeenUrlSet) is given it is consulted instead of
+    the storage before queueing a post, and every post written or found
+    empty is added to it. Empty posts are recorded as known URLs either way.
+
+    Returns:
+        Dict: "posts" maps each date string to the hrefs found on the index,
+        "stats" counts discovered, skipped, fetched and stored posts,
+        "index_complete" tells whether the index scan ran to the end,
+        "failed_dates" holds the dates with a post that failed to fetch or store
+        and "filtered_dates" the dates the post filter withheld a post from
+    """
+    fetch_queue = asyncio.Queue(maxsize=queue_size)
+    write_queue = asyncio.Queue(maxsize=queue_size)
+    worker_count = max(1, max_concurrency)
+    discovered: Dict[str, List[str]] = {}
+    stats = {"discovered": 0, "skipped_existing": 0, "fetched": 0, "stored": 0}
+    metrics = get_metrics()
+    failed_dates = set()
+    filtered_dates = set()
+    empty_posts = []
+
+    run_id = None
+    index_complete = False
+    resumed_posts = []
+    if journal is not None:
+        run = journal.find_unfinished_run(category, start_date_str, end_date_str) if resume else None
+        if run is not None:
+            run_id = run["run_id"]
+            index_complete = run["index_complete"]
+            resumed_posts = journal.unfinished_urls(run_id)
+            journal.reopen_run(run_id)
+            print(f"Resuming run {run_id}: {len(resumed_posts)} unfinished posts"
+                  f"{'' if index_complete else ', index scan not finished'}")
+        else:
+            run_id = journal.start_run(category, start_date_str, end_date_str)
+
+    async def queue_posts(posts):
+        # Posts that are already stored (or known to be empty) never need to be fetched again
+        if seen_urls is not None:
+            existing_urls = {href for _, href in posts if href in seen_urls}
+        else:
+            existing_urls = await async_db.read_existing_post_urls([href for _, href in posts])
+        if existing_urls:
+            print(f"Skipping {len(existing_urls)} posts already stored or known")
+            if journal is not None:
+                journal.mark_written(run_id, list(existing_urls))
+
+        for date_str, href in posts:
+            discovered.setdefault(date_str, []).append(href)
+            stats["discovered"] += 1
+            metrics.inc("posts_discovered")
+            if href in existing_urls:
+                stats["skipped_existing"] += 1
+                metrics.inc("posts_skipped_existing")
+            else:
+                await fetch_queue.put((date_str, href))
+
+    async def produce():
+        nonlocal index_complete
+        if resumed_posts:
+            await queue_posts(resumed_posts)
+        if index_complete:
+            # Which dates the earlier scan filtered is not journaled
+            if get_post_filter().active:
+                filtered_dates.update(date_strs_between(start_date_str, end_date_str))
+            return
+
+        try:
+            async for page_num, page_posts in iter_date_range(category, start_date_str, end_date_str,
+                                                              index_concurrency, filtered_dates=filtered_dates):
+                posts = [(date_str, href) for date_str, href_list in page_posts.items() for href in href_list]
+                if journal is not None:
+                    # Only URLs this run has not journaled yet (resumed ones are already queued)
+                    posts = journal.record_discovered(run_id, posts)
+                await queue_posts(posts)
+        except DateOutOfReachError as e:
+            # The posts found so far are still fetched, but the scan is not complete
+            print(f"Index scan incomplete: {e}")
+            metrics.inc("index_out_of_reach")
+            return
+
+        index_complete = True
+        if journal is not None:
+            journal.mark_index_complete(run_id)
+
+    async def fetch_worker():
+        while True:
+            item = await fetch_queue.get()
+            if item is None:
+                return
+            date_str, href = item
+            status, post = await fetch_post_with_status(href, post_timeout, category)
+            if journal is not None:
+                journal.mark_fetch(run_id, href, status)
+            metrics.inc(f"posts_{status}")
+            if status == FETCH_SKIPPED:
+                empty_posts.append((date_str, href))
+            elif status == FETCH_FAILED:
+                failed_dates.add(date_str)
+            if post is not None:
+                stats["fetched"] += 1
+                await write_queue.put((date_str, post))
+
+    async def flush(batch):
+        try:
+            written_urls, failed_urls = await write_batch(batch, category)
+        except Exception as e:
+            print(f"Error writing a batch of {len(batch)} posts: {e}")
+            metrics.inc("posts_write_failed", len(batch))
+            written_urls, failed_urls = [], [post["url"] for _, post in batch]
+        stats["stored"] += len(written_urls)
+        if seen_urls is not None:
+            seen_urls.update(written_urls)
+        if failed_urls:
+            failed_dates.update(date_str for date_str, post in batch if post["url"] in failed_urls)
+        if journal is not None:
+            journal.mark_written(run_id, written_urls)
+            journal.mark_written(run_id, failed_urls, "failed")
+
+    async def write():
+        loop = asyncio.get_running_loop()
+        batch = []
+        batch_started = 0.0
+        finished = False
+        while not finished:
+            try:
+                item = await asyncio.wait_for(write_queue.get(), timeout=flush_interval)
+                if item is None:
+                    finished = True
+                else:
+                    if not batch:
+                        batch_started = loop.time()
+                    batch.append(item)
+            except asyncio.TimeoutError:
+                pass
+            # Flush full batches, and partial ones once they are flush_interval old
+            if batch and (finished or len(batch) >= write_batch_size
+                          or loop.time() - batch_started >= flush_interval):
+                await flush(batch)
+                batch = []
+
+    writer = asyncio.create_task(write())
+    workers = [asyncio.create_task(fetch_worker()) for _ in range(worker_count)]
+    async def fetch_all():
+        await produce()
+        for _ in workers:
+            await fetch_queue.put(None)
+        await asyncio.gather(*workers)
+
+    fetcher = asyncio.create_task(fetch_all())
+    try:
+        # The writer only finishes early by failing; without this watch the
+        # workers would block on a full write queue forever
+        await asyncio.wait([fetcher, writer], return_when=asyncio.FIRST_COMPLETED)
+        if writer.done():
+            writer.result()
+            raise RuntimeError("Post writer stopped before the fetch finished")
+        await fetcher
+    finally:
+        for task in [fetcher] + workers:
+            task.cancel()
+        await asyncio.gather(fetcher, *workers, return_exceptions=True)
+        # Whatever was fetched before a failure still gets written
+        if not writer.done():
+            # A full queue is drained by the writer; stop waiting if the writer dies instead
+            sentinel = asyncio.ensure_future(write_queue.put(None))
+            await asyncio.wait([sentinel, writer], return_when=asyncio.FIRST_COMPLETED)
+            sentinel.cancel()
+        await writer
+        if empty_posts:
+            if await async_db.record_known_urls(empty_posts, category, FETCH_SKIPPED):
+                if seen_urls is not None:
+                    seen_urls.update(href for _, href in empty_posts)
+            else:
+                failed_dates.update(date_str for date_str, _ in empty_posts)
+        if journal is not None:
+            journal.finish_run(run_id)
+
+    print(f"Pipeline finished: {stats['discovered']} discovered, "
+          f"{stats['skipped_existing']} already stored, {stats['fetched']} fetched, "
+          f"{stats['stored']} stored")
+    return {
+        "posts": {date_str: discovered[date_str] for date_str in sorted(discovered, reverse=True)},
+        "stats": stats,
+        "index_complete": index_complete,
+        "failed_dates": failed_dates,
+        "filtered_dates": filtered_dates,
+    }
@@ -1,35 +1,30 @@
-from crawl4ai import AsyncWebCrawler
-from bs4 import BeautifulSoup
+from categories import get_category
+from constants import (POST_REQUIRED_SELECTORS, POST_TITLE_SELECTOR, POST_CONTENT_SELECTOR,
+                       POST_COMMENT_SELECTOR, PAGE_KIND_POST)
+from post_extractor import extract_post
+from utils import fetch_page_content
+from metrics import get_metrics
+from parse_pool import run_parse
 
-async def crawl_post(post_url: str):
-    async with AsyncWebCrawler() as crawler:
-        # Perform the crawl
-        result = await crawler.arun(
-            url=post_url
-        )
+async def crawl_post(post_url: str, category=None):
+    # Pages must contain the category's post selectors to skip the browser fallback
+    if category:
+        category_config = get_category(category)
+        required_selectors = category_config["post_selectors"]
+        parse_selectors = (category_config["post_title_selector"], category_config["post_content_selector"],
+                           category_config["post_comment_selector"])
+    else:
+        required_selectors = POST_REQUIRED_SELECTORS
+        parse_selectors = (POST_TITLE_SELECTOR, POST_CONTENT_SELECTOR, POST_COMMENT_SELECTOR)
+    
+    # Perform the crawl
+    html = await fetch_page_content(post_url, required_selectors, PAGE_KIND_POST)
+    
+    if html:
+        print(f"Successfully crawled: {post_url}")
         
-        if result.success:
-            print(f"Successfully crawled: {result.url}")
-            
-            # Using BeautifulSoup for robust extraction of WXC structure
-            soup = BeautifulSoup(result.html, 'html.parser')
-            
-            # Extract main post content and title
-            title_el = soup.select_one('h1.title')
-            post_title = title_el.get_text(strip=True) if title_el else ""
-            
-            content_el = soup.select_one('#msgbodyContent')
-            post_content = content_el.get_text(strip=True) if content_el else ""
-            
-            # Extract all comment titles from the thread container
-            comment_els = soup.select('#comment a.post')
-            comment_titles = [el.get_text(strip=True) for el in comment_els]
-            
-            # Format the final data structure
-            return {
-                "post_title": post_title,
-                "post_content": post_content,
-                "comments": comment_titles,
-            } 
-        else:
-            print(f"Failed to crawl: {result.url}")
+        # Extract the title, body and comment titles off the event loop
+        with get_metrics().timer("parse_post"):
+            return await run_parse(extract_post, html, *parse_selectors)
+    else:
+        print(f"Failed to crawl: {post_url}")
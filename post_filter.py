@@ -0,0 +1,107 @@
+"""
+Pre-fetch filter over index row metadata.
+
+Thread pages are the most expensive requests of a crawl, and the index rows
+already show each thread's reply count, body size and title. PostFilter
+drops rows that cannot be worth fetching before any thread page is
+requested: threads with too few replies (posts without comments are never
+stored anyway), bodies below a byte size, and titles that miss the include
+keywords or hit an exclude keyword.
+
+A row whose reply count or size is not shown on the index is kept, so a
+change in the index layout never silently drops posts.
+"""
+
+from typing import Dict, Iterable, Optional
+
+from constants import (POST_FILTER_MIN_REPLIES, POST_FILTER_MIN_BYTES,
+                       POST_FILTER_TITLE_INCLUDE, POST_FILTER_TITLE_EXCLUDE)
+
+
+class PostFilter:
+    """Decide from an index row (see index_crawler.extract_index_rows) whether to fetch its thread."""
+
+    def __init__(self, min_replies: int = POST_FILTER_MIN_REPLIES, min_bytes: int = POST_FILTER_MIN_BYTES,
+                 title_include: Iterable[str] = POST_FILTER_TITLE_INCLUDE,
+                 title_exclude: Iterable[str] = POST_FILTER_TITLE_EXCLUDE):
+        self.min_replies = min_replies
+        self.min_bytes = min_bytes
+        self.title_include = [keyword.lower() for keyword in title_include if keyword]
+        self.title_exclude = [keyword.lower() for keyword in title_exclude if keyword]
+
+    @property
+    def active(self) -> bool:
+        return bool(self.min_replies > 0 or self.min_bytes > 0 or self.title_include or self.title_exclude)
+
+    def reject_reason(self, row: Dict) -> Optional[str]:
+        """Return why the row's thread should not be fetched, or None to fetch it."""
+        reply_count = row.get("reply_count")
+        if reply_count is not None and reply_count < self.min_replies:
+            return "replies"
+        byte_size = row.get("byte_size")
+        if byte_size is not None and byte_size < self.min_bytes:
+            return "size"
+        title = (row.get("title") or "").lower()
+        if self.title_include and not any(keyword in title for keyword in self.title_include):
+            return "title"
+        if any(keyword in title for keyword in self.title_exclude):
+            return "title"
+        return None
+
+    def accepts(self, row: Dict) -> bool:
+        return self.reject_reason(row) is None
+
+    def withholds(self, row: Dict) -> bool:
+        """Whether rejecting the row keeps back a post an unfiltered crawl would store.
+
+        Threads without any reply are never stored anyway, so dropping them
+        leaves their date as complete as an unfiltered crawl would.
+        """
+        reason = self.reject_reason(row)
+        return reason is not None and not (reason == "replies" and row.get("reply_count") == 0)
+
+    def title_only(self) -> "PostFilter":
+        """Return a filter with only this filter's title keywords.
+
+        Used on rows recorded earlier, whose reply count and size may have
+        grown since they were read from the index.
+        """
+        return PostFilter(0, 0, self.title_include, self.title_exclude)
+
+    def describe(self) -> str:
+        parts = []
+        if self.min_replies > 0:
+            parts.append(f"at least {self.min_replies} replies")
+        if self.min_bytes > 0:
+            parts.append(f"at least {self.min_bytes} bytes")
+        if self.title_include:
+            parts.append(f"title containing one of {self.title_include}")
+        if self.title_exclude:
+            parts.append(f"title without {self.title_exclude}")
+        return ", ".join(parts) or "no filter"
+
+
+_post_filter: Optional[PostFilter] = None
+
+
+def init_post_filter(min_replies: int = POST_FILTER_MIN_REPLIES, min_bytes: int = POST_FILTER_MIN_BYTES,
+                     title_include: Iterable[str] = POST_FILTER_TITLE_INCLUDE,
+                     title_exclude: Iterable[str] = POST_FILTER_TITLE_EXCLUDE) -> PostFilter:
+    """Create the process-wide post filter."""
+    global _post_filter
+    _post_filter = PostFilter(min_replies, min_bytes, title_include, title_exclude)
+    print(f"Fetching only posts with {_post_filter.describe()}")
+    return _post_filter
+
+
+def get_post_filter() -> PostFilter:
+    """Return the process-wide post filter, creating one from the defaults if needed."""
+    global _post_filter
+    if _post_filter is None:
+        _post_filter = PostFilter()
+    return _post_filter
+
+
+def parse_keywords(value: Optional[str]) -> list:
+    """Split a comma-separated keyword list from the command line."""
+    return [keyword.strip() for keyword in (value or "").split(",") if keyword.strip()]
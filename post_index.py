@@ -0,0 +1,148 @@
+"""
+Persistent local index of the posts seen on each board's index pages.
+
+Every index page the crawler parses is recorded here (category, date, URL,
+title, reply count, body size, author, first/last seen time), and every scan that ran
+contiguously across a date marks that date as complete. Once all dates of
+a requested range are complete, "which posts exist for these dates" is a
+local lookup (see page_locator.iter_date_range) and only ranges that touch
+dates not yet indexed, such as today, need a network scan.
+
+A date is complete when a scan saw the pages on both sides of it: a page
+whose newest row is older than the date, and either the first page of the
+board or a page holding a newer date. Today is never complete, since new
+posts can still appear on it.
+"""
+
+import os
+import sqlite3
+import time
+from typing import Dict, Iterable, List, Optional, Set
+
+from constants import POST_INDEX_PATH
+
+
+class PostIndex:
+    """SQLite-backed URL -> date index with per-date completeness."""
+
+    def __init__(self, path: str = POST_INDEX_PATH, refresh: bool = False):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # refresh keeps recording scans but never answers from the index
+        self.refresh = refresh
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS posts (
+                url TEXT PRIMARY KEY,
+                category TEXT NOT NULL,
+                date_str TEXT NOT NULL,
+                title TEXT,
+                reply_count INTEGER,
+                byte_size INTEGER,
+                author TEXT,
+                first_seen REAL NOT NULL,
+                last_seen REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS posts_by_date ON posts (category, date_str);
+            CREATE TABLE IF NOT EXISTS complete_dates (
+                category TEXT NOT NULL,
+                date_str TEXT NOT NULL,
+                completed_at REAL NOT NULL,
+                PRIMARY KEY (category, date_str)
+            );
+        """)
+        # Indexes created before body sizes were parsed lack the column
+        columns = {row[1] for row in self.db.execute("PRAGMA table_info(posts)")}
+        if "byte_size" not in columns:
+            self.db.execute("ALTER TABLE posts ADD COLUMN byte_size INTEGER")
+        self.db.commit()
+
+    @property
+    def readable(self) -> bool:
+        return not self.refresh
+
+    def record_rows(self, category: str, rows: List[Dict]):
+        """Insert or refresh the rows parsed from one index page."""
+        now = time.time()
+        self.db.executemany("""
+            INSERT INTO posts (url, category, date_str, title, reply_count, byte_size, author, first_seen, last_seen)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(url) DO UPDATE SET
+                title = excluded.title,
+                reply_count = excluded.reply_count,
+                byte_size = excluded.byte_size,
+                author = excluded.author,
+                last_seen = excluded.last_seen
+        """, [(row["url"], category, row["date_str"], row["title"], row["reply_count"], row.get("byte_size"),
+               row["author"], now, now)
+              for row in rows if row["url"] and row["date_str"]])
+        self.db.commit()
+
+    def mark_complete(self, category: str, date_strs: Iterable[str]):
+        now = time.time()
+        self.db.executemany(
+            "INSERT OR REPLACE INTO complete_dates (category, date_str, completed_at) VALUES (?, ?, ?)",
+            [(category, date_str, now) for date_str in date_strs])
+        self.db.commit()
+
+    def complete_dates(self, category: str, start_date_str: str, end_date_str: str) -> set:
+        rows = self.db.execute(
+            "SELECT date_str FROM complete_dates WHERE category = ? AND date_str BETWEEN ? AND ?",
+            (category, start_date_str, end_date_str)).fetchall()
+        return {row[0] for row in rows}
+
+    def newest_complete_date(self, category: str) -> Optional[str]:
+        row = self.db.execute("SELECT MAX(date_str) FROM complete_dates WHERE category = ?",
+                              (category,)).fetchone()
+        return row[0]
+
+    def posts_by_date(self, category: str, start_date_str: str, end_date_str: str,
+                      post_filter=None, filtered_dates: Optional[Set[str]] = None) -> Dict[str, List[str]]:
+        """Map each date in the range (newest first) to its post URLs, in the order first recorded.
+
+        Posts rejected by post_filter (see post_filter.PostFilter) are left
+        out, and their dates added to filtered_dates as in
+        index_crawler.group_rows_by_date.
+        """
+        rows = self.db.execute(
+            "SELECT date_str, url, title, reply_count, byte_size FROM posts "
+            "WHERE category = ? AND date_str BETWEEN ? AND ? ORDER BY date_str DESC, rowid",
+            (category, start_date_str, end_date_str)).fetchall()
+        posts = {}
+        for date_str, url, title, reply_count, byte_size in rows:
+            href_list = posts.setdefault(date_str, [])
+            row = {"title": title, "reply_count": reply_count, "byte_size": byte_size}
+            if post_filter is None or post_filter.accepts(row):
+                href_list.append(url)
+            elif filtered_dates is not None and post_filter.withholds(row):
+                filtered_dates.add(date_str)
+        return posts
+
+    def close(self):
+        self.db.close()
+
+
+_post_index: Optional[PostIndex] = None
+
+
+def init_post_index(path: str = POST_INDEX_PATH, refresh: bool = False) -> PostIndex:
+    """Open the process-wide post index."""
+    global _post_index
+    _post_index = PostIndex(path, refresh)
+    return _post_index
+
+
+def get_post_index() -> Optional[PostIndex]:
+    """Return the process-wide post index, or None if it is not open."""
+    return _post_index
+
+
+def close_post_index():
+    """Close the process-wide post index if one was opened."""
+    global _post_index
+    if _post_index is not None:
+        post_index, _post_index = _post_index, None
+        post_index.close()
@@ -0,0 +1,222 @@
+"""
+Persistent on-disk cache of fetched pages.
+
+Bodies are stored gzip-compressed under the SHA-256 of their content, so
+identical pages are only kept once, and a small SQLite index maps each URL
+to its body, HTTP validators and timestamps. Index pages and post pages get
+separate TTLs; once an entry is stale it is revalidated with
+If-None-Match/If-Modified-Since instead of being downloaded again. The
+total size is capped and the least recently used entries are evicted; the
+size is kept as a running total, so a put only scans the index when the cap
+is crossed. put compresses and writes the page, so callers on the event loop
+run it on a thread (see utils.fetch_page_content); the index is shared
+between threads under a lock.
+
+Cache modes:
+- "use": serve fresh entries, revalidate stale ones and store new pages.
+- "refresh": always download pages again, overwriting the cache.
+- "bypass": neither read nor write the cache.
+"""
+
+import gzip
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+from constants import (CACHE_DIR, CACHE_MAX_BYTES, CACHE_MODE, CACHE_INDEX_TTL_SECONDS,
+                       CACHE_POST_TTL_SECONDS, PAGE_KIND_INDEX, PAGE_KIND_POST)
+
+CACHE_MODE_USE = "use"
+CACHE_MODE_REFRESH = "refresh"
+CACHE_MODE_BYPASS = "bypass"
+CACHE_MODES = (CACHE_MODE_USE, CACHE_MODE_REFRESH, CACHE_MODE_BYPASS)
+
+PAGE_KIND_TTLS = {
+    PAGE_KIND_INDEX: CACHE_INDEX_TTL_SECONDS,
+    PAGE_KIND_POST: CACHE_POST_TTL_SECONDS,
+}
+
+
+class ResponseCache:
+    """Content-addressed, compressed page cache with an LRU size cap."""
+
+    def __init__(self, cache_dir: str = CACHE_DIR, max_bytes: int = CACHE_MAX_BYTES,
+                 mode: str = CACHE_MODE):
+        if mode not in CACHE_MODES:
+            raise ValueError(f"Unknown cache mode '{mode}', expected one of {CACHE_MODES}")
+        self.cache_dir = cache_dir
+        self.blob_dir = os.path.join(cache_dir, "blobs")
+        self.max_bytes = max_bytes
+        self.mode = mode
+        os.makedirs(self.blob_dir, exist_ok=True)
+
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(os.path.join(cache_dir, "index.sqlite"), check_same_thread=False)
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                url TEXT PRIMARY KEY,
+                content_hash TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )""")
+        self.db.execute("CREATE INDEX IF NOT EXISTS idx_last_access ON entries (last_access)")
+        self.db.execute("CREATE INDEX IF NOT EXISTS idx_content_hash ON entries (content_hash)")
+        self.db.commit()
+        self.total = self.total_bytes()
+
+    @property
+    def readable(self) -> bool:
+        return self.mode == CACHE_MODE_USE
+
+    @property
+    def writable(self) -> bool:
+        return self.mode != CACHE_MODE_BYPASS
+
+    def _blob_path(self, content_hash: str) -> str:
+        return os.path.join(self.blob_dir, content_hash[:2], f"{content_hash}.gz")
+
+    def get(self, url: str) -> Optional[Dict]:
+        """Return the cached entry for url (including its html), or None."""
+        with self.lock:
+            row = self.db.execute(
+                "SELECT content_hash, etag, last_modified, fetched_at FROM entries WHERE url = ?",
+                (url,)).fetchone()
+        if row is None:
+            return None
+        content_hash, etag, last_modified, fetched_at = row
+        try:
+            with gzip.open(self._blob_path(content_hash), "rt", encoding="utf-8") as f:
+                html = f.read()
+        except OSError:
+            # The blob went missing; forget the entry so it is fetched again
+            with self.lock:
+                self.db.execute("DELETE FROM entries WHERE url = ?", (url,))
+                self.db.commit()
+                self.total = self.total_bytes()
+            return None
+        with self.lock:
+            self.db.execute("UPDATE entries SET last_access = ? WHERE url = ?", (time.time(), url))
+            self.db.commit()
+        return {
+            "html": html,
+            "etag": etag,
+            "last_modified": last_modified,
+            "fetched_at": fetched_at,
+        }
+
+    def is_fresh(self, entry: Dict, page_kind: str) -> bool:
+        """Check whether an entry is still within its page kind's TTL."""
+        return time.time() - entry["fetched_at"] < PAGE_KIND_TTLS.get(page_kind, 0)
+
+    def put(self, url: str, html: str, etag: Optional[str] = None,
+            last_modified: Optional[str] = None):
+        """Store a freshly fetched page and evict old entries if over the size cap.
+
+        Blocks on compression and disk writes; safe to call from any thread.
+        """
+        body = html.encode("utf-8")
+        content_hash = hashlib.sha256(body).hexdigest()
+        blob_path = self._blob_path(content_hash)
+        if not os.path.exists(blob_path):
+            os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+            tmp_path = f"{blob_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with gzip.open(tmp_path, "wb") as f:
+                f.write(body)
+            os.replace(tmp_path, blob_path)
+        size = os.path.getsize(blob_path)
+
+        with self.lock:
+            old = self.db.execute("SELECT content_hash FROM entries WHERE url = ?", (url,)).fetchone()
+            if not self._blob_in_use(content_hash):
+                self.total += size
+            now = time.time()
+            self.db.execute("""
+                INSERT OR REPLACE INTO entries
+                (url, content_hash, size, etag, last_modified, fetched_at, last_access)
+                VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                (url, content_hash, size, etag, last_modified, now, now))
+            self.db.commit()
+            if old and old[0] != content_hash:
+                self._remove_blob_if_unused(old[0])
+            if self.total > self.max_bytes:
+                self._evict()
+
+    def touch(self, url: str):
+        """Mark an entry as just revalidated (the server answered 304)."""
+        now = time.time()
+        with self.lock:
+            self.db.execute("UPDATE entries SET fetched_at = ?, last_access = ? WHERE url = ?",
+                            (now, now, url))
+            self.db.commit()
+
+    def total_bytes(self) -> int:
+        """Sum the size of every stored blob (put keeps this as a running total)."""
+        row = self.db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM "
+            "(SELECT content_hash, MAX(size) AS size FROM entries GROUP BY content_hash)").fetchone()
+        return row[0]
+
+    def evict(self):
+        """Drop least recently used entries until the cache fits in max_bytes."""
+        with self.lock:
+            if self.total > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        rows = self.db.execute(
+            "SELECT url, content_hash FROM entries ORDER BY last_access").fetchall()
+        for url, content_hash in rows:
+            if self.total <= self.max_bytes:
+                break
+            self.db.execute("DELETE FROM entries WHERE url = ?", (url,))
+            self._remove_blob_if_unused(content_hash)
+        self.db.commit()
+
+    def _blob_in_use(self, content_hash: str) -> bool:
+        return self.db.execute("SELECT 1 FROM entries WHERE content_hash = ? LIMIT 1",
+                               (content_hash,)).fetchone() is not None
+
+    def _remove_blob_if_unused(self, content_hash: str):
+        """Delete a blob no entry points to any more and take it off the running total."""
+        if self._blob_in_use(content_hash):
+            return
+        blob_path = self._blob_path(content_hash)
+        try:
+            self.total -= os.path.getsize(blob_path)
+            os.remove(blob_path)
+        except OSError:
+            pass
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
+
+_response_cache: Optional[ResponseCache] = None
+
+
+def init_response_cache(mode: str = CACHE_MODE, cache_dir: str = CACHE_DIR,
+                        max_bytes: int = CACHE_MAX_BYTES) -> ResponseCache:
+    """Open the process-wide response cache."""
+    global _response_cache
+    _response_cache = ResponseCache(cache_dir, max_bytes, mode)
+    return _response_cache
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """Return the process-wide response cache, or None if caching is not set up."""
+    return _response_cache
+
+
+def close_response_cache():
+    """Close the process-wide response cache if one was opened."""
+    global _response_cache
+    if _response_cache is not None:
+        cache, _response_cache = _response_cache, None
+        cache.close()
@@ -0,0 +1,59 @@
+"""
+In-memory set of post URLs the crawler has already handled.
+
+Loaded once at startup from wxc_posts and wxc_known_urls, the set is
+consulted before any post is fetched so overlapping or out-of-order date
+windows only fetch what is actually missing. URLs are kept as 8-byte
+BLAKE2b digests, which keeps millions of entries to a few tens of MB; a
+collision would only make the crawler skip one post.
+"""
+
+import hashlib
+from typing import Iterable, Optional
+
+from storage import get_storage
+
+
+def url_digest(url: str) -> bytes:
+    return hashlib.blake2b(url.encode("utf-8"), digest_size=8).digest()
+
+
+class SeenUrlSet:
+    """A hashed set of post URLs."""
+
+    def __init__(self, urls: Iterable[str] = ()):
+        self._digests = {url_digest(url) for url in urls}
+
+    def __contains__(self, url: str) -> bool:
+        return url_digest(url) in self._digests
+
+    def __len__(self) -> int:
+        return len(self._digests)
+
+    def add(self, url: str):
+        self._digests.add(url_digest(url))
+
+    def update(self, urls: Iterable[str]):
+        self._digests.update(url_digest(url) for url in urls)
+
+
+def load_seen_urls(category=None) -> SeenUrlSet:
+    """Build the seen-set from every stored or known post URL (optionally one category)."""
+    seen_urls = SeenUrlSet(get_storage().read_known_post_urls(category))
+    print(f"Loaded {len(seen_urls)} known post URLs{f' for {category}' if category else ''}")
+    return seen_urls
+
+
+_seen_urls: Optional[SeenUrlSet] = None
+
+
+def init_seen_urls(category=None) -> SeenUrlSet:
+    """Load the process-wide seen-set shared by every category crawled in this run."""
+    global _seen_urls
+    _seen_urls = load_seen_urls(category)
+    return _seen_urls
+
+
+def get_seen_urls() -> Optional[SeenUrlSet]:
+    """Return the process-wide seen-set, or None if it was not loaded."""
+    return _seen_urls
@@ -0,0 +1,487 @@
+"""
+Storage backends ("sinks") for crawled posts and crawl state.
+
+Every backend implements the same operations as mysql_writer:
+
+- "mysql": the wxc_posts, wxc_crawl_state and wxc_known_urls tables on the
+  MySQL server in constants.py (through mysql_writer)
+- "sqlite": the same three tables in a local SQLite file, so local runs and
+  tests need no server
+- "jsonl": an append-only newline-delimited JSON file of posts, one object
+  per line, written as batches arrive; a post fetched twice appears twice,
+  so readers keep the last line per post_url
+- "parquet": columnar Parquet files of posts for analytics (needs pyarrow),
+  one row group per write batch; a file is finalised when it reaches
+  PARQUET_ROWS_PER_FILE rows or the run ends
+
+A run can write to several sinks at once (StorageFanOut). Posts go to every
+sink, and a post only counts as stored if every sink accepted it. The
+lookups (already-stored URLs, complete dates) are answered by the first
+queryable sink, mysql or sqlite; jsonl and parquet are write-only exports.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+
+from constants import (STORAGE_SINKS, SQLITE_STORAGE_PATH, JSONL_STORAGE_PATH, PARQUET_STORAGE_DIR,
+                       PARQUET_ROWS_PER_FILE, WXC_POSTS_TABLE, WXC_CRAWL_STATE_TABLE,
+                       WXC_KNOWN_URLS_TABLE)
+import mysql_writer
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+STORAGE_SINK_NAMES = ("mysql", "sqlite", "jsonl", "parquet")
+
+
+def export_record(post_data, category, date_str=None) -> Dict:
+    """Build the record the file sinks write for one crawled post."""
+    comments = post_data.get('data', {}).get('comments') or []
+    return {
+        "date_str": date_str or "00000000",
+        "category": category,
+        "post_url": post_data.get('url', ''),
+        "post_title": post_data.get('data', {}).get('post_title', ''),
+        "post_body": post_data.get('data', {}).get('post_content', ''),
+        "comments": list(comments),
+        "num_comments": len(comments),
+        "crawled_at": datetime.now().isoformat(timespec="seconds"),
+    }
+
+
+class StorageBackend:
+    """Base class for sinks.
+
+    insert_posts returns (inserted count, failed URLs) like
+    mysql_writer.insert_posts_bulk. Write-only sinks accept the crawl-state
+    writes as no-ops and answer every lookup with nothing.
+    """
+
+    name = ""
+    queryable = False
+
+    def create_tables(self) -> bool:
+        return True
+
+    def insert_posts(self, post_data_list, category, date_str=None) -> Tuple[int, List[str]]:
+        raise NotImplementedError
+
+    def record_known_urls(self, known_urls, category, status) -> bool:
+        return True
+
+    def mark_dates_complete(self, category, post_counts) -> bool:
+        return True
+
+    def read_existing_post_urls(self, post_urls) -> Set[str]:
+        return set()
+
+    def read_known_post_urls(self, category=None) -> List[str]:
+        return []
+
+    def read_complete_dates(self, category, start_date_str, end_date_str) -> Set[str]:
+        return set()
+
+    def read_max_date_by_category(self, category) -> Optional[str]:
+        return None
+
+    def close(self):
+        pass
+
+
+class MySQLStorage(StorageBackend):
+    """The MySQL tables, through mysql_writer."""
+
+    name = "mysql"
+    queryable = True
+
+    def create_tables(self) -> bool:
+        posts_created = mysql_writer.create_wxc_posts_table()
+        state_created = mysql_writer.create_crawl_state_tables()
+        return bool(posts_created and state_created)
+
+    def insert_posts(self, post_data_list, category, date_str=None) -> Tuple[int, List[str]]:
+        return mysql_writer.insert_posts_bulk(post_data_list, category, date_str)
+
+    def record_known_urls(self, known_urls, category, status) -> bool:
+        return mysql_writer.record_known_urls(known_urls, category, status)
+
+    def mark_dates_complete(self, category, post_counts) -> bool:
+        return mysql_writer.mark_dates_complete(category, post_counts)
+
+    def read_existing_post_urls(self, post_urls) -> Set[str]:
+        return mysql_writer.read_existing_post_urls(post_urls)
+
+    def read_known_post_urls(self, category=None) -> List[str]:
+        return mysql_writer.read_known_post_urls(category)
+
+    def read_complete_dates(self, category, start_date_str, end_date_str) -> Set[str]:
+        return mysql_writer.read_complete_dates(category, start_date_str, end_date_str)
+
+    def read_max_date_by_category(self, category) -> Optional[str]:
+        return mysql_writer.read_max_date_by_category(category)
+
+
+class SQLiteStorage(StorageBackend):
+    """The MySQL schema in a local SQLite file (":memory:" for throwaway runs)."""
+
+    name = "sqlite"
+    queryable = True
+
+    def __init__(self, path: str = SQLITE_STORAGE_PATH):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        # Called from the async_db threads; the lock serialises them
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        if path != ":memory:":
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute("PRAGMA synchronous=NORMAL")
+
+    def create_tables(self) -> bool:
+        try:
+            with self.lock:
+                self.db.executescript(f"""
+                    CREATE TABLE IF NOT EXISTS {WXC_POSTS_TABLE} (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        date_str TEXT,
+                        category TEXT,
+                        post_url TEXT UNIQUE,
+                        post_title TEXT,
+                        post_body TEXT,
+                        comments TEXT,
+                        num_comments INTEGER DEFAULT 0,
+                        llm_summary TEXT,
+                        is_useful INTEGER DEFAULT 0,
+                        has_tts INTEGER DEFAULT 0,
+                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    );
+                    CREATE INDEX IF NOT EXISTS idx_category_date ON {WXC_POSTS_TABLE} (category, date_str);
+                    CREATE TABLE IF NOT EXISTS {WXC_CRAWL_STATE_TABLE} (
+                        category TEXT NOT NULL,
+                        date_str TEXT NOT NULL,
+                        is_complete INTEGER DEFAULT 0,
+                        post_count INTEGER DEFAULT 0,
+                        completed_at TIMESTAMP,
+                        PRIMARY KEY (category, date_str)
+                    );
+                    CREATE TABLE IF NOT EXISTS {WXC_KNOWN_URLS_TABLE} (
+                        post_url TEXT NOT NULL PRIMARY KEY,
+                        category TEXT,
+                        date_str TEXT,
+                        status TEXT,
+                        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    );
+                """)
+            return True
+        except sqlite3.Error as e:
+            print(f"Error creating SQLite tables: {e}")
+            return False
+
+    def insert_posts(self, post_data_list, category, date_str=None) -> Tuple[int, List[str]]:
+        rows = [mysql_writer.build_post_row(post_data, category, date_str) for post_data in post_data_list]
+        with self.lock:
+            try:
+                self.db.executemany(f"""
+                    INSERT INTO {WXC_POSTS_TABLE} (date_str, category, post_url, post_title, post_body,
+                        comments, num_comments, llm_summary, is_useful, has_tts)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(post_url) DO UPDATE SET
+                        post_title = excluded.post_title,
+                        post_body = excluded.post_body,
+                        comments = excluded.comments,
+                        num_comments = excluded.num_comments""", rows)
+                self.db.commit()
+                return len(rows), []
+            except sqlite3.Error as e:
+                print(f"Error inserting posts into SQLite: {e}")
+                self.db.rollback()
+                return 0, [post_data.get('url', '') for post_data in post_data_list]
+
+    def record_known_urls(self, known_urls, category, status) -> bool:
+        try:
+            with self.lock:
+                self.db.executemany(f"""
+                    INSERT INTO {WXC_KNOWN_URLS_TABLE} (post_url, category, date_str, status)
+                    VALUES (?, ?, ?, ?)
+                    ON CONFLICT(post_url) DO UPDATE SET status = excluded.status,
+                        updated_at = CURRENT_TIMESTAMP""",
+                    [(post_url, category, date_str, status) for date_str, post_url in known_urls])
+                self.db.commit()
+            return True
+        except sqlite3.Error as e:
+            print(f"Error recording known urls in SQLite: {e}")
+            return False
+
+    def mark_dates_complete(self, category, post_counts) -> bool:
+        try:
+            with self.lock:
+                self.db.executemany(f"""
+                    INSERT INTO {WXC_CRAWL_STATE_TABLE} (category, date_str, is_complete, post_count, completed_at)
+                    VALUES (?, ?, 1, ?, CURRENT_TIMESTAMP)
+                    ON CONFLICT(category, date_str) DO UPDATE SET is_complete = 1,
+                        post_count = MAX(post_count, excluded.post_count),
+                        completed_at = CURRENT_TIMESTAMP""",
+                    [(category, date_str, count) for date_str, count in post_counts.items()])
+                self.db.commit()
+            return True
+        except sqlite3.Error as e:
+            print(f"Error marking dates complete in SQLite: {e}")
+            return False
+
+    def _query(self, query: str, params=()) -> List[tuple]:
+        with self.lock:
+            return self.db.execute(query, params).fetchall()
+
+    def read_existing_post_urls(self, post_urls) -> Set[str]:
+        post_urls = list(post_urls)
+        existing = set()
+        # Stay well below SQLite's bound-parameter limit
+        for start in range(0, len(post_urls), 500):
+            chunk = post_urls[start:start + 500]
+            placeholders = ", ".join("?" * len(chunk))
+            existing.update(row[0] for row in self._query(
+                f"SELECT post_url FROM {WXC_POSTS_TABLE} WHERE post_url IN ({placeholders})", chunk))
+        return existing
+
+    def read_known_post_urls(self, category=None) -> List[str]:
+        where = "WHERE category = ?" if category else ""
+        params = (category, category) if category else ()
+        return [row[0] for row in self._query(
+            f"SELECT post_url FROM {WXC_POSTS_TABLE} {where} "
+            f"UNION SELECT post_url FROM {WXC_KNOWN_URLS_TABLE} {where}", params)]
+
+    def read_complete_dates(self, category, start_date_str, end_date_str) -> Set[str]:
+        return {row[0] for row in self._query(
+            f"SELECT date_str FROM {WXC_CRAWL_STATE_TABLE} "
+            "WHERE category = ? AND date_str BETWEEN ? AND ? AND is_complete = 1",
+            (category, start_date_str, end_date_str))}
+
+    def read_max_date_by_category(self, category) -> Optional[str]:
+        return self._query(f"SELECT MAX(date_str) FROM {WXC_POSTS_TABLE} WHERE category = ?",
+                           (category,))[0][0]
+
+    def count_posts(self) -> int:
+        return self._query(f"SELECT COUNT(*) FROM {WXC_POSTS_TABLE}")[0][0]
+
+    def close(self):
+        self.db.close()
+
+
+class JsonlStorage(StorageBackend):
+    """Append-only newline-delimited JSON file of posts."""
+
+    name = "jsonl"
+
+    def __init__(self, path: str = JSONL_STORAGE_PATH):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.lock = threading.Lock()
+        self.file = open(path, "a", encoding="utf-8")
+
+    def insert_posts(self, post_data_list, category, date_str=None) -> Tuple[int, List[str]]:
+        lines = "".join(json.dumps(export_record(post_data, category, date_str), ensure_ascii=False) + "\n"
+                        for post_data in post_data_list)
+        try:
+            with self.lock:
+                self.file.write(lines)
+                self.file.flush()
+            return len(post_data_list), []
+        except OSError as e:
+            print(f"Error appending posts to {self.path}: {e}")
+            return 0, [post_data.get('url', '') for post_data in post_data_list]
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetStorage(StorageBackend):
+    """Parquet files of posts under a directory, one row group per write batch."""
+
+    name = "parquet"
+
+    def __init__(self, directory: str = PARQUET_STORAGE_DIR, rows_per_file: int = PARQUET_ROWS_PER_FILE):
+        if not PYARROW_AVAILABLE:
+            raise RuntimeError("The parquet sink needs pyarrow (pip install pyarrow)")
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.rows_per_file = max(1, rows_per_file)
+        self.lock = threading.Lock()
+        self.schema = pyarrow.schema([
+            ("date_str", pyarrow.string()),
+            ("category", pyarrow.string()),
+            ("post_url", pyarrow.string()),
+            ("post_title", pyarrow.string()),
+            ("post_body", pyarrow.string()),
+            ("comments", pyarrow.list_(pyarrow.string())),
+            ("num_comments", pyarrow.int32()),
+            ("crawled_at", pyarrow.string()),
+        ])
+        self.writer = None
+        self.file_rows = 0
+        self.file_count = 0
+        self.run_stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+
+    def _open_writer(self):
+        self.file_count += 1
+        path = os.path.join(self.directory, f"posts-{self.run_stamp}-{os.getpid()}-{self.file_count:04d}.parquet")
+        self.writer = pyarrow.parquet.ParquetWriter(path, self.schema, compression="zstd")
+        self.file_rows = 0
+        print(f"Writing posts to {path}")
+
+    def _close_writer(self):
+        if self.writer is not None:
+            writer, self.writer = self.writer, None
+            writer.close()
+
+    def insert_posts(self, post_data_list, category, date_str=None) -> Tuple[int, List[str]]:
+        records = [export_record(post_data, category, date_str) for post_data in post_data_list]
+        if not records:
+            return 0, []
+        try:
+            table = pyarrow.Table.from_pylist(records, schema=self.schema)
+            with self.lock:
+                if self.writer is None:
+                    self._open_writer()
+                self.writer.write_table(table)
+                self.file_rows += len(records)
+                if self.file_rows >= self.rows_per_file:
+                    self._close_writer()
+            return len(records), []
+        except (OSError, pyarrow.ArrowException) as e:
+            print(f"Error writing posts to Parquet: {e}")
+            return 0, [record["post_url"] for record in records]
+
+    def close(self):
+        with self.lock:
+            self._close_writer()
+
+
+class StorageFanOut(StorageBackend):
+    """Write to several sinks; answer lookups from the first queryable one."""
+
+    name = "fanout"
+
+    def __init__(self, backends: List[StorageBackend]):
+        self.backends = backends
+        self.primary = next((backend for backend in backends if backend.queryable), None)
+        self.queryable = self.primary is not None
+
+    @property
+    def names(self) -> List[str]:
+        return [backend.name for backend in self.backends]
+
+    def create_tables(self) -> bool:
+        return all([backend.create_tables() for backend in self.backends])
+
+    def insert_posts(self, post_data_list, category, date_str=None) -> Tuple[int, List[str]]:
+        failed_urls = []
+        for backend in self.backends:
+            _, backend_failed_urls = backend.insert_posts(post_data_list, category, date_str)
+            if backend_failed_urls:
+                print(f"{len(backend_failed_urls)} posts failed to write to the {backend.name} sink")
+            failed_urls.extend(url for url in backend_failed_urls if url not in failed_urls)
+        return len(post_data_list) - len(failed_urls), failed_urls
+
+    def record_known_urls(self, known_urls, category, status) -> bool:
+        if not known_urls:
+            return True
+        return all([backend.record_known_urls(known_urls, category, status) for backend in self.backends])
+
+    def mark_dates_complete(self, category, post_counts) -> bool:
+        if not post_counts:
+            return True
+        return all([backend.mark_dates_complete(category, post_counts) for backend in self.backends])
+
+    def read_existing_post_urls(self, post_urls) -> Set[str]:
+        return self.primary.read_existing_post_urls(post_urls) if self.primary else set()
+
+    def read_known_post_urls(self, category=None) -> List[str]:
+        return self.primary.read_known_post_urls(category) if self.primary else []
+
+    def read_complete_dates(self, category, start_date_str, end_date_str) -> Set[str]:
+        return self.primary.read_complete_dates(category, start_date_str, end_date_str) if self.primary else set()
+
+    def read_max_date_by_category(self, category) -> Optional[str]:
+        return self.primary.read_max_date_by_category(category) if self.primary else None
+
+    def close(self):
+        for backend in self.backends:
+            try:
+                backend.close()
+            except Exception as e:
+                print(f"Error closing the {backend.name} sink: {e}")
+
+
+def create_backend(name: str, sqlite_path: str = SQLITE_STORAGE_PATH, jsonl_path: str = JSONL_STORAGE_PATH,
+                   parquet_dir: str = PARQUET_STORAGE_DIR) -> StorageBackend:
+    """Create one sink by name, raising ValueError if it is unknown."""
+    if name == "mysql":
+        return MySQLStorage()
+    if name == "sqlite":
+        return SQLiteStorage(sqlite_path)
+    if name == "jsonl":
+        return JsonlStorage(jsonl_path)
+    if name == "parquet":
+        return ParquetStorage(parquet_dir)
+    raise ValueError(f"Unknown storage sink '{name}', expected one of {STORAGE_SINK_NAMES}")
+
+
+_storage: Optional[StorageFanOut] = None
+
+
+def init_storage(sinks: List[str] = STORAGE_SINKS, sqlite_path: str = SQLITE_STORAGE_PATH,
+                 jsonl_path: str = JSONL_STORAGE_PATH, parquet_dir: str = PARQUET_STORAGE_DIR) -> StorageFanOut:
+    """Open the process-wide storage, writing to every sink in sinks."""
+    global _storage
+    backends = [create_backend(name, sqlite_path, jsonl_path, parquet_dir) for name in dict.fromkeys(sinks)]
+    _storage = StorageFanOut(backends)
+    print(f"Storing posts in: {', '.join(_storage.names)}")
+    if not _storage.queryable:
+        print("No mysql or sqlite sink; stored posts and complete dates cannot be looked up, "
+              "so every post in range is fetched again")
+    return _storage
+
+
+def get_storage() -> StorageFanOut:
+    """Return the process-wide storage, opening the default sinks if needed."""
+    if _storage is None:
+        return init_storage()
+    return _storage
+
+
+def close_storage():
+    """Close every sink of the process-wide storage if it was opened."""
+    global _storage
+    if _storage is not None:
+        storage, _storage = _storage, None
+        storage.close()
+
+
+def parse_sinks(value: Optional[str]) -> List[str]:
+    """Split a comma-separated --sink value."""
+    return [name.strip() for name in (value or "").split(",") if name.strip()]
+
+
+def check_sinks(sinks: List[str]) -> Optional[str]:
+    """Return why the given sinks cannot be used, or None if they all can."""
+    if not sinks:
+        return "no storage sink given"
+    unknown_sinks = [name for name in sinks if name not in STORAGE_SINK_NAMES]
+    if unknown_sinks:
+        return (f"unknown storage sinks: {', '.join(unknown_sinks)} "
+                f"(expected any of {','.join(STORAGE_SINK_NAMES)})")
+    if "parquet" in sinks and not PYARROW_AVAILABLE:
+        return "the parquet sink needs pyarrow (pip install pyarrow)"
+    return None
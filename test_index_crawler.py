@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Tests for index_crawler.extract_index_rows on hand-written index rows,
+including titles that contain reply counts, sizes and dates of their own.
+"""
+
+from index_crawler import extract_index_rows
+
+BASE_URL = "https://bbs.example.com/znjy/"
+
+def index_page(*rows):
+    return f'<html><body><div class="list">{"".join(rows)}</div></body></html>'
+
+def index_row(row_class, href, title, byte_size, author, reply_count, date):
+    return (f'<div class="{row_class}"><a href="{href}">{title}</a> ({byte_size} bytes) - '
+            f'<a href="/members/{author}">{author}</a> (回复: {reply_count}) '
+            f'<span class="date">{date}</span></div>')
+
+def test_plain_rows():
+    rows = extract_index_rows(index_page(
+        index_row("odd", "./1.html", "孩子申请经验", 1200, "alice", 12, "02/21/2025"),
+        index_row("even", "./2.html", "升学问题", 80, "bob", 0, "02/20/2025"),
+    ), BASE_URL)
+    assert rows == [
+        {"url": BASE_URL + "1.html", "date_str": "20250221", "title": "孩子申请经验",
+         "reply_count": 12, "byte_size": 1200, "author": "alice"},
+        {"url": BASE_URL + "2.html", "date_str": "20250220", "title": "升学问题",
+         "reply_count": 0, "byte_size": 80, "author": "bob"},
+    ]
+
+def test_numbers_in_titles_are_ignored():
+    rows = extract_index_rows(index_page(
+        index_row("odd", "./1.html", "回复0楼：关于2024年申请", 300, "alice", 5, "02/21/2025"),
+        index_row("even", "./2.html", "Top 3 replies on (100 bytes) essays 01/02/2024", 4000,
+                  "bob", 7, "02/20/2025"),
+    ), BASE_URL)
+    assert [(row["reply_count"], row["byte_size"], row["date_str"]) for row in rows] == [
+        (5, 300, "20250221"),
+        (7, 4000, "20250220"),
+    ]
+    assert rows[1]["title"] == "Top 3 replies on (100 bytes) essays 01/02/2024"
+
+def test_missing_metadata_does_not_shift_rows():
+    rows = extract_index_rows(index_page(
+        '<div class="odd"><a href="./1.html">回复 9 条的老帖</a> 02/21/2025</div>',
+        index_row("even", "./2.html", "升学问题", 80, "bob", 4, "02/20/2025"),
+    ), BASE_URL)
+    assert [(row["url"], row["reply_count"], row["byte_size"], row["author"]) for row in rows] == [
+        (BASE_URL + "1.html", None, None, None),
+        (BASE_URL + "2.html", 4, 80, "bob"),
+    ]
+
+def main():
+    print("Testing extract_index_rows...")
+    try:
+        test_plain_rows()
+        test_numbers_in_titles_are_ignored()
+        test_missing_metadata_does_not_shift_rows()
+        print("Index row extraction tests PASSED")
+    except AssertionError as e:
+        print(f"Index row extraction tests FAILED: {e}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Tests for page_locator.locate_first_page and iter_date_range over a fake
+board: a map of page number to the row dates on that page, served in place
+of index_crawler.crawl_index_rows.
+"""
+
+import asyncio
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import index_crawler
+import page_locator
+from page_locator import DateOutOfReachError, iter_date_range, locate_first_page
+
+ROWS_PER_PAGE = 10
+ROWS_PER_DAY = 4
+NEWEST_DATE = datetime(2025, 3, 1)
+
+def board_dates(pages):
+    """Row dates (yyyymmdd, newest first) of a board with the given number of pages."""
+    return {
+        page: [(NEWEST_DATE - timedelta(days=row // ROWS_PER_DAY)).strftime("%Y%m%d")
+               for row in range((page - 1) * ROWS_PER_PAGE, page * ROWS_PER_PAGE)]
+        for page in range(1, pages + 1)
+    }
+
+@contextmanager
+def fake_board(page_dates):
+    """Serve page_dates through crawl_index_rows, with no local post index.
+
+    Yields the list of page numbers fetched.
+    """
+    fetched = []
+
+    async def fake_crawl_index_rows(page_number, category):
+        fetched.append(page_number)
+        if page_number not in page_dates:
+            return None
+        return [{"url": f"https://bbs.example.com/p{page_number}-{i}.html", "date_str": date_str,
+                 "title": "", "reply_count": None, "byte_size": None, "author": None}
+                for i, date_str in enumerate(page_dates[page_number])]
+
+    saved = index_crawler.crawl_index_rows, page_locator.get_post_index
+    index_crawler.crawl_index_rows = fake_crawl_index_rows
+    page_locator.get_post_index = lambda: None
+    try:
+        yield fetched
+    finally:
+        index_crawler.crawl_index_rows, page_locator.get_post_index = saved
+
+def locate(target_date_str, max_page=page_locator.MAX_PAGE_NUMBER):
+    return asyncio.run(locate_first_page("znjy", target_date_str, {}, asyncio.Semaphore(4),
+                                         max_page=max_page))
+
+def first_page_holding(page_dates, date_str):
+    return min(page for page, dates in page_dates.items() if date_str in dates)
+
+def test_locates_a_normal_date():
+    page_dates = board_dates(60)
+    with fake_board(page_dates):
+        for date_str in ("20250301", "20250225", "20250120", "20241220"):
+            assert locate(date_str) == first_page_holding(page_dates, date_str), date_str
+
+def test_date_beyond_max_page():
+    async def scan():
+        return [page async for page, _ in iter_date_range("znjy", "20241220", "20241220", max_page=20)]
+
+    with fake_board(board_dates(60)):
+        assert locate("20241220", max_page=20) is None
+        try:
+            asyncio.run(scan())
+        except DateOutOfReachError:
+            pass
+        else:
+            raise AssertionError("iter_date_range did not report a date beyond max_page")
+
+def test_pinned_posts_on_page_one():
+    page_dates = board_dates(60)
+    page_dates[1] = ["20190101", "20200615"] + page_dates[1][:-2]
+
+    async def scan():
+        return {page: posts async for page, posts in iter_date_range("znjy", "20250201", "20250201")}
+
+    with fake_board(page_dates):
+        assert locate("20250201") == first_page_holding(page_dates, "20250201")
+        pages = asyncio.run(scan())
+    assert sum(map(len, (posts["20250201"] for posts in pages.values()))) == ROWS_PER_DAY
+    assert 1 not in pages
+
+def test_short_range_fetches_only_its_pages():
+    page_dates = board_dates(60)
+    date_str = "20250226"
+    assert first_page_holding(page_dates, date_str) == 2
+
+    async def scan():
+        return {page: posts async for page, posts in iter_date_range("znjy", date_str, date_str)}
+
+    with fake_board(page_dates) as fetched:
+        pages = asyncio.run(scan())
+    assert sum(map(len, (posts[date_str] for posts in pages.values()))) == ROWS_PER_DAY
+    # Page 1 to locate the date, page 2 holding it and page 3, which is past it
+    assert sorted(fetched) == [1, 2, 3]
+
+def main():
+    print("Testing locate_first_page on a fake board...")
+    try:
+        test_locates_a_normal_date()
+        test_date_beyond_max_page()
+        test_pinned_posts_on_page_one()
+        test_short_range_fetches_only_its_pages()
+        print("Page locator tests PASSED")
+    except AssertionError as e:
+        print(f"Page locator tests FAILED: {e}")
+
+if __name__ == "__main__":
+    main()
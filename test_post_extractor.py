@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Parity test for post_extractor.extract_post against the original
+BeautifulSoup extraction, run over the saved thread pages in fixtures/.
+"""
+
+import os
+
+from bs4 import BeautifulSoup
+
+from post_extractor import extract_post
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+def extract_post_with_soup(html):
+    """The original post_crawler extraction, kept as the reference output."""
+    soup = BeautifulSoup(html, 'html.parser')
+
+    title_el = soup.select_one('h1.title')
+    post_title = title_el.get_text(strip=True) if title_el else ""
+
+    content_el = soup.select_one('#msgbodyContent')
+    post_content = content_el.get_text(strip=True) if content_el else ""
+
+    comment_els = soup.select('#comment a.post')
+    comment_titles = [el.get_text(strip=True) for el in comment_els]
+
+    return {
+        "post_title": post_title,
+        "post_content": post_content,
+        "comments": comment_titles,
+    }
+
+def fixture_paths():
+    return sorted(
+        os.path.join(FIXTURES_DIR, name)
+        for name in os.listdir(FIXTURES_DIR)
+        if name.startswith("post_") and name.endswith(".html")
+    )
+
+def test_post_extractor_parity():
+    paths = fixture_paths()
+    assert paths, f"No post fixtures found in {FIXTURES_DIR}"
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            html = f.read()
+        expected = extract_post_with_soup(html)
+        assert extract_post(html) == expected, os.path.basename(path)
+        # The fetch layer may hand over raw bytes instead of text
+        assert extract_post(html.encode("utf-8")) == expected, os.path.basename(path)
+
+def main():
+    print("Comparing extract_post with the BeautifulSoup extraction...")
+    try:
+        test_post_extractor_parity()
+        print("Post extractor parity test PASSED")
+    except AssertionError as e:
+        print(f"Post extractor parity test FAILED: {e}")
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,109 @@
-from crawl4ai import AsyncWebCrawler
-from crawl4ai.async_configs import BrowserConfig, CrawlerRunConfig
+import asyncio
+
 from bs4 import BeautifulSoup
 
-from typing import Optional
+from datetime import datetime, timedelta
+from typing import List, Optional
 
-async def fetch_page_content(url: str) -> Optional[str]:
-    """Fetch HTML content from the given URL."""
-    try:
-        browser_config = BrowserConfig()
-        run_config = CrawlerRunConfig()
+from fetchers import get_fetcher
+from fetch_scheduler import FetchError
+from constants import PAGE_KIND_INDEX, PAGE_KIND_POST
+from metrics import get_metrics
+from response_cache import get_response_cache
+
+async def fetch_page_content(url: str, required_selectors: Optional[List[str]] = None,
+                             page_kind: Optional[str] = None) -> Optional[str]:
+    """Fetch HTML content from the given URL.
 
-        async with AsyncWebCrawler(config=browser_config) as crawler:
-            result = await crawler.arun(
-                url=url,
-                config=run_config
+    required_selectors lists CSS selectors the page must contain; the default
+    fetch engine falls back to a browser render when they are missing.
+    page_kind ('index' or 'post') selects the response cache TTL; pages
+    without a kind are never cached.
+
+    Returns None if the page is permanently unavailable. Raises FetchError
+    if it still failed after retrying and no cached copy can stand in, so
+    callers can tell a lost page from an empty one. Only post pages fall back
+    to a stale cached copy: an old index page would be read as the board's
+    current layout, so an index page that cannot be fetched always raises.
+    """
+    cache = get_response_cache() if page_kind else None
+    metrics = get_metrics()
+    entry = None
+    stale_entry = None
+    # Cache errors are logged and ignored; the network copy never depends on the cache
+    if cache is not None and cache.readable:
+        try:
+            entry = cache.get(url)
+        except Exception as e:
+            print(f"Error reading cached copy of {url}: {e}")
+        if entry and cache.is_fresh(entry, page_kind):
+            metrics.inc("cache_hits")
+            return entry["html"]
+        if page_kind == PAGE_KIND_POST:
+            stale_entry = entry
+
+    try:
+        with metrics.timer("fetch"):
+            response = await get_fetcher().fetch_response(
+                url, required_selectors,
+                etag=entry["etag"] if entry else None,
+                last_modified=entry["last_modified"] if entry else None
             )
-            return result.html
+    except FetchError:
+        metrics.inc("fetch_failures")
+        if stale_entry:
+            print(f"Serving stale cached copy of {url}")
+            metrics.inc("cache_stale_served")
+            return stale_entry["html"]
+        raise
     except Exception as e:
         print(f"Error fetching page content: {e}")
+        if page_kind == PAGE_KIND_INDEX:
+            # A lost index page must stop the scan, not pass for the end of the board
+            raise FetchError(f"Error fetching {url}: {e}") from e
         return None
+    if response is None:
+        metrics.inc("pages_unavailable")
+        if stale_entry:
+            print(f"Serving stale cached copy of {url}")
+            metrics.inc("cache_stale_served")
+            return stale_entry["html"]
+        return None
+
+    if response["status"] == 304:
+        metrics.inc("cache_revalidated")
+        try:
+            cache.touch(url)
+        except Exception as e:
+            print(f"Error refreshing cached copy of {url}: {e}")
+        return entry["html"]
+
+    metrics.inc("pages_fetched")
+    if page_kind:
+        metrics.inc(f"{page_kind}_pages_fetched")
+    metrics.inc("bytes_fetched", len(response["html"].encode("utf-8")))
+    if cache is not None and cache.writable:
+        try:
+            # Compressing and writing the page would stall every in-flight fetch
+            await asyncio.to_thread(cache.put, url, response["html"], response["etag"],
+                                    response["last_modified"])
+        except Exception as e:
+            print(f"Error caching {url}: {e}")
+    return response["html"]
+
+def date_strs_between(start_date_str: str, end_date_str: str) -> List[str]:
+    """Return every yyyymmdd date from start_date_str to end_date_str inclusive."""
+    day = datetime.strptime(start_date_str, "%Y%m%d")
+    end_day = datetime.strptime(end_date_str, "%Y%m%d")
+    date_strs = []
+    while day <= end_day:
+        date_strs.append(day.strftime("%Y%m%d"))
+        day += timedelta(days=1)
+    return date_strs
+
+def shift_date_str(date_str: str, days: int) -> str:
+    """Return the yyyymmdd date days after (or before, if negative) date_str."""
+    return (datetime.strptime(date_str, "%Y%m%d") + timedelta(days=days)).strftime("%Y%m%d")
 
 def parse_html_content(html_content: str) -> BeautifulSoup:
     """Parse HTML content using BeautifulSoup."""
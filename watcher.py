@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+Long-running watcher that keeps categories up to date within minutes.
+
+Instead of a daily cron crawl of a date two days back, the watcher starts
+the fetcher, browser pool, parse pool and storage sinks once and then polls
+the newest index page of each category on an adaptive interval. Each poll
+is diffed against the previous snapshot of the page:
+
+- new threads (not in the snapshot and not already stored) are fetched
+- updated threads (reply count changed since the snapshot) are refetched,
+  which refreshes their stored comments
+
+Both go through the post filter (post_filter.py) first, so a thread without
+replies is only fetched once its reply count changes.
+
+When most rows of a page are new since the last poll, threads may have
+been pushed further down, so the next page is polled as well (up to
+WATCH_MAX_PAGES). The interval halves after a poll that found changes and
+grows by half after a quiet one, within the configured bounds.
+
+Usage: python watcher.py [--categories znjy,tzlc] [--min_interval 30] ...
+"""
+
+import argparse
+import asyncio
+import signal
+import sys
+from typing import Dict, List, Optional, Tuple
+
+from constants import (ZNJY_CATEGORY, BROWSER_POOL_SIZE, BROWSER_MAX_PAGES_PER_INSTANCE,
+                       MAX_CONCURRENT_POST_FETCHES, POST_FETCH_TIMEOUT_SECONDS, FETCH_ENGINE,
+                       PARSE_EXECUTOR, PARSE_WORKERS, METRICS_REPORT_PATH,
+                       WATCH_POLL_INTERVAL_SECONDS, WATCH_MIN_INTERVAL_SECONDS,
+                       WATCH_MAX_INTERVAL_SECONDS, WATCH_MAX_PAGES, WATCH_CHURN_THRESHOLD,
+                       POST_FILTER_MIN_REPLIES, POST_FILTER_MIN_BYTES,
+                       POST_FILTER_TITLE_INCLUDE, POST_FILTER_TITLE_EXCLUDE, BROWSER_PROFILE,
+                       STORAGE_SINKS)
+from browser_pool import init_browser_pool, close_browser_pool
+from browser_profiles import BROWSER_PROFILES
+from categories import get_category, list_categories
+from fetch_scheduler import init_fetch_scheduler
+from fetchers import FETCH_ENGINES, init_fetcher, close_fetcher
+from index_crawler import crawl_index_rows
+from metrics import init_metrics, get_metrics
+from parse_pool import PARSE_EXECUTORS, init_parse_pool, close_parse_pool
+from post_filter import get_post_filter, init_post_filter, parse_keywords
+from pipeline import FETCH_SKIPPED, fetch_post_with_status, write_batch
+from post_index import init_post_index, close_post_index
+from response_cache import init_response_cache, close_response_cache
+from seen_urls import init_seen_urls, get_seen_urls
+from storage import STORAGE_SINK_NAMES, init_storage, close_storage, parse_sinks, check_sinks
+import async_db
+
+
+def diff_rows(rows: List[Dict], snapshot: Dict[str, Optional[int]], seen_urls=None) -> Tuple[List[Dict], List[Dict]]:
+    """Split index rows into new and updated threads relative to the last snapshot.
+
+    Returns:
+        Tuple[List[Dict], List[Dict]]: Rows of threads that are new (not in
+        the snapshot and not already stored) and rows whose reply count
+        changed since the snapshot
+    """
+    new_rows, updated_rows = [], []
+    for row in rows:
+        url = row["url"]
+        if not url or not row["date_str"]:
+            continue
+        if url not in snapshot:
+            if seen_urls is None or url not in seen_urls:
+                new_rows.append(row)
+        elif row["reply_count"] is not None and row["reply_count"] != snapshot[url]:
+            updated_rows.append(row)
+    return new_rows, updated_rows
+
+
+class CategoryWatch:
+    """Polling state of one category: the last snapshot and the current interval."""
+
+    def __init__(self, category: str, interval: float = WATCH_POLL_INTERVAL_SECONDS,
+                 min_interval: float = WATCH_MIN_INTERVAL_SECONDS,
+                 max_interval: float = WATCH_MAX_INTERVAL_SECONDS,
+                 max_pages: int = WATCH_MAX_PAGES, churn_threshold: float = WATCH_CHURN_THRESHOLD):
+        self.category = category
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.interval = min(max(interval, min_interval), max_interval)
+        self.max_pages = max(1, max_pages)
+        self.churn_threshold = churn_threshold
+        # url -> reply count as of the last poll
+        self.snapshot: Dict[str, Optional[int]] = {}
+
+    def adapt_interval(self, changes: int):
+        if changes:
+            self.interval = max(self.min_interval, self.interval / 2)
+        else:
+            self.interval = min(self.max_interval, self.interval * 1.5)
+
+    async def poll_rows(self) -> List[Dict]:
+        """Fetch page 1, and the following pages while churn since the last poll is high."""
+        rows = []
+        for page_number in range(1, self.max_pages + 1):
+            page_rows = await crawl_index_rows(page_number, self.category)
+            if not page_rows:
+                break
+            rows.extend(page_rows)
+            unseen = sum(1 for row in page_rows if row["url"] and row["url"] not in self.snapshot)
+            # On the first poll there is nothing to compare against
+            if (not self.snapshot or page_number == self.max_pages
+                    or unseen < self.churn_threshold * len(page_rows)):
+                break
+            print(f"{self.category}: {unseen}/{len(page_rows)} rows new on page {page_number}; "
+                  f"polling page {page_number + 1}")
+        return rows
+
+
+async def fetch_and_store(category: str, rows: List[Dict], max_concurrency: int,
+                          post_timeout: float) -> List[str]:
+    """Fetch the threads of rows, store them and return the URLs that failed."""
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def fetch_one(row):
+        async with semaphore:
+            status, post = await fetch_post_with_status(row["url"], post_timeout, category)
+        return row, status, post
+
+    results = await asyncio.gather(*(fetch_one(row) for row in rows))
+    batch = [(row["date_str"], post) for row, _, post in results if post is not None]
+    empty_posts = [(row["date_str"], row["url"]) for row, status, _ in results if status == FETCH_SKIPPED]
+    failed_urls = [row["url"] for row, status, post in results if post is None and status != FETCH_SKIPPED]
+
+    seen_urls = get_seen_urls()
+    if batch:
+        written_urls, write_failed_urls = await write_batch(batch, category)
+        failed_urls.extend(write_failed_urls)
+        if seen_urls is not None:
+            seen_urls.update(written_urls)
+    if empty_posts and await async_db.record_known_urls(empty_posts, category, FETCH_SKIPPED):
+        if seen_urls is not None:
+            seen_urls.update(url for _, url in empty_posts)
+    return failed_urls
+
+
+async def poll_category(watch: CategoryWatch, max_concurrency: int, post_timeout: float) -> int:
+    """Poll one category once, fetch what changed and return the number of changed threads."""
+    metrics = get_metrics()
+    metrics.inc("watch_polls")
+    rows = await watch.poll_rows()
+    new_rows, updated_rows = diff_rows(rows, watch.snapshot, get_seen_urls())
+    changed_rows = new_rows + updated_rows
+    metrics.inc("watch_new_threads", len(new_rows))
+    metrics.inc("watch_updated_threads", len(updated_rows))
+    post_filter = get_post_filter()
+    fetch_rows = [row for row in changed_rows if post_filter.accepts(row)]
+    metrics.inc("posts_filtered", len(changed_rows) - len(fetch_rows))
+
+    failed_urls = []
+    if changed_rows:
+        print(f"{watch.category}: {len(new_rows)} new and {len(updated_rows)} updated threads, "
+              f"{len(fetch_rows)} to fetch")
+    if fetch_rows:
+        failed_urls = await fetch_and_store(watch.category, fetch_rows,
+                                            min(max_concurrency, get_category(watch.category)["max_concurrency"]),
+                                            post_timeout)
+
+    previous = watch.snapshot
+    watch.snapshot = {row["url"]: row["reply_count"] for row in rows if row["url"]}
+    for url in failed_urls:
+        # Keep the old state so the thread shows up as changed again next poll
+        if url in previous:
+            watch.snapshot[url] = previous[url]
+        else:
+            watch.snapshot.pop(url, None)
+    return len(changed_rows)
+
+
+async def watch_category(watch: CategoryWatch, stop_event: asyncio.Event, max_concurrency: int,
+                         post_timeout: float):
+    while not stop_event.is_set():
+        try:
+            changes = await poll_category(watch, max_concurrency, post_timeout)
+        except Exception as e:
+            # A failed poll must not stop the service; back off like a quiet poll
+            print(f"{watch.category}: poll failed: {e}")
+            changes = 0
+        watch.adapt_interval(changes)
+        print(f"{watch.category}: next poll in {watch.interval:.0f}s")
+        try:
+            await asyncio.wait_for(stop_event.wait(), timeout=watch.interval)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def main(categories, browser_pool_size=BROWSER_POOL_SIZE, browser_max_pages=BROWSER_MAX_PAGES_PER_INSTANCE,
+               max_concurrency=MAX_CONCURRENT_POST_FETCHES, post_timeout=POST_FETCH_TIMEOUT_SECONDS,
+               fetch_engine=FETCH_ENGINE, parse_executor=PARSE_EXECUTOR, parse_workers=PARSE_WORKERS,
+               interval=WATCH_POLL_INTERVAL_SECONDS, min_interval=WATCH_MIN_INTERVAL_SECONDS,
+               max_interval=WATCH_MAX_INTERVAL_SECONDS, max_pages=WATCH_MAX_PAGES,
+               report_path=METRICS_REPORT_PATH, min_replies=POST_FILTER_MIN_REPLIES,
+               min_bytes=POST_FILTER_MIN_BYTES, title_include=POST_FILTER_TITLE_INCLUDE,
+               title_exclude=POST_FILTER_TITLE_EXCLUDE, browser_profile=BROWSER_PROFILE,
+               sinks=STORAGE_SINKS):
+    """Watch every category until SIGINT/SIGTERM, then shut down cleanly."""
+    metrics = init_metrics()
+    metrics.set_info(mode="watch", categories=categories, fetch_engine=fetch_engine,
+                     max_concurrency=max_concurrency, min_interval=min_interval,
+                     max_interval=max_interval, max_pages=max_pages, min_replies=min_replies,
+                     min_bytes=min_bytes, title_include=title_include, title_exclude=title_exclude,
+                     browser_profile=browser_profile, sinks=sinks)
+
+    # Everything is started once and kept warm for the lifetime of the service
+    init_browser_pool(browser_pool_size, browser_max_pages, profile=browser_profile)
+    init_fetch_scheduler()
+    init_fetcher(fetch_engine)
+    init_parse_pool(parse_executor, parse_workers)
+    # Index pages must never be served from the cache; fetched posts are still stored in it
+    init_response_cache("refresh")
+    init_post_index()
+    init_post_filter(min_replies, min_bytes, title_include, title_exclude)
+    init_storage(sinks)
+    async_db.init_db_executor()
+
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop_event.set)
+
+    watches = [CategoryWatch(category, interval, min_interval, max_interval, max_pages)
+               for category in categories]
+    print(f"Watching {', '.join(categories)} (polling every {min_interval:g}-{max_interval:g}s)")
+    try:
+        if not await async_db.create_tables():
+            raise RuntimeError("Could not create or upgrade the storage tables; see the errors above")
+        init_seen_urls()
+        await asyncio.gather(*(watch_category(watch, stop_event, max_concurrency, post_timeout)
+                               for watch in watches))
+    finally:
+        print("Watcher stopping...")
+        await close_fetcher()
+        await close_browser_pool()
+        close_parse_pool()
+        close_response_cache()
+        close_post_index()
+        async_db.close_db_executor()
+        close_storage()
+        metrics.print_summary()
+        metrics.write_report(report_path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Poll the newest index pages and fetch new or updated threads")
+    parser.add_argument("--categories", default=ZNJY_CATEGORY,
+                        help=f"Comma-separated categories to watch (default: {ZNJY_CATEGORY}; "
+                             f"known: {','.join(list_categories())})")
+    parser.add_argument("--sink", default=",".join(STORAGE_SINKS),
+                        help=f"Comma-separated storage sinks, any of {','.join(STORAGE_SINK_NAMES)}; "
+                             f"posts are written to all of them (default: {','.join(STORAGE_SINKS)})")
+    parser.add_argument("--interval", type=float, default=WATCH_POLL_INTERVAL_SECONDS,
+                        help=f"Initial poll interval in seconds (default: {WATCH_POLL_INTERVAL_SECONDS})")
+    parser.add_argument("--min_interval", type=float, default=WATCH_MIN_INTERVAL_SECONDS,
+                        help=f"Shortest poll interval in seconds (default: {WATCH_MIN_INTERVAL_SECONDS})")
+    parser.add_argument("--max_interval", type=float, default=WATCH_MAX_INTERVAL_SECONDS,
+                        help=f"Longest poll interval in seconds (default: {WATCH_MAX_INTERVAL_SECONDS})")
+    parser.add_argument("--max_pages", type=int, default=WATCH_MAX_PAGES,
+                        help=f"Index pages polled when churn is high (default: {WATCH_MAX_PAGES})")
+    parser.add_argument("--fetch_engine", choices=FETCH_ENGINES, default=FETCH_ENGINE,
+                        help=f"Page fetch engine (default: {FETCH_ENGINE})")
+    parser.add_argument("--parse_executor", choices=PARSE_EXECUTORS, default=PARSE_EXECUTOR,
+                        help=f"Where HTML is parsed (default: {PARSE_EXECUTOR})")
+    parser.add_argument("--parse_workers", type=int, default=PARSE_WORKERS,
+                        help="Parse pool size (default: one per CPU)")
+    parser.add_argument("--browser_profile", choices=BROWSER_PROFILES, default=BROWSER_PROFILE,
+                        help=f"Browser render profile; 'text' blocks images, styles, ads and third-party scripts (default: {BROWSER_PROFILE})")
+    parser.add_argument("--browser_pool_size", type=int, default=BROWSER_POOL_SIZE,
+                        help=f"Number of browser instances to share across fetches (default: {BROWSER_POOL_SIZE})")
+    parser.add_argument("--browser_max_pages", type=int, default=BROWSER_MAX_PAGES_PER_INSTANCE,
+                        help=f"Recycle a browser instance after this many pages (default: {BROWSER_MAX_PAGES_PER_INSTANCE})")
+    parser.add_argument("--max_concurrency", type=int, default=MAX_CONCURRENT_POST_FETCHES,
+                        help=f"Maximum number of posts fetched concurrently (default: {MAX_CONCURRENT_POST_FETCHES})")
+    parser.add_argument("--post_timeout", type=float, default=POST_FETCH_TIMEOUT_SECONDS,
+                        help=f"Per-post fetch timeout in seconds (default: {POST_FETCH_TIMEOUT_SECONDS})")
+    parser.add_argument("--min_replies", type=int, default=POST_FILTER_MIN_REPLIES,
+                        help=f"Skip threads whose index row shows fewer replies (default: {POST_FILTER_MIN_REPLIES})")
+    parser.add_argument("--min_bytes", type=int, default=POST_FILTER_MIN_BYTES,
+                        help=f"Skip threads whose index row shows a smaller body in bytes (default: {POST_FILTER_MIN_BYTES})")
+    parser.add_argument("--title_include",
+                        help="Comma-separated keywords; only fetch threads whose title contains one")
+    parser.add_argument("--title_exclude",
+                        help="Comma-separated keywords; skip threads whose title contains any")
+    parser.add_argument("--report_path", default=METRICS_REPORT_PATH,
+                        help=f"Where to write the JSON metrics report on shutdown (default: {METRICS_REPORT_PATH})")
+    args = parser.parse_args()
+
+    categories = [name.strip() for name in args.categories.split(",") if name.strip()]
+    unknown = [name for name in categories if name not in list_categories()]
+    if unknown:
+        print(f"Unknown categories: {', '.join(unknown)}")
+        sys.exit(1)
+
+    sinks = parse_sinks(args.sink)
+    sink_error = check_sinks(sinks)
+    if sink_error:
+        parser.error(sink_error)
+
+    asyncio.run(main(categories, args.browser_pool_size, args.browser_max_pages, args.max_concurrency,
+                     args.post_timeout, args.fetch_engine, args.parse_executor, args.parse_workers,
+                     args.interval, args.min_interval, args.max_interval, args.max_pages,
+                     args.report_path, args.min_replies, args.min_bytes,
+                     parse_keywords(args.title_include), parse_keywords(args.title_exclude),
+                     args.browser_profile, sinks))